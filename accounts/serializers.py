@@ -1,19 +1,24 @@
 from rest_framework import serializers
+from medical_course.images import variant_srcset
 from .models import User
 
 
 class UserSerializer(serializers.ModelSerializer):
     """User serializer for API responses"""
+    profile_image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = [
             'id', 'email', 'first_name', 'last_name', 'username',
             'user_type', 'phone_number', 'birth_date', 'profile_image',
-            'is_active', 'created_at', 'updated_at'
+            'profile_image_srcset', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    def get_profile_image_srcset(self, obj):
+        return variant_srcset(obj.profile_image, obj.profile_image_variants, self.context.get('request'))
+    
     def to_representation(self, instance):
         data = super().to_representation(instance)
         # Add computed fields
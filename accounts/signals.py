@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from medical_course.images import refresh_variants
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def refresh_profile_image_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Skips e.g. the last_login update on every login
+    if not raw and (update_fields is None or 'profile_image' in update_fields):
+        transaction.on_commit(
+            lambda: refresh_variants(instance, 'profile_image', settings.PROFILE_IMAGE_VARIANT_WIDTHS)
+        )
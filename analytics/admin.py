@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import DailyMetrics
+
+
+@admin.register(DailyMetrics)
+class DailyMetricsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'revenue', 'purchases', 'new_users', 'new_tickets', 'pending_commissions', 'computed_at']
+    date_hierarchy = 'date'
+    ordering = ['-date']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
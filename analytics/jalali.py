@@ -0,0 +1,68 @@
+from datetime import date
+
+JALALI_MONTH_NAMES = [
+    'فروردین', 'اردیبهشت', 'خرداد', 'تیر', 'مرداد', 'شهریور',
+    'مهر', 'آبان', 'آذر', 'دی', 'بهمن', 'اسفند',
+]
+
+_GREGORIAN_MONTH_OFFSETS = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
+
+
+def to_jalali(value):
+    """Convert a Gregorian ``date`` to a ``(year, month, day)`` Jalali tuple"""
+    gy, gm, gd = value.year, value.month, value.day
+    gy2 = gy + 1 if gm > 2 else gy
+    days = (
+        355666 + 365 * gy + (gy2 + 3) // 4 - (gy2 + 99) // 100 + (gy2 + 399) // 400
+        + gd + _GREGORIAN_MONTH_OFFSETS[gm - 1]
+    )
+    jy = -1595 + 33 * (days // 12053)
+    days %= 12053
+    jy += 4 * (days // 1461)
+    days %= 1461
+    if days > 365:
+        jy += (days - 1) // 365
+        days = (days - 1) % 365
+    if days < 186:
+        return jy, 1 + days // 31, 1 + days % 31
+    return jy, 7 + (days - 186) // 30, 1 + (days - 186) % 30
+
+
+def from_jalali(jy, jm, jd):
+    """Convert a Jalali date to a Gregorian ``date``"""
+    jy += 1595
+    days = -355668 + 365 * jy + (jy // 33) * 8 + ((jy % 33) + 3) // 4 + jd
+    days += (jm - 1) * 31 if jm < 7 else (jm - 7) * 30 + 186
+    gy = 400 * (days // 146097)
+    days %= 146097
+    if days > 36524:
+        days -= 1
+        gy += 100 * (days // 36524)
+        days %= 36524
+        if days >= 365:
+            days += 1
+    gy += 4 * (days // 1461)
+    days %= 1461
+    if days > 365:
+        gy += (days - 1) // 365
+        days = (days - 1) % 365
+    leap = (gy % 4 == 0 and gy % 100 != 0) or gy % 400 == 0
+    month_lengths = [31, 29 if leap else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+    gd = days + 1
+    gm = 1
+    for length in month_lengths:
+        if gd <= length:
+            break
+        gd -= length
+        gm += 1
+    return date(gy, gm, gd)
+
+
+def jalali_months_back(value, count):
+    """The ``count`` Jalali ``(year, month)`` pairs ending with the month of ``value``, newest first"""
+    jy, jm, _ = to_jalali(value)
+    months = []
+    for _ in range(count):
+        months.append((jy, jm))
+        jy, jm = (jy, jm - 1) if jm > 1 else (jy - 1, 12)
+    return months
@@ -0,0 +1,19 @@
+from datetime import date
+from django.conf import settings
+from jobs.queue import job
+from .models import DailyMetrics
+from .rollup import rollup
+
+
+@job('analytics.rollup_metrics')
+def rollup_metrics():
+    rollup(lookback=settings.METRICS_ROLLUP_LOOKBACK_DAYS)
+
+
+@job('analytics.rollup_day')
+def rollup_day(day):
+    """Store one past day again, e.g. after a payment for a purchase made that day completed late"""
+    day = date.fromisoformat(day)
+    # Days not stored yet are left to rollup_metrics; storing one here would make it skip the days before
+    if DailyMetrics.objects.filter(date=day).exists():
+        rollup(since=day, until=day)
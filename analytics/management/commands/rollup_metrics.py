@@ -0,0 +1,21 @@
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from analytics.rollup import rollup
+
+
+class Command(BaseCommand):
+    help = 'Roll up daily dashboard metrics for the days since the last run'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help='Recompute from this date (YYYY-MM-DD) instead of the last stored day')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day to roll up (default: yesterday)')
+        parser.add_argument('--lookback', type=int, default=settings.METRICS_ROLLUP_LOOKBACK_DAYS,
+                            help='Also recompute this many already stored days')
+    
+    def handle(self, *args, **options):
+        rows = rollup(since=options['since'], until=options['until'], lookback=options['lookback'])
+        if rows:
+            self.stdout.write(self.style.SUCCESS(f'Rolled up {len(rows)} days ({rows[0].date} to {rows[-1].date})'))
+        else:
+            self.stdout.write('Nothing to roll up')
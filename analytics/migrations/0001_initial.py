@@ -0,0 +1,41 @@
+# Generated by Django 4.2.23 on 2026-10-17 20:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='تاریخ')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='درآمد')),
+                ('purchases', models.PositiveIntegerField(default=0, verbose_name='خریدها')),
+                ('new_users', models.PositiveIntegerField(default=0, verbose_name='کاربران جدید')),
+                ('new_admin_users', models.PositiveIntegerField(default=0)),
+                ('new_marketer_users', models.PositiveIntegerField(default=0)),
+                ('new_customer_users', models.PositiveIntegerField(default=0)),
+                ('new_tickets', models.PositiveIntegerField(default=0, verbose_name='تیکت\u200cهای جدید')),
+                ('admin_users', models.PositiveIntegerField(default=0)),
+                ('marketer_users', models.PositiveIntegerField(default=0)),
+                ('customer_users', models.PositiveIntegerField(default=0)),
+                ('open_tickets', models.PositiveIntegerField(default=0)),
+                ('in_progress_tickets', models.PositiveIntegerField(default=0)),
+                ('closed_tickets', models.PositiveIntegerField(default=0)),
+                ('pending_commissions', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='کمیسیون\u200cهای در انتظار')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'آمار روزانه',
+                'verbose_name_plural': 'آمار روزانه',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import models
+
+
+class DailyMetrics(models.Model):
+    """One row of dashboard figures per (Tehran) calendar day.
+
+    Revenue, purchases and new users are what happened on that day. The
+    user, ticket and commission totals are running totals of everything
+    created up to the end of that day, grouped by current state when the
+    day was rolled up.
+    """
+    date = models.DateField(unique=True, verbose_name="تاریخ")
+    
+    # Daily activity
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="درآمد")
+    purchases = models.PositiveIntegerField(default=0, verbose_name="خریدها")
+    new_users = models.PositiveIntegerField(default=0, verbose_name="کاربران جدید")
+    new_admin_users = models.PositiveIntegerField(default=0)
+    new_marketer_users = models.PositiveIntegerField(default=0)
+    new_customer_users = models.PositiveIntegerField(default=0)
+    new_tickets = models.PositiveIntegerField(default=0, verbose_name="تیکت‌های جدید")
+    
+    # Running totals at the end of the day
+    admin_users = models.PositiveIntegerField(default=0)
+    marketer_users = models.PositiveIntegerField(default=0)
+    customer_users = models.PositiveIntegerField(default=0)
+    open_tickets = models.PositiveIntegerField(default=0)
+    in_progress_tickets = models.PositiveIntegerField(default=0)
+    closed_tickets = models.PositiveIntegerField(default=0)
+    pending_commissions = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="کمیسیون‌های در انتظار")
+    
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "آمار روزانه"
+        verbose_name_plural = "آمار روزانه"
+        ordering = ['-date']
+    
+    def __str__(self):
+        return str(self.date)
+    
+    @property
+    def total_users(self):
+        return self.admin_users + self.marketer_users + self.customer_users
+    
+    @property
+    def total_tickets(self):
+        return self.open_tickets + self.in_progress_tickets + self.closed_tickets
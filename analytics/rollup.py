@@ -0,0 +1,126 @@
+from datetime import datetime, time, timedelta
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from accounts.models import User
+from payments.models import MarketerCommission, Purchase
+from tickets.models import SupportTicket
+from .models import DailyMetrics
+
+USER_TYPE_FIELDS = {
+    'admin': ('new_admin_users', 'admin_users'),
+    'staff': ('new_marketer_users', 'marketer_users'),
+    'customer': ('new_customer_users', 'customer_users'),
+}
+TICKET_STATUS_FIELDS = {
+    'open': 'open_tickets',
+    'in_progress': 'in_progress_tickets',
+    'closed': 'closed_tickets',
+}
+METRIC_FIELDS = [
+    'revenue', 'purchases', 'new_users', 'new_admin_users', 'new_marketer_users',
+    'new_customer_users', 'new_tickets', 'admin_users', 'marketer_users', 'customer_users',
+    'open_tickets', 'in_progress_tickets', 'closed_tickets', 'pending_commissions', 'computed_at',
+]
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def compute_days(start, end):
+    """Build unsaved DailyMetrics rows for every day from ``start`` to ``end`` inclusive.
+
+    Uses a fixed seven queries however long the range is: one grouped
+    query per source table for the range, plus one baseline query per
+    running total for everything created before it.
+    """
+    since, until = day_start(start), day_start(end + timedelta(days=1))
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    rows = {day: DailyMetrics(date=day) for day in days}
+
+    def per_day(queryset, *group, **aggregates):
+        return queryset.filter(created_at__gte=since, created_at__lt=until).annotate(
+            day=TruncDate('created_at')
+        ).values('day', *group).annotate(**aggregates).order_by()
+
+    def before(queryset, group, **aggregates):
+        return {
+            row[group]: row for row in
+            queryset.filter(created_at__lt=since).values(group).annotate(**aggregates).order_by()
+        }
+
+    for row in per_day(Purchase.objects.filter(payment_status='completed'), revenue=Sum('amount'), count=Count('id')):
+        rows[row['day']].revenue = row['revenue'] or 0
+        rows[row['day']].purchases = row['count']
+
+    users = {user_type: row['count'] for user_type, row in before(User.objects, 'user_type', count=Count('id')).items()}
+    new_users = {}
+    for row in per_day(User.objects, 'user_type', count=Count('id')):
+        new_users.setdefault(row['day'], {})[row['user_type']] = row['count']
+
+    tickets = {ticket_status: row['count'] for ticket_status, row in before(SupportTicket.objects, 'status', count=Count('id')).items()}
+    new_tickets = {}
+    for row in per_day(SupportTicket.objects, 'status', count=Count('id')):
+        new_tickets.setdefault(row['day'], {})[row['status']] = row['count']
+
+    pending = MarketerCommission.objects.filter(status='pending')
+    pending_total = pending.filter(created_at__lt=since).aggregate(total=Sum('amount'))['total'] or 0
+    new_pending = {row['day']: row['total'] for row in per_day(pending, total=Sum('amount'))}
+
+    for day in days:
+        metrics = rows[day]
+
+        for user_type, count in new_users.get(day, {}).items():
+            users[user_type] = users.get(user_type, 0) + count
+            metrics.new_users += count
+            if user_type in USER_TYPE_FIELDS:
+                setattr(metrics, USER_TYPE_FIELDS[user_type][0], count)
+        for user_type, (_, total_field) in USER_TYPE_FIELDS.items():
+            setattr(metrics, total_field, users.get(user_type, 0))
+
+        for ticket_status, count in new_tickets.get(day, {}).items():
+            tickets[ticket_status] = tickets.get(ticket_status, 0) + count
+            metrics.new_tickets += count
+        for ticket_status, field in TICKET_STATUS_FIELDS.items():
+            setattr(metrics, field, tickets.get(ticket_status, 0))
+
+        pending_total += new_pending.get(day) or 0
+        metrics.pending_commissions = pending_total
+
+    return [rows[day] for day in days]
+
+
+def first_activity_date():
+    first = User.objects.aggregate(first=Min('created_at'))['first']
+    return timezone.localdate(first) if first else timezone.localdate()
+
+
+def first_unstored_date():
+    """The day after the newest stored row: where rollup() picks up next"""
+    last = DailyMetrics.objects.aggregate(last=Max('date'))['last']
+    return last + timedelta(days=1) if last else first_activity_date()
+
+
+def rollup(since=None, until=None, lookback=0):
+    """Store complete days that haven't been rolled up yet; returns the stored rows.
+
+    Without ``since`` this starts the day after the newest stored row
+    (``lookback`` days earlier, to pick up late payment confirmations and
+    status changes) and stops at ``until``, which defaults to yesterday.
+    """
+    until = until or timezone.localdate() - timedelta(days=1)
+    if since is None:
+        last = DailyMetrics.objects.aggregate(last=Max('date'))['last']
+        since = last + timedelta(days=1 - lookback) if last else first_activity_date()
+    if since > until:
+        return []
+
+    rows = compute_days(since, until)
+    DailyMetrics.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=METRIC_FIELDS,
+    )
+    return rows
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .hls import schedule_processing
 from .models import Category, Course, Section, Video, Attachment, Review, CoursePackage
 
 @admin.register(Category)
@@ -61,10 +62,19 @@ class CourseAdmin(admin.ModelAdmin):
 
 @admin.register(Video)
 class VideoAdmin(admin.ModelAdmin):
-    list_display = ('title', 'section', 'order', 'duration_seconds', 'is_preview', 'created_at')
-    list_filter = ('section__course', 'is_preview', 'created_at')
+    list_display = ('title', 'section', 'order', 'duration_seconds', 'is_preview', 'hls_status', 'created_at')
+    list_filter = ('section__course', 'is_preview', 'hls_status', 'created_at')
     search_fields = ('title', 'description', 'section__title')
     ordering = ('section', 'order')
+    readonly_fields = ('hls_status', 'hls_manifest', 'hls_error', 'hls_processed_at')
+    actions = ['reprocess_hls']
+    
+    def reprocess_hls(self, request, queryset):
+        video_ids = list(queryset.exclude(hls_status='processing').values_list('id', flat=True))
+        for video_id in video_ids:
+            schedule_processing(video_id)
+        self.message_user(request, f"پردازش HLS برای {len(video_ids)} ویدیو در صف قرار گرفت.")
+    reprocess_hls.short_description = "پردازش مجدد HLS"
 
 @admin.register(Attachment)
 class AttachmentAdmin(admin.ModelAdmin):
@@ -9,6 +9,9 @@ urlpatterns = [
     path('my-courses/', api_views.MyCoursesView.as_view(), name='api_my_courses'),
     path('packages/', api_views.PackageListView.as_view(), name='api_package_list'),
     path('packages/<slug:slug>/', api_views.PackageDetailView.as_view(), name='api_package_detail'),
+    path('media/videos/<int:video_id>/', api_views.VideoFileView.as_view(), name='api_video_file'),
+    path('media/videos/<int:video_id>/hls/<path:name>', api_views.VideoHLSView.as_view(), name='api_video_hls'),
+    path('media/attachments/<int:attachment_id>/', api_views.AttachmentFileView.as_view(), name='api_attachment_file'),
     path('<slug:course_slug>/sections/<int:section_id>/', api_views.SectionDetailView.as_view(), name='api_section_detail'),
     path('<slug:course_slug>/videos/<int:video_id>/', api_views.VideoDetailView.as_view(), name='api_video_detail'),
     path('<slug:slug>/', api_views.CourseDetailView.as_view(), name='api_course_detail'),
@@ -1,44 +1,67 @@
+import posixpath
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import status
-from django.db.models import Q
-from .models import Course, Category, Section, Video, CoursePackage
+from .cache import cached_payload
+from .conditional import category_validators, course_validators, package_validators, section_validators
+from .media import serve_protected_file, serve_protected_name
+from .models import Course, Category, Section, Video, Attachment, CoursePackage
+from payments.entitlements import can_access
+from .pagination import CourseCursorPagination, CourseSearchPagination
+from .search import search_courses
 from .serializers import (
     CourseListSerializer, CourseDetailSerializer, CategorySerializer,
-    SectionSerializer, VideoSerializer, CoursePackageSerializer
+    SectionSerializer, VideoSerializer, CoursePackageSerializer,
+    CourseSearchResultSerializer
 )
 
 
+def filter_catalog(courses, params):
+    """Apply the public catalog filters shared by the course list endpoints"""
+    # Filter by category if provided
+    category_slug = params.get('category')
+    if category_slug:
+        courses = courses.filter(category__slug=category_slug)
+    
+    # Filter by difficulty if provided
+    difficulty = params.get('difficulty')
+    if difficulty:
+        courses = courses.filter(difficulty=difficulty)
+    
+    # Filter by featured if provided
+    is_featured = params.get('featured')
+    if is_featured and is_featured.lower() == 'true':
+        courses = courses.filter(is_featured=True)
+    
+    # Filter by price
+    price_filter = params.get('price')
+    if price_filter == 'free':
+        courses = courses.filter(is_free=True)
+    elif price_filter == 'paid':
+        courses = courses.filter(is_free=False)
+    
+    return courses
+
+
 class CourseListView(APIView):
-    """List all published courses"""
+    """List published courses, one cursor page at a time"""
     permission_classes = [AllowAny]
     
     def get(self, request):
+        return Response(cached_payload(request, 'course_list', lambda: self.build(request)))
+    
+    def build(self, request):
         courses = Course.objects.filter(is_published=True).select_related(
-            'category', 'instructor'
-        ).prefetch_related('reviews')
-        
-        # Filter by category if provided
-        category_slug = request.query_params.get('category')
-        if category_slug:
-            courses = courses.filter(category__slug=category_slug)
-        
-        # Filter by difficulty if provided
-        difficulty = request.query_params.get('difficulty')
-        if difficulty:
-            courses = courses.filter(difficulty=difficulty)
-        
-        # Filter by featured if provided
-        is_featured = request.query_params.get('featured')
-        if is_featured and is_featured.lower() == 'true':
-            courses = courses.filter(is_featured=True)
-        
-        # Order by created_at desc by default
-        courses = courses.order_by('-created_at')
+            'category', 'instructor', 'stats'
+        )
+        courses = filter_catalog(courses, request.query_params)
         
-        serializer = CourseListSerializer(courses, many=True)
-        return Response(serializer.data)
+        # Ordered by (-created_at, id) unless another sort is requested
+        paginator = CourseCursorPagination()
+        page = paginator.paginate_queryset(courses, request, view=self)
+        serializer = CourseListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data).data
 
 
 class CourseDetailView(APIView):
@@ -46,28 +69,45 @@ class CourseDetailView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request, slug):
-        try:
-            course = Course.objects.filter(
-                slug=slug, is_published=True
-            ).select_related(
-                'category', 'instructor'
-            ).prefetch_related(
-                'sections__videos', 'reviews__user'
-            ).first()
-            
-            if not course:
-                return Response(
-                    {'error': 'Course not found'}, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            serializer = CourseDetailSerializer(course, context={'request': request})
-            return Response(serializer.data)
-        except Course.DoesNotExist:
+        found = course_validators(slug)
+        if found is None:
+            return Response(
+                {'error': 'Course not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        row, validators = found
+        is_enrolled = can_access(request.user, Course(pk=row['pk']))
+        validators.with_user_state(is_enrolled)
+        not_modified = validators.not_modified(request)
+        if not_modified:
+            return not_modified
+        
+        data = cached_payload(request, 'course_detail', lambda: self.build(request, slug))
+        if data is None:
             return Response(
                 {'error': 'Course not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        # The cached payload is shared by everyone; enrollment is per user
+        return validators.apply(Response({**data, 'is_enrolled': is_enrolled}))
+    
+    def build(self, request, slug):
+        course = Course.objects.filter(
+            slug=slug, is_published=True
+        ).select_related(
+            'category', 'instructor', 'stats'
+        ).prefetch_related(
+            'sections__videos', 'reviews__user'
+        ).first()
+        
+        if not course:
+            return None
+        
+        serializer = CourseDetailSerializer(course, context={'request': request})
+        data = serializer.data
+        data.pop('is_enrolled')
+        return data
 
 
 class CategoryListView(APIView):
@@ -75,9 +115,12 @@ class CategoryListView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
+        return Response(cached_payload(request, 'category_list', self.build))
+    
+    def build(self):
         categories = Category.objects.all().order_by('name')
         serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        return serializer.data
 
 
 class CategoryDetailView(APIView):
@@ -85,19 +128,35 @@ class CategoryDetailView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request, slug):
+        validators = category_validators(slug)
+        if validators is None:
+            return Response(
+                {'error': 'Category not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        not_modified = validators.not_modified(request)
+        if not_modified:
+            return not_modified
+        
         try:
             category = Category.objects.get(slug=slug)
             courses = Course.objects.filter(
                 category=category, is_published=True
-            ).select_related('instructor').prefetch_related('reviews')
+            ).select_related('category', 'instructor', 'stats')
+            courses = filter_catalog(courses, request.query_params)
+            
+            paginator = CourseCursorPagination()
+            page = paginator.paginate_queryset(courses, request, view=self)
             
             category_serializer = CategorySerializer(category)
-            courses_serializer = CourseListSerializer(courses, many=True)
+            courses_serializer = CourseListSerializer(page, many=True)
             
-            return Response({
+            return validators.apply(Response({
                 'category': category_serializer.data,
-                'courses': courses_serializer.data
-            })
+                'courses': courses_serializer.data,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link()
+            }))
         except Category.DoesNotExist:
             return Response(
                 {'error': 'Category not found'}, 
@@ -106,7 +165,7 @@ class CategoryDetailView(APIView):
 
 
 class CourseSearchView(APIView):
-    """Search courses"""
+    """Full-text search over published courses, ranked by relevance"""
     permission_classes = [AllowAny]
     
     def get(self, request):
@@ -114,15 +173,20 @@ class CourseSearchView(APIView):
         if not query:
             return Response({'courses': []})
         
-        courses = Course.objects.filter(
-            Q(title__icontains=query) | 
-            Q(short_description__icontains=query) |
-            Q(description__icontains=query),
-            is_published=True
-        ).select_related('category', 'instructor').prefetch_related('reviews')
+        courses = Course.objects.filter(is_published=True).select_related(
+            'category', 'instructor', 'stats'
+        )
+        courses = filter_catalog(courses, request.query_params)
+        courses = search_courses(courses, query)
         
-        serializer = CourseListSerializer(courses, many=True)
-        return Response({'courses': serializer.data})
+        paginator = CourseSearchPagination()
+        page = paginator.paginate_queryset(courses, request, view=self)
+        serializer = CourseSearchResultSerializer(page, many=True)
+        return Response({
+            'courses': serializer.data,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link()
+        })
 
 
 class MyCoursesView(APIView):
@@ -131,8 +195,8 @@ class MyCoursesView(APIView):
     
     def get(self, request):
         enrollments = request.user.enrollments.select_related(
-            'course__category', 'course__instructor'
-        ).prefetch_related('course__reviews')
+            'course__category', 'course__instructor', 'course__stats'
+        )
         
         courses = [enrollment.course for enrollment in enrollments]
         serializer = CourseListSerializer(courses, many=True)
@@ -144,25 +208,25 @@ class SectionDetailView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request, course_slug, section_id):
-        try:
-            course = Course.objects.get(slug=course_slug, is_published=True)
-            section = Section.objects.get(id=section_id, course=course)
-            
-            # Check if user is enrolled in the course
-            is_enrolled = False
-            if request.user.is_authenticated:
-                is_enrolled = course.enrollments.filter(user=request.user).exists()
-            
-            serializer = SectionSerializer(section)
-            data = serializer.data
-            data['is_enrolled'] = is_enrolled
-            
-            return Response(data)
-        except (Course.DoesNotExist, Section.DoesNotExist):
+        found = section_validators(course_slug, section_id)
+        if found is None:
             return Response(
                 {'error': 'Section not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        row, validators = found
+        is_enrolled = can_access(request.user, Section(pk=row['pk'], course_id=row['course_id']))
+        validators.with_user_state(is_enrolled)
+        not_modified = validators.not_modified(request)
+        if not_modified:
+            return not_modified
+        
+        section = Section.objects.prefetch_related('videos').get(pk=row['pk'])
+        serializer = SectionSerializer(section)
+        data = serializer.data
+        data['is_enrolled'] = is_enrolled
+        
+        return validators.apply(Response(data))
 
 
 class PackageListView(APIView):
@@ -170,12 +234,17 @@ class PackageListView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
+        return Response(cached_payload(request, 'package_list', self.build))
+    
+    def build(self):
         packages = CoursePackage.objects.filter(
             is_published=True
-        ).prefetch_related('courses').order_by('-is_featured', '-created_at')
+        ).prefetch_related(
+            'courses__category', 'courses__instructor', 'courses__stats'
+        ).order_by('-is_featured', '-created_at')
         
         serializer = CoursePackageSerializer(packages, many=True)
-        return Response(serializer.data)
+        return serializer.data
 
 
 class PackageDetailView(APIView):
@@ -183,18 +252,35 @@ class PackageDetailView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request, slug):
-        try:
-            package = CoursePackage.objects.get(
-                slug=slug, 
-                is_published=True
+        validators = package_validators(slug)
+        if validators is None:
+            return Response(
+                {'error': 'Package not found'}, 
+                status=status.HTTP_404_NOT_FOUND
             )
-            serializer = CoursePackageSerializer(package)
-            return Response(serializer.data)
-        except CoursePackage.DoesNotExist:
+        not_modified = validators.not_modified(request)
+        if not_modified:
+            return not_modified
+        
+        data = cached_payload(request, 'package_detail', lambda: self.build(slug))
+        if data is None:
             return Response(
                 {'error': 'Package not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        return validators.apply(Response(data))
+    
+    def build(self, slug):
+        package = CoursePackage.objects.filter(
+            slug=slug, 
+            is_published=True
+        ).prefetch_related(
+            'courses__category', 'courses__instructor', 'courses__stats'
+        ).first()
+        if not package:
+            return None
+        serializer = CoursePackageSerializer(package)
+        return serializer.data
 
 
 class VideoDetailView(APIView):
@@ -203,16 +289,14 @@ class VideoDetailView(APIView):
     
     def get(self, request, course_slug, video_id):
         try:
-            course = Course.objects.get(slug=course_slug, is_published=True)
-            video = Video.objects.get(id=video_id, section__course=course)
-            
-            # Check if user is enrolled in the course
-            is_enrolled = False
-            if request.user.is_authenticated:
-                is_enrolled = course.enrollments.filter(user=request.user).exists()
+            video = Video.objects.select_related('section__course').get(
+                id=video_id, section__course__slug=course_slug, section__course__is_published=True
+            )
+            course = video.section.course
+            is_enrolled = can_access(request.user, course)
             
-            # Only allow access to preview videos or enrolled users
-            if not video.is_preview and not is_enrolled:
+            # Only allow access to preview videos or users who own the course or section
+            if not can_access(request.user, video):
                 return Response(
                     {'error': 'Access denied. Please enroll in the course.'}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -223,8 +307,74 @@ class VideoDetailView(APIView):
             data['is_enrolled'] = is_enrolled
             
             return Response(data)
-        except (Course.DoesNotExist, Video.DoesNotExist):
+        except Video.DoesNotExist:
+            return Response(
+                {'error': 'Video not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+
+class VideoFileView(APIView):
+    """Stream a video file after the access check (handed to nginx in production)"""
+    permission_classes = [AllowAny]
+    
+    def get(self, request, video_id):
+        video = Video.objects.select_related('section__course').filter(
+            id=video_id, section__course__is_published=True
+        ).first()
+        if not video or not video.video_file:
             return Response(
                 {'error': 'Video not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        if not can_access(request.user, video):
+            return Response(
+                {'error': 'Access denied. Please enroll in the course.'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return serve_protected_file(request, video.video_file)
+
+
+class VideoHLSView(APIView):
+    """HLS playlists and segments of a packaged video, access-checked per request"""
+    permission_classes = [AllowAny]
+    
+    def get(self, request, video_id, name):
+        video = Video.objects.select_related('section__course').filter(
+            id=video_id, section__course__is_published=True, hls_status='ready'
+        ).first()
+        name = posixpath.normpath(name)
+        if (not video or not video.hls_manifest or name.startswith(('.', '/'))
+                or not name.endswith(('.m3u8', '.ts'))):
+            return Response(
+                {'error': 'Video not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if not can_access(request.user, video):
+            return Response(
+                {'error': 'Access denied. Please enroll in the course.'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        path = posixpath.join(posixpath.dirname(video.hls_manifest), name)
+        return serve_protected_name(request, video.video_file.storage, path)
+
+
+class AttachmentFileView(APIView):
+    """Download a section attachment after the access check"""
+    permission_classes = [AllowAny]
+    
+    def get(self, request, attachment_id):
+        attachment = Attachment.objects.select_related('section__course').filter(
+            id=attachment_id, section__course__is_published=True
+        ).first()
+        if not attachment or not attachment.file:
+            return Response(
+                {'error': 'Attachment not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if not can_access(request.user, attachment.section):
+            return Response(
+                {'error': 'Access denied. Please enroll in the course.'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return serve_protected_file(request, attachment.file, as_attachment=True)
@@ -0,0 +1,62 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from medical_course.metrics import counter
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+catalog_cache_requests = counter(
+    'catalog_cache_requests_total',
+    'Anonymous catalog response cache lookups by endpoint and result',
+    ('endpoint', 'result'),
+)
+
+
+def get_catalog_version():
+    """Current catalog version; seeded with a timestamp so a lost key never revives old entries"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response, now and again once the transaction commits.
+
+    The version lives in the shared cache (see CACHES), so a bump from any
+    web or job worker process invalidates the responses cached by all of them.
+    """
+    def bump():
+        try:
+            cache.incr(CATALOG_VERSION_KEY)
+        except ValueError:
+            get_catalog_version()
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def cached_payload(request, endpoint, build):
+    """Return the anonymous-safe payload for this URL, building it with ``build()`` on a miss.
+
+    Entries are keyed on the absolute URL (path and query) and the catalog
+    version. ``build`` may return None (e.g. not found), which is not cached.
+    Per-user fields must be added by the caller after the lookup.
+    """
+    url = request.build_absolute_uri()
+    key = 'catalog:{}:{}:{}'.format(
+        get_catalog_version(), endpoint, hashlib.md5(url.encode()).hexdigest()
+    )
+    payload = cache.get(key)
+    if payload is not None:
+        catalog_cache_requests.inc(endpoint, 'hit')
+        return payload
+
+    catalog_cache_requests.inc(endpoint, 'miss')
+    payload = build()
+    if payload is not None:
+        cache.set(key, payload, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600))
+    return payload
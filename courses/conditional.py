@@ -0,0 +1,93 @@
+import hashlib
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .models import Category, Course, CoursePackage, Review, Section, Video
+
+
+class Validators:
+    """Strong ETag and Last-Modified for one representation of a resource"""
+
+    def __init__(self, parts, timestamps):
+        self.etag = '"{}"'.format(hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest())
+        present = [timestamp for timestamp in timestamps if timestamp]
+        self.last_modified = max(present) if present else None
+
+    def with_user_state(self, *parts):
+        """Fold per-user fields (e.g. ``is_enrolled``) into the ETag.
+
+        No timestamp covers them, so the representation drops Last-Modified
+        and If-Modified-Since no longer applies; only the ETag decides.
+        """
+        self.etag = '"{}"'.format(hashlib.sha1('|'.join([self.etag, *map(str, parts)]).encode()).hexdigest())
+        self.last_modified = None
+        return self
+
+    def not_modified(self, request):
+        """A 304 response if the client's copy is current, otherwise None"""
+        last_modified = int(self.last_modified.timestamp()) if self.last_modified else None
+        response = get_conditional_response(request, etag=self.etag, last_modified=last_modified)
+        return self.apply(response) if response is not None else None
+
+    def apply(self, response):
+        response['ETag'] = self.etag
+        if self.last_modified:
+            response['Last-Modified'] = http_date(self.last_modified.timestamp())
+        return response
+
+
+def _latest(queryset, field):
+    return Subquery(queryset.order_by(f'-{field}').values(field)[:1])
+
+
+def course_validators(slug):
+    """Course row, its stats and the newest section, video and review, in one query"""
+    row = Course.objects.filter(slug=slug, is_published=True).annotate(
+        section_updated=_latest(Section.objects.filter(course=OuterRef('pk')), 'updated_at'),
+        video_updated=_latest(Video.objects.filter(section__course=OuterRef('pk')), 'updated_at'),
+        review_created=_latest(Review.objects.filter(course=OuterRef('pk')), 'created_at'),
+    ).values(
+        'pk', 'updated_at', 'stats__updated_at', 'section_updated', 'video_updated', 'review_created'
+    ).first()
+    if row is None:
+        return None
+    timestamps = [
+        row['updated_at'], row['stats__updated_at'], row['section_updated'], row['video_updated'], row['review_created']
+    ]
+    # Stats are refreshed on every child save or delete, so deletions change the ETag and date too
+    return row, Validators([*row.values()], timestamps)
+
+
+def section_validators(course_slug, section_id):
+    row = Section.objects.filter(
+        pk=section_id, course__slug=course_slug, course__is_published=True
+    ).annotate(
+        video_updated=Max('videos__updated_at'),
+        video_count=Count('videos'),
+    ).values('pk', 'course_id', 'updated_at', 'video_updated', 'video_count').first()
+    if row is None:
+        return None
+    return row, Validators([*row.values()], [row['updated_at'], row['video_updated']])
+
+
+def package_validators(slug):
+    row = CoursePackage.objects.filter(slug=slug, is_published=True).annotate(
+        course_updated=Max('courses__updated_at'),
+        stats_updated=Max('courses__stats__updated_at'),
+        course_count=Count('courses'),
+    ).values('pk', 'updated_at', 'course_updated', 'stats_updated', 'course_count').first()
+    if row is None:
+        return None
+    return Validators([*row.values()], [row['updated_at'], row['course_updated'], row['stats_updated']])
+
+
+def category_validators(slug):
+    published = Q(courses__is_published=True)
+    row = Category.objects.filter(slug=slug).annotate(
+        course_updated=Max('courses__updated_at', filter=published),
+        stats_updated=Max('courses__stats__updated_at', filter=published),
+        course_count=Count('courses', filter=published),
+    ).values('pk', 'name', 'description', 'created_at', 'course_updated', 'stats_updated', 'course_count').first()
+    if row is None:
+        return None
+    return Validators([*row.values()], [row['created_at'], row['course_updated'], row['stats_updated']])
@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import posixpath
+import shutil
+import subprocess
+import tempfile
+import time
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+from jobs.queue import enqueue
+from .models import Video
+
+logger = logging.getLogger(__name__)
+
+HLS_ROOT = 'course_videos/hls'
+MASTER_PLAYLIST = 'master.m3u8'
+
+# (name, height, video kbit/s, audio kbit/s); renditions taller than the source are skipped
+RENDITIONS = [
+    ('1080p', 1080, 5000, 192),
+    ('720p', 720, 2800, 128),
+    ('480p', 480, 1400, 128),
+    ('360p', 360, 800, 96),
+]
+
+
+class HLSError(Exception):
+    pass
+
+
+def run(command):
+    try:
+        result = subprocess.run(
+            command, capture_output=True, text=True, timeout=settings.HLS_FFMPEG_TIMEOUT
+        )
+    except FileNotFoundError:
+        raise HLSError(f'{command[0]} not found')
+    except subprocess.TimeoutExpired:
+        raise HLSError(f'{command[0]} timed out after {settings.HLS_FFMPEG_TIMEOUT}s')
+    if result.returncode != 0:
+        raise HLSError(result.stderr.strip()[-2000:] or f'{command[0]} exited with {result.returncode}')
+    return result.stdout
+
+
+def probe(path):
+    """Return ``(duration_seconds, width, height, has_audio)`` for a media file"""
+    output = run([
+        settings.FFPROBE_BINARY, '-v', 'error', '-print_format', 'json',
+        '-show_format', '-show_streams', path,
+    ])
+    info = json.loads(output)
+    streams = info.get('streams', [])
+    video = next((stream for stream in streams if stream.get('codec_type') == 'video'), None)
+    if video is None:
+        raise HLSError('No video stream found')
+    duration = float(info.get('format', {}).get('duration') or video.get('duration') or 0)
+    has_audio = any(stream.get('codec_type') == 'audio' for stream in streams)
+    return duration, int(video['width']), int(video['height']), has_audio
+
+
+def renditions_for(width, height):
+    """Renditions no taller than the source, always keeping at least the smallest one"""
+    chosen = [rendition for rendition in RENDITIONS if rendition[1] <= height] or RENDITIONS[-1:]
+    return [
+        (name, _even(width * rendition_height / height), rendition_height, video_kbps, audio_kbps)
+        for name, rendition_height, video_kbps, audio_kbps in chosen
+    ]
+
+
+def _even(value):
+    return max(2, int(round(value / 2)) * 2)
+
+
+def transcode(source, output_dir, renditions, has_audio):
+    """Decode the source once and write one HLS variant playlist per rendition"""
+    segment_seconds = settings.HLS_SEGMENT_SECONDS
+    command = [settings.FFMPEG_BINARY, '-hide_banner', '-nostdin', '-y', '-i', source]
+    for name, width, height, video_kbps, audio_kbps in renditions:
+        rendition_dir = os.path.join(output_dir, name)
+        os.makedirs(rendition_dir)
+        command += [
+            '-map', '0:v:0',
+            '-vf', f'scale={width}:{height}',
+            '-c:v', 'libx264', '-preset', settings.HLS_X264_PRESET, '-profile:v', 'main', '-pix_fmt', 'yuv420p',
+            '-b:v', f'{video_kbps}k', '-maxrate', f'{int(video_kbps * 1.07)}k', '-bufsize', f'{video_kbps * 2}k',
+            # Keyframes on segment boundaries so every rendition switches cleanly
+            '-force_key_frames', f'expr:gte(t,n_forced*{segment_seconds})', '-sc_threshold', '0',
+        ]
+        if has_audio:
+            command += ['-map', '0:a:0', '-c:a', 'aac', '-b:a', f'{audio_kbps}k', '-ac', '2']
+        command += [
+            '-f', 'hls', '-hls_time', str(segment_seconds), '-hls_playlist_type', 'vod',
+            '-hls_segment_filename', os.path.join(rendition_dir, 'segment_%05d.ts'),
+            os.path.join(rendition_dir, 'index.m3u8'),
+        ]
+    run(command)
+
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3']
+    for name, width, height, video_kbps, audio_kbps in renditions:
+        bandwidth = (video_kbps + (audio_kbps if has_audio else 0)) * 1000
+        codecs = 'avc1.4d401f,mp4a.40.2' if has_audio else 'avc1.4d401f'
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={width}x{height},CODECS="{codecs}"')
+        lines.append(f'{name}/index.m3u8')
+    with open(os.path.join(output_dir, MASTER_PLAYLIST), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def store_directory(storage, local_dir, prefix):
+    for root, _dirs, files in os.walk(local_dir):
+        for filename in files:
+            local_path = os.path.join(root, filename)
+            name = posixpath.join(prefix, os.path.relpath(local_path, local_dir).replace(os.sep, '/'))
+            with open(local_path, 'rb') as f:
+                storage.save(name, File(f))
+
+
+def delete_directory(storage, prefix):
+    try:
+        directories, files = storage.listdir(prefix)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for filename in files:
+        storage.delete(posixpath.join(prefix, filename))
+    for directory in directories:
+        delete_directory(storage, posixpath.join(prefix, directory))
+    if hasattr(storage, 'path'):
+        try:
+            os.rmdir(storage.path(prefix))
+        except (OSError, NotImplementedError):
+            pass
+
+
+def claim(video_id, force=False):
+    """Mark a video as processing; False if another run already holds it"""
+    videos = Video.objects.filter(pk=video_id)
+    if not force:
+        videos = videos.exclude(hls_status='processing')
+    return videos.update(hls_status='processing', hls_error='') == 1
+
+
+def process_video(video_id, force=False):
+    """Package one video as multi-bitrate HLS and record the result on the row.
+
+    Output goes to a fresh ``course_videos/hls/<id>/<timestamp>/`` directory
+    and the previous one is removed only after the manifest is switched, so
+    players in the middle of a session keep working.
+    """
+    if not claim(video_id, force=force):
+        logger.info('Video %s is already being processed', video_id)
+        return None
+    video = Video.objects.get(pk=video_id)
+    storage = video.video_file.storage
+    previous_manifest = video.hls_manifest
+    prefix = f'{HLS_ROOT}/{video.pk}/{int(time.time())}'
+
+    try:
+        with tempfile.TemporaryDirectory(prefix='hls-') as workdir:
+            try:
+                source = video.video_file.path
+            except NotImplementedError:
+                # Remote storage: fetch a local copy for ffmpeg
+                source = os.path.join(workdir, 'source' + os.path.splitext(video.video_file.name)[1])
+                with video.video_file.open('rb') as remote, open(source, 'wb') as local:
+                    shutil.copyfileobj(remote, local)
+
+            duration, width, height, has_audio = probe(source)
+            output_dir = os.path.join(workdir, 'hls')
+            os.makedirs(output_dir)
+            transcode(source, output_dir, renditions_for(width, height), has_audio)
+            store_directory(storage, output_dir, prefix)
+    except Exception as exc:
+        logger.exception('HLS packaging failed for video %s', video_id)
+        delete_directory(storage, prefix)
+        video.hls_status = 'failed'
+        video.hls_error = str(exc)
+        video.save(update_fields=['hls_status', 'hls_error', 'updated_at'])
+        return video
+
+    video.hls_status = 'ready'
+    video.hls_manifest = f'{prefix}/{MASTER_PLAYLIST}'
+    video.hls_error = ''
+    video.hls_processed_at = timezone.now()
+    video.duration_seconds = int(round(duration))
+    # A normal save so course stats and the catalog cache pick up the new duration
+    video.save(update_fields=[
+        'hls_status', 'hls_manifest', 'hls_error', 'hls_processed_at', 'duration_seconds', 'updated_at'
+    ])
+    if previous_manifest:
+        delete_directory(storage, posixpath.dirname(previous_manifest))
+    return video
+
+
+def schedule_processing(video_id):
+    """Queue packaging for the job workers; commits with the upload's transaction"""
+    return enqueue('courses.process_video', unique_key=f'hls:{video_id}', video_id=video_id)
@@ -0,0 +1,11 @@
+from django.conf import settings
+from jobs.queue import job
+from .hls import process_video
+
+
+# Long ffmpeg runs: no surrounding transaction, and a lock that outlasts the ffmpeg timeout
+@job('courses.process_video', atomic=False, timeout=settings.HLS_FFMPEG_TIMEOUT + 600, max_attempts=3)
+def process_video_job(video_id):
+    # The unique job key already keeps a video to one run; force takes over a
+    # video left in "processing" by a crashed worker
+    process_video(video_id, force=True)
@@ -0,0 +1,142 @@
+import json
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from courses.models import Category, Course, CoursePackage
+
+User = get_user_model()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Time the main API endpoints through the test client and report p50/p95 latency and query counts as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per endpoint')
+        parser.add_argument('--only', help='Only run endpoints whose name contains this text')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--seed-scale', type=float,
+                            help='Seed a dataset at this scale first and roll it back afterwards')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed_scale']:
+                call_command('seed_dataset', scale=options['seed_scale'], stdout=self.stderr)
+            with override_settings(ALLOWED_HOSTS=['*']):
+                report = self.run(options)
+            transaction.set_rollback(True)
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(f'Wrote {len(report["endpoints"])} endpoint results to {options["output"]}')
+        else:
+            self.stdout.write(output)
+
+    def run(self, options):
+        clients = self.clients()
+        results = {}
+        for name, role, path in self.endpoints():
+            if options['only'] and options['only'] not in name:
+                continue
+            client = clients[role]
+            for _ in range(options['warmup']):
+                client.get(path)
+
+            timings, query_counts, status_code = [], [], None
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    timings.append((time.perf_counter() - started) * 1000)
+                query_counts.append(len(queries))
+                status_code = response.status_code
+
+            results[name] = {
+                'path': path,
+                'role': role,
+                'status': status_code,
+                'p50_ms': round(statistics.median(timings), 2),
+                'p95_ms': round(percentile(timings, 0.95), 2),
+                'max_ms': round(max(timings), 2),
+                'queries': max(query_counts),
+                'bytes': len(response.content),
+            }
+            self.stderr.write(
+                f'{name:<32} {status_code}  p50 {results[name]["p50_ms"]:8.2f} ms  '
+                f'p95 {results[name]["p95_ms"]:8.2f} ms  {results[name]["queries"]:4d} queries'
+            )
+
+        return {
+            'repeat': options['repeat'],
+            'dataset': {
+                'users': User.objects.count(),
+                'courses': Course.objects.count(),
+            },
+            'endpoints': results,
+        }
+
+    def clients(self):
+        customer = User.objects.filter(user_type='customer').annotate(
+            enrollment_count=Count('enrollments')
+        ).order_by('-enrollment_count').first()
+        marketer = User.objects.filter(user_type='staff').annotate(
+            code_count=Count('referral_codes')
+        ).order_by('-code_count').first()
+        admin = User.objects.filter(user_type='admin').first()
+        if not (customer and marketer and admin):
+            raise CommandError('Need at least one customer, marketer and admin user; run seed_dataset first')
+
+        clients = {'anonymous': Client(HTTP_HOST='localhost')}
+        for role, user in (('customer', customer), ('marketer', marketer), ('admin', admin)):
+            clients[role] = Client(HTTP_HOST='localhost')
+            clients[role].force_login(user)
+        return clients
+
+    def endpoints(self):
+        course = Course.objects.filter(is_published=True).order_by('-created_at').first()
+        category = Category.objects.order_by('id').first()
+        package = CoursePackage.objects.filter(is_published=True).first()
+
+        endpoints = [
+            ('courses.list', 'anonymous', '/api/courses/'),
+            ('courses.list_by_rating', 'anonymous', '/api/courses/?sort=rating'),
+            ('courses.search', 'anonymous', '/api/courses/search/?q=%D9%82%D9%84%D8%A8'),
+            ('courses.categories', 'anonymous', '/api/courses/categories/'),
+            ('courses.packages', 'anonymous', '/api/courses/packages/'),
+            ('courses.my_courses', 'customer', '/api/courses/my-courses/'),
+            ('payments.cart', 'customer', '/api/payments/cart/'),
+            ('payments.purchases', 'customer', '/api/payments/purchases/'),
+            ('payments.marketer_codes', 'marketer', '/api/payments/marketers/codes/'),
+            ('payments.marketer_commissions', 'marketer', '/api/payments/marketers/commissions/'),
+            ('tickets.user_tickets', 'customer', '/api/tickets/tickets/'),
+            ('tickets.admin_tickets', 'admin', '/api/tickets/admin/tickets/'),
+            ('admin.dashboard', 'admin', '/api/admin/dashboard/stats/'),
+            ('admin.users', 'admin', '/api/admin/users/'),
+            ('admin.marketers', 'admin', '/api/admin/marketers/'),
+            ('admin.purchases', 'admin', '/api/admin/purchases/'),
+            ('admin.commissions', 'admin', '/api/admin/commissions/'),
+            ('admin.courses', 'admin', '/api/admin/courses/'),
+            ('admin.tickets', 'admin', '/api/admin/tickets/'),
+        ]
+        if course:
+            endpoints.append(('courses.detail', 'anonymous', f'/api/courses/{course.slug}/'))
+            endpoints.append(('courses.detail_enrolled', 'customer', f'/api/courses/{course.slug}/'))
+        if category:
+            endpoints.append(('courses.category_detail', 'anonymous', f'/api/courses/categories/{category.slug}/'))
+        if package:
+            endpoints.append(('courses.package_detail', 'anonymous', f'/api/courses/packages/{package.slug}/'))
+        return endpoints
@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from courses.models import Category, Course
+from courses.search import search_courses, update_search_vectors
+
+User = get_user_model()
+
+WORDS = [
+    'قلب', 'کلیه', 'ریه', 'کبد', 'مغز', 'اعصاب', 'داروسازی', 'جراحی', 'اطفال',
+    'زنان', 'پوست', 'چشم', 'ارتوپدی', 'رادیولوژی', 'آناتومی', 'فیزیولوژی',
+    'بیوشیمی', 'ایمنی', 'عفونی', 'اورژانس', 'بیهوشی', 'تغذیه', 'دندانپزشکی',
+    'پرستاری', 'سلامت', 'بالینی', 'تشخیص', 'درمان', 'پیشگیری', 'مراقبت',
+]
+RARE_WORDS = ['اکوکاردیوگرافی', 'نفروپاتی', 'هپاتولوژی', 'الکتروفیزیولوژی']
+QUERIES = ['قلب', 'جراحی اطفال', 'اکوکاردیوگرافی', 'مراقبت‌های ویژه', 'كليه']
+
+
+class Command(BaseCommand):
+    help = 'Compare full-text course search with the legacy icontains filter on a seeded table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=50000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--limit', type=int, default=24)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows instead of rolling back')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['courses'])
+            for query in QUERIES:
+                legacy = self.measure(lambda: self.icontains(query, options['limit']), options['repeat'])
+                fts = self.measure(lambda: self.full_text(query, options['limit']), options['repeat'])
+                self.stdout.write(
+                    f'{query!r:>24}  icontains {legacy:8.1f} ms   full-text {fts:8.1f} ms'
+                )
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def seed(self, total):
+        self.stdout.write(f'Seeding {total} courses...')
+        started = time.perf_counter()
+        instructor = User.objects.create(username=f'bench-{uuid.uuid4().hex[:8]}')
+        category = Category.objects.create(name='benchmark', slug=f'bench-{uuid.uuid4().hex[:8]}')
+        rng = random.Random(42)
+
+        def paragraph(words):
+            text = ' '.join(rng.choice(WORDS) for _ in range(words))
+            if rng.random() < 0.01:
+                text += ' ' + rng.choice(RARE_WORDS)
+            return text
+
+        courses = [
+            Course(
+                title=paragraph(5),
+                slug=f'bench-{i}-{uuid.uuid4().hex[:6]}',
+                description=f'<p>{paragraph(120)}</p><ul><li>{paragraph(20)}</li></ul>',
+                short_description=paragraph(25),
+                category=category,
+                instructor=instructor,
+                price=rng.randint(100, 5000),
+                duration_hours=rng.randint(1, 40),
+                what_you_learn=paragraph(10),
+                is_published=True,
+            )
+            for i in range(total)
+        ]
+        Course.objects.bulk_create(courses, batch_size=2000)
+        update_search_vectors(Course.objects.filter(category=category))
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Course._meta.db_table}')
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+    def icontains(self, query, limit):
+        return list(Course.objects.filter(
+            Q(title__icontains=query) |
+            Q(short_description__icontains=query) |
+            Q(description__icontains=query),
+            is_published=True
+        ).values_list('id', flat=True)[:limit])
+
+    def full_text(self, query, limit):
+        courses = search_courses(Course.objects.filter(is_published=True), query)
+        return list(courses.values_list('id', 'snippet')[:limit])
+
+    def measure(self, run, repeat):
+        run()  # warm up
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,94 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from accounts.models import User
+from courses.cache import bump_catalog_version
+from courses.models import Course, CoursePackage
+from medical_course.images import delete_stale_variants, render_variants
+
+# (name, model, image field, widths setting)
+TARGETS = [
+    ('courses', Course, 'thumbnail', 'THUMBNAIL_VARIANT_WIDTHS'),
+    ('packages', CoursePackage, 'thumbnail', 'THUMBNAIL_VARIANT_WIDTHS'),
+    ('users', User, 'profile_image', 'PROFILE_IMAGE_VARIANT_WIDTHS'),
+]
+
+
+def render_job(job):
+    """Process-pool worker: render one image, never touching the database"""
+    name, widths = job
+    try:
+        return name, render_variants(default_storage, name, widths), None
+    except Exception as exc:
+        return name, None, f'{type(exc).__name__}: {exc}'
+
+
+class Command(BaseCommand):
+    help = 'Create missing WebP/JPEG thumbnail variants for existing course, package and profile images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=[name for name, *_rest in TARGETS], action='append',
+                            help='Limit to one target (repeatable)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that are already up to date')
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows written per update')
+
+    def handle(self, *args, **options):
+        catalog_changed = False
+        for name, model, field_name, widths_setting in TARGETS:
+            if options['only'] and name not in options['only']:
+                continue
+            updated = self.backfill(model, field_name, getattr(settings, widths_setting), options)
+            if updated and model is not User:
+                catalog_changed = True
+        if catalog_changed:
+            bump_catalog_version()
+
+    def backfill(self, model, field_name, widths, options):
+        variants_attr = f'{field_name}_variants'
+        rows = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True}).only(
+            'pk', field_name, variants_attr
+        )
+        pending = [
+            row for row in rows.iterator()
+            if options['force'] or (getattr(row, variants_attr) or {}).get('source') != getattr(row, field_name).name
+        ]
+        label = model._meta.verbose_name_plural
+        if not pending:
+            self.stdout.write(f'{label}: up to date')
+            return 0
+
+        by_name = {}
+        for row in pending:
+            by_name.setdefault(getattr(row, field_name).name, []).append(row)
+
+        started = time.perf_counter()
+        # Forked workers must not inherit open database connections
+        connections.close_all()
+        changed, failed = [], 0
+        now = timezone.now()
+        with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            jobs = [(image_name, widths) for image_name in by_name]
+            for image_name, variants, error in executor.map(render_job, jobs, chunksize=4):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'  {image_name}: {error}')
+                    variants = {'source': image_name}
+                for row in by_name[image_name]:
+                    delete_stale_variants(default_storage, getattr(row, variants_attr), variants)
+                    setattr(row, variants_attr, variants)
+                    # Keeps ETag/Last-Modified validators in step with the new srcset
+                    row.updated_at = now
+                    changed.append(row)
+
+        model.objects.bulk_update(changed, [variants_attr, 'updated_at'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {len(by_name) - failed} images processed, {failed} failed '
+            f'in {time.perf_counter() - started:.1f}s'
+        ))
+        return len(changed)
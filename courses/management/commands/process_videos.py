@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from courses.hls import process_video
+from courses.models import Video
+
+
+class Command(BaseCommand):
+    help = 'Package course videos as multi-bitrate HLS (pending ones by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('video_ids', nargs='*', type=int, help='Only these videos')
+        parser.add_argument('--failed', action='store_true', help='Also retry videos whose packaging failed')
+        parser.add_argument('--all', action='store_true', help='Reprocess every video, including ready ones')
+        parser.add_argument('--force', action='store_true',
+                            help='Also take videos stuck in processing (e.g. after a crashed worker)')
+
+    def handle(self, *args, **options):
+        videos = Video.objects.exclude(video_file='')
+        if options['video_ids']:
+            videos = videos.filter(pk__in=options['video_ids'])
+        elif not options['all']:
+            statuses = ['pending', 'failed'] if options['failed'] else ['pending']
+            if options['force']:
+                statuses.append('processing')
+            videos = videos.filter(hls_status__in=statuses)
+        if not options['force']:
+            videos = videos.exclude(hls_status='processing')
+
+        video_ids = list(videos.order_by('id').values_list('id', flat=True))
+        if options['video_ids'] and not video_ids:
+            raise CommandError('No matching videos (use --force for videos already processing)')
+
+        ready = failed = 0
+        for video_id in video_ids:
+            video = process_video(video_id, force=options['force'])
+            if video is None:
+                continue
+            if video.hls_status == 'ready':
+                ready += 1
+                self.stdout.write(f'  {video_id}: ready ({video.duration_seconds}s)')
+            else:
+                failed += 1
+                self.stderr.write(f'  {video_id}: failed: {video.hls_error.splitlines()[-1] if video.hls_error else ""}')
+
+        self.stdout.write(self.style.SUCCESS(f'Packaged {ready} videos, {failed} failed'))
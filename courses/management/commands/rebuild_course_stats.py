@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from courses.models import CourseStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized CourseStats rows from sections, videos and reviews'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+    
+    def handle(self, *args, **options):
+        total = CourseStats.rebuild_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {total} courses'))
@@ -0,0 +1,260 @@
+import random
+import time
+import uuid
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.expressions import RawSQL
+from courses.models import Category, Course, CourseStats, Review, Section, Video
+from courses.search import update_search_vectors
+from payments.ledger import rebuild_balances
+from payments.models import Enrollment, MarketerCommission, Purchase, ReferralCode, ReferralUsage
+from tickets.models import SupportTicket, TicketMessage
+from tickets.queries import refresh_last_activity
+from tickets.sla import refresh_deadlines, refresh_first_response
+
+User = get_user_model()
+
+# Row counts at --scale 1; every count is multiplied by the scale
+BASE_COUNTS = {
+    'categories': 10,
+    'courses': 200,
+    'customers': 2000,
+    'marketers': 20,
+    'admins': 3,
+    'tickets': 400,
+}
+SECTIONS_PER_COURSE = 6
+VIDEOS_PER_SECTION = 5
+REVIEWS_PER_COURSE = 8
+ENROLLMENTS_PER_CUSTOMER = 3
+CODES_PER_MARKETER = 3
+REFERRED_SHARE = 0.25
+MESSAGES_PER_TICKET = 4
+BENCHMARK_PASSWORD = 'seed-password'
+
+WORDS = [
+    'قلب', 'کلیه', 'ریه', 'کبد', 'مغز', 'اعصاب', 'داروسازی', 'جراحی', 'اطفال',
+    'زنان', 'پوست', 'چشم', 'ارتوپدی', 'رادیولوژی', 'آناتومی', 'فیزیولوژی',
+    'بیوشیمی', 'ایمنی', 'عفونی', 'اورژانس', 'بیهوشی', 'تغذیه', 'پرستاری',
+    'سلامت', 'بالینی', 'تشخیص', 'درمان', 'پیشگیری', 'مراقبت',
+]
+
+
+def spread_created_at(queryset, days=365):
+    """Give seeded rows created_at values spread over the last ``days`` days"""
+    queryset.update(created_at=RawSQL(f"now() - random() * interval '{int(days)} days'", []))
+
+
+class Command(BaseCommand):
+    help = 'Seed a realistic dataset (courses, users, purchases, referrals, tickets) for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for the base row counts')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = f'seed-{uuid.uuid4().hex[:6]}'
+        counts = {name: max(1, int(count * options['scale'])) for name, count in BASE_COUNTS.items()}
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            self.seed_users(counts)
+            self.seed_catalog(counts)
+            self.seed_sales()
+            self.seed_tickets(counts['tickets'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded dataset {self.prefix} in {time.perf_counter() - started:.1f}s '
+            f'(users log in with password {BENCHMARK_PASSWORD!r})'
+        ))
+
+    def words(self, count):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def bulk(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.stdout.write(f'  {model._meta.verbose_name_plural}: {len(created)}')
+        return created
+
+    def seed_users(self, counts):
+        password = make_password(BENCHMARK_PASSWORD)
+
+        def users(user_type, count, **extra):
+            return [
+                User(
+                    username=f'{self.prefix}-{user_type}-{i}',
+                    email=f'{self.prefix}-{user_type}-{i}@example.com',
+                    password=password,
+                    user_type=user_type,
+                    **extra
+                )
+                for i in range(count)
+            ]
+
+        self.admins = self.bulk(User, users('admin', counts['admins'], is_staff=True))
+        self.marketers = users('staff', counts['marketers'])
+        self.customers = users('customer', counts['customers'])
+        self.bulk(User, self.marketers + self.customers)
+        spread_created_at(User.objects.filter(username__startswith=self.prefix))
+
+    def seed_catalog(self, counts):
+        categories = self.bulk(Category, [
+            Category(name=self.words(2), slug=f'{self.prefix}-category-{i}', description=self.words(20))
+            for i in range(counts['categories'])
+        ])
+        instructors = self.admins + self.marketers
+
+        courses = []
+        for i in range(counts['courses']):
+            price = Decimal(self.rng.randrange(50, 5000) * 1000)
+            is_free = self.rng.random() < 0.05
+            courses.append(Course(
+                title=self.words(4),
+                slug=f'{self.prefix}-course-{i}',
+                description=f'<p>{self.words(150)}</p><ul><li>{self.words(20)}</li></ul>',
+                short_description=self.words(25),
+                category=self.rng.choice(categories),
+                instructor=self.rng.choice(instructors),
+                difficulty=self.rng.choice(['beginner', 'intermediate', 'advanced']),
+                price=Decimal(0) if is_free else price,
+                is_free=is_free,
+                discount_price=price * Decimal('0.8') if not is_free and self.rng.random() < 0.2 else None,
+                duration_hours=self.rng.randint(2, 60),
+                what_you_learn=self.words(15),
+                is_published=self.rng.random() < 0.9,
+                is_featured=self.rng.random() < 0.1,
+            ))
+        self.courses = self.bulk(Course, courses)
+        course_filter = Course.objects.filter(slug__startswith=self.prefix)
+        spread_created_at(course_filter)
+
+        self.sections = self.bulk(Section, [
+            Section(
+                course=course,
+                title=self.words(3),
+                description=self.words(20),
+                order=order,
+                price=(course.price / SECTIONS_PER_COURSE).quantize(Decimal('1')) if course.price else None,
+                is_free=order == 1,
+            )
+            for course in self.courses
+            for order in range(1, SECTIONS_PER_COURSE + 1)
+        ])
+        self.bulk(Video, [
+            Video(
+                section=section,
+                title=self.words(3),
+                video_file=f'course_videos/{self.prefix}-{section.pk}-{order}.mp4',
+                duration_seconds=self.rng.randint(120, 3600),
+                order=order,
+                is_preview=section.order == 1 and order == 1,
+            )
+            for section in self.sections
+            for order in range(1, VIDEOS_PER_SECTION + 1)
+        ])
+        self.bulk(Review, [
+            Review(course=course, user=user, rating=self.rng.choices([1, 2, 3, 4, 5], [1, 1, 3, 6, 8])[0], comment=self.words(20))
+            for course in self.courses
+            for user in self.rng.sample(self.customers, min(REVIEWS_PER_COURSE, len(self.customers)))
+        ])
+
+        # bulk_create skips the signals that maintain these
+        CourseStats.rebuild_all(batch_size=self.batch_size)
+        update_search_vectors(course_filter)
+
+    def seed_sales(self):
+        codes = self.bulk(ReferralCode, [
+            ReferralCode(
+                marketer=marketer,
+                code=f'S{uuid.uuid4().hex[:10].upper()}',
+                discount_percentage=Decimal(self.rng.choice([5, 10, 15, 20])),
+                commission_percentage=Decimal(self.rng.choice([10, 15, 20])),
+            )
+            for marketer in self.marketers
+            for _ in range(CODES_PER_MARKETER)
+        ])
+
+        purchases = []
+        for customer in self.customers:
+            for course in self.rng.sample(self.courses, min(ENROLLMENTS_PER_CUSTOMER, len(self.courses))):
+                code = self.rng.choice(codes) if self.rng.random() < REFERRED_SHARE else None
+                original = course.get_effective_price()
+                discount = (original * code.discount_percentage / 100).quantize(Decimal('0.01')) if code else Decimal('0')
+                purchases.append(Purchase(
+                    user=customer,
+                    purchase_type='course',
+                    course=course,
+                    amount=original - discount,
+                    original_amount=original,
+                    discount_amount=discount,
+                    referral_code=code,
+                    payment_status=self.rng.choices(['completed', 'pending', 'failed'], [90, 7, 3])[0],
+                ))
+        self.bulk(Purchase, purchases)
+        spread_created_at(Purchase.objects.filter(user__username__startswith=self.prefix))
+
+        completed = [purchase for purchase in purchases if purchase.payment_status == 'completed']
+        self.bulk(Enrollment, [
+            Enrollment(user=purchase.user, course=purchase.course, purchase=purchase)
+            for purchase in completed
+        ])
+
+        referred = [purchase for purchase in completed if purchase.referral_code]
+        usages = self.bulk(ReferralUsage, [
+            ReferralUsage(
+                referral_code=purchase.referral_code,
+                customer=purchase.user,
+                purchase=purchase,
+                discount_amount=purchase.discount_amount,
+                commission_amount=(purchase.amount * purchase.referral_code.commission_percentage / 100).quantize(Decimal('0.01')),
+            )
+            for purchase in referred
+        ])
+        self.bulk(MarketerCommission, [
+            MarketerCommission(
+                marketer=usage.referral_code.marketer,
+                referral_usage=usage,
+                amount=usage.commission_amount,
+                status=self.rng.choices(['pending', 'paid'], [60, 40])[0],
+            )
+            for usage in usages
+        ])
+        for code in codes:
+            code.current_uses = sum(1 for usage in usages if usage.referral_code is code)
+        ReferralCode.objects.bulk_update(codes, ['current_uses'], batch_size=self.batch_size)
+        rebuild_balances([marketer.id for marketer in self.marketers])
+
+    def seed_tickets(self, count):
+        tickets = self.bulk(SupportTicket, [
+            SupportTicket(
+                user=self.rng.choice(self.customers),
+                subject=self.words(5),
+                description=self.words(40),
+                status=self.rng.choices(['open', 'in_progress', 'closed'], [3, 2, 5])[0],
+                priority=self.rng.choice(['low', 'medium', 'high', 'urgent']),
+                category=self.rng.choice(['technical', 'billing', 'course_access', 'account', 'general']),
+                assigned_to=self.rng.choice(self.admins) if self.rng.random() < 0.6 else None,
+            )
+            for _ in range(count)
+        ])
+        spread_created_at(SupportTicket.objects.filter(user__username__startswith=self.prefix))
+        self.bulk(TicketMessage, [
+            TicketMessage(
+                ticket=ticket,
+                author=ticket.user if i % 2 == 0 else self.rng.choice(self.admins),
+                message=self.words(30),
+                is_internal=i % 2 == 1 and self.rng.random() < 0.2,
+            )
+            for ticket in tickets
+            for i in range(self.rng.randint(1, MESSAGES_PER_TICKET * 2 - 1))
+        ])
+        seeded_tickets = SupportTicket.objects.filter(user__username__startswith=self.prefix)
+        refresh_last_activity(seeded_tickets)
+        refresh_deadlines(seeded_tickets)
+        refresh_first_response(seeded_tickets)
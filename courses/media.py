@@ -0,0 +1,126 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect
+from django.views.static import serve
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# HLS playlists and segments (see courses/hls.py)
+mimetypes.add_type('application/vnd.apple.mpegurl', '.m3u8')
+mimetypes.add_type('video/mp2t', '.ts')
+
+
+class RangeReader:
+    """File-like view of ``length`` bytes of an open file, read in fixed-size chunks"""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` for a single ``bytes=`` range, ``None`` to send the whole file,
+    or ``False`` if the range can't be satisfied"""
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(0, size - int(last))
+        end = size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def ranged_file_response(request, path, filename, as_attachment=False):
+    """Stream a file from disk with ``FileResponse``, honouring a single HTTP Range"""
+    size = os.path.getsize(path)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, as_attachment=as_attachment, filename=filename)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeReader(file, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+            as_attachment=as_attachment,
+            filename=filename,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response.block_size = settings.PROTECTED_MEDIA_CHUNK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_protected_file(request, field_file, as_attachment=False):
+    """Send a file whose access check has already passed.
+
+    Behind nginx (``PROTECTED_MEDIA_X_ACCEL``) only an ``X-Accel-Redirect``
+    header is returned and nginx streams the file from its ``internal``
+    location; otherwise Django streams it itself with Range support.
+    """
+    return serve_protected_name(request, field_file.storage, field_file.name, as_attachment=as_attachment)
+
+
+def serve_protected_name(request, storage, name, as_attachment=False):
+    """``serve_protected_file`` for a storage name that has no FileField"""
+    filename = os.path.basename(name)
+
+    if settings.PROTECTED_MEDIA_X_ACCEL:
+        response = HttpResponse(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response['X-Accel-Redirect'] = settings.PROTECTED_MEDIA_INTERNAL_URL + quote(name)
+        disposition = 'attachment' if as_attachment else 'inline'
+        response['Content-Disposition'] = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+        return response
+
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # Remote storage without local paths; let it serve its own (signed) URL
+        return HttpResponseRedirect(storage.url(name))
+    if not os.path.exists(path):
+        return HttpResponse(status=404)
+    return ranged_file_response(request, path, filename, as_attachment=as_attachment)
+
+
+def serve_public_media(request, path, document_root=None):
+    """Development media view that refuses anything under PROTECTED_MEDIA_PREFIXES.
+
+    The check runs on the normalised path, as serve() resolves it, so
+    ``course_videos//x`` or ``./course_videos/x`` can't slip past it.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    if any(f'{path}/'.startswith(prefix) for prefix in settings.PROTECTED_MEDIA_PREFIXES):
+        raise Http404
+    return serve(request, path, document_root=document_root)
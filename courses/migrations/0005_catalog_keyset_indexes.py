@@ -0,0 +1,65 @@
+# Generated by Django 4.2.23 on 2026-10-17 20:44
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_course_stats(apps, schema_editor):
+    """Every course needs a stats row so the rating sort can join on it"""
+    Course = apps.get_model('courses', 'Course')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+    Section = apps.get_model('courses', 'Section')
+    Video = apps.get_model('courses', 'Video')
+    Review = apps.get_model('courses', 'Review')
+    
+    for course_id in Course.objects.filter(stats__isnull=True).values_list('pk', flat=True):
+        videos = Video.objects.filter(section__course_id=course_id).aggregate(
+            count=Count('id'), seconds=Sum('duration_seconds')
+        )
+        reviews = Review.objects.filter(course_id=course_id).aggregate(
+            count=Count('id'), total=Sum('rating')
+        )
+        CourseStats.objects.create(
+            course_id=course_id,
+            section_count=Section.objects.filter(course_id=course_id).count(),
+            video_count=videos['count'],
+            total_video_seconds=videos['seconds'] or 0,
+            review_count=reviews['count'],
+            rating_sum=reviews['total'] or 0,
+        )
+    
+    for stats in CourseStats.objects.filter(review_count__gt=0):
+        stats.rating_average = stats.rating_sum / stats.review_count
+        stats.save(update_fields=['rating_average'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_coursestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_average',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-created_at', 'id'], name='course_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['price', 'id'], name='course_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-price', 'id'], name='course_price_desc_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursestats',
+            index=models.Index(fields=['-rating_average', 'course'], name='coursestats_rating_idx'),
+        ),
+        migrations.RunPython(backfill_course_stats, migrations.RunPython.noop),
+    ]
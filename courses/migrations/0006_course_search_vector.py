@@ -0,0 +1,31 @@
+# Generated by Django 4.2.23 on 2026-10-17 20:46
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def populate_search_vectors(apps, schema_editor):
+    from courses.search import update_search_vectors
+    Course = apps.get_model('courses', 'Course')
+    update_search_vectors(Course.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_catalog_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='course_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
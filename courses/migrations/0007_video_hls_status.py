@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_course_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='hls_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='hls_manifest',
+            field=models.CharField(blank=True, help_text='مسیر master.m3u8 نسبت به MEDIA_ROOT', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='hls_processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='hls_status',
+            field=models.CharField(choices=[('pending', 'در انتظار پردازش'), ('processing', 'در حال پردازش'), ('ready', 'آماده'), ('failed', 'ناموفق')], db_index=True, default='pending', max_length=20),
+        ),
+    ]
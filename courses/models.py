@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.urls import reverse
+from django.utils import timezone
 from ckeditor.fields import RichTextField
 
 User = get_user_model()
@@ -46,6 +49,7 @@ class Course(models.Model):
     
     # Media
     thumbnail = models.ImageField(upload_to='course_thumbnails/', blank=True, null=True)
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     preview_video = models.FileField(upload_to='course_previews/', blank=True, null=True)
     
     # Status
@@ -54,10 +58,20 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Full-text search document, maintained by courses.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         verbose_name = "دوره"
         verbose_name_plural = "دوره‌ها"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination orderings used by CourseCursorPagination
+            models.Index(fields=['-created_at', 'id'], name='course_created_id_idx'),
+            models.Index(fields=['price', 'id'], name='course_price_id_idx'),
+            models.Index(fields=['-price', 'id'], name='course_price_desc_id_idx'),
+            GinIndex(fields=['search_vector'], name='course_search_vector_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -69,10 +83,19 @@ class Course(models.Model):
         return self.discount_price if self.discount_price else self.price
     
     def get_total_sections(self):
-        return self.sections.count()
+        return self.get_stats().section_count
     
     def get_total_videos(self):
-        return sum(section.videos.count() for section in self.sections.all())
+        return self.get_stats().video_count
+    
+    def get_stats(self):
+        """Return the denormalized stats row, building it on first access"""
+        try:
+            return self.stats
+        except CourseStats.DoesNotExist:
+            # Cache the new row so later calls on this instance don't rebuild it again
+            self.stats = CourseStats.refresh(self.pk)
+            return self.stats
 
 class Section(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='sections')
@@ -116,6 +139,18 @@ class Video(models.Model):
     # Video settings
     is_preview = models.BooleanField(default=False, help_text="آیا این ویدیو رایگان قابل مشاهده است؟")
     
+    # HLS packaging (see courses/hls.py)
+    HLS_STATUS_CHOICES = [
+        ('pending', 'در انتظار پردازش'),
+        ('processing', 'در حال پردازش'),
+        ('ready', 'آماده'),
+        ('failed', 'ناموفق'),
+    ]
+    hls_status = models.CharField(max_length=20, choices=HLS_STATUS_CHOICES, default='pending', db_index=True)
+    hls_manifest = models.CharField(max_length=255, blank=True, help_text="مسیر master.m3u8 نسبت به MEDIA_ROOT")
+    hls_error = models.TextField(blank=True)
+    hls_processed_at = models.DateTimeField(blank=True, null=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -175,6 +210,111 @@ class Review(models.Model):
     def __str__(self):
         return f"{self.course.title} - {self.user.username} ({self.rating}/5)"
 
+class CourseStats(models.Model):
+    """Denormalized per-course counters kept current by courses.signals"""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    section_count = models.PositiveIntegerField(default=0)
+    video_count = models.PositiveIntegerField(default=0)
+    total_video_seconds = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_average = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "آمار دوره"
+        verbose_name_plural = "آمار دوره‌ها"
+        indexes = [
+            models.Index(fields=['-rating_average', 'course'], name='coursestats_rating_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.course_id} stats"
+    
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_average, 1)
+    
+    @classmethod
+    def compute(cls, course_id):
+        """Aggregate the raw counters for a single course"""
+        videos = Video.objects.filter(section__course_id=course_id).aggregate(
+            count=models.Count('id'),
+            seconds=models.Sum('duration_seconds')
+        )
+        reviews = Review.objects.filter(course_id=course_id).aggregate(
+            count=models.Count('id'),
+            total=models.Sum('rating')
+        )
+        return {
+            'section_count': Section.objects.filter(course_id=course_id).count(),
+            'video_count': videos['count'],
+            'total_video_seconds': videos['seconds'] or 0,
+            'review_count': reviews['count'],
+            'rating_sum': reviews['total'] or 0,
+            'rating_average': (reviews['total'] or 0) / reviews['count'] if reviews['count'] else 0,
+        }
+    
+    @classmethod
+    def refresh(cls, course_id, create=True):
+        """Recompute the stats row of one course.
+        
+        With ``create=False`` only an existing row is updated, which is what
+        delete handlers need while a course is being cascaded away.
+        """
+        values = cls.compute(course_id)
+        if not create:
+            cls.objects.filter(course_id=course_id).update(**values, updated_at=timezone.now())
+            return None
+        stats, created = cls.objects.update_or_create(course_id=course_id, defaults=values)
+        return stats
+    
+    @classmethod
+    def rebuild_all(cls, batch_size=500):
+        """Rebuild every stats row with one aggregate query per counter"""
+        def counter(queryset, expression):
+            return models.Subquery(
+                queryset.order_by().values('group').annotate(value=expression).values('value')[:1]
+            )
+        
+        sections = Section.objects.filter(course=models.OuterRef('pk')).annotate(group=models.F('course'))
+        videos = Video.objects.filter(section__course=models.OuterRef('pk')).annotate(group=models.F('section__course'))
+        reviews = Review.objects.filter(course=models.OuterRef('pk')).annotate(group=models.F('course'))
+        
+        courses = Course.objects.annotate(
+            stat_sections=counter(sections, models.Count('id')),
+            stat_videos=counter(videos, models.Count('id')),
+            stat_seconds=counter(videos, models.Sum('duration_seconds')),
+            stat_reviews=counter(reviews, models.Count('id')),
+            stat_rating=counter(reviews, models.Sum('rating')),
+        ).values_list('pk', 'stat_sections', 'stat_videos', 'stat_seconds', 'stat_reviews', 'stat_rating')
+        
+        rows = [
+            cls(
+                course_id=pk,
+                section_count=sections or 0,
+                video_count=videos or 0,
+                total_video_seconds=seconds or 0,
+                review_count=reviews or 0,
+                rating_sum=rating or 0,
+                rating_average=(rating or 0) / reviews if reviews else 0,
+            )
+            for pk, sections, videos, seconds, reviews, rating in courses.iterator()
+        ]
+        cls.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['course'],
+            update_fields=[
+                'section_count', 'video_count', 'total_video_seconds',
+                'review_count', 'rating_sum', 'rating_average',
+            ],
+        )
+        return len(rows)
+
 class CoursePackage(models.Model):
     """Course packages that bundle multiple courses with special pricing"""
     title = models.CharField(max_length=200)
@@ -194,6 +334,7 @@ class CoursePackage(models.Model):
     
     # Media
     thumbnail = models.ImageField(upload_to='package_thumbnails/', blank=True, null=True)
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,185 @@
+import base64
+import datetime
+import json
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keep full microsecond precision so cursor comparisons are exact"""
+    
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """Opaque cursor pagination over a unique tuple ordering.
+    
+    Each page is fetched with ``WHERE k1 >= v1 AND (k1 > v1 OR (k1 = v1 AND
+    k2 > v2)) ORDER BY k1, k2 LIMIT n``; the bound on ``k1`` lets an index
+    start at the cursor, so a deep page costs the same as the first one.
+    Orderings are declared per sort key and must end with a unique field.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    sort_query_param = 'sort'
+    orderings = {}
+    default_sort = None
+    
+    def __init__(self, url=None):
+        # Links point at the current request URL unless another endpoint serves the following pages
+        self.url = url
+    
+    def get_page_size(self, request):
+        page_size = getattr(settings, 'CATALOG_PAGE_SIZE', 24)
+        max_page_size = getattr(settings, 'CATALOG_MAX_PAGE_SIZE', 100)
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        return max(1, min(requested, max_page_size))
+    
+    def get_sort(self, request):
+        sort = request.query_params.get(self.sort_query_param, self.default_sort)
+        return sort if sort in self.orderings else self.default_sort
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.sort = self.get_sort(request)
+        self.ordering = self.orderings[self.sort]
+        
+        reverse = False
+        position = None
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            reverse, position = self.decode_cursor(encoded, queryset.model)
+        
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._flip(field) for field in ordering]
+        
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+        
+        # Fetch one extra row to know whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+        
+        self.has_next = has_more if not reverse else True
+        self.has_previous = position is not None if not reverse else has_more
+        self.page = results
+        return results
+    
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+    
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+    
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(False, self.page[-1])
+    
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(True, self.page[0])
+    
+    def _link(self, reverse, obj):
+        url = self.request.build_absolute_uri(self.url)
+        position = [self._value(obj, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'s': self.sort, 'r': reverse, 'p': position}, cls=CursorEncoder)
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+    
+    def decode_cursor(self, encoded, model):
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if payload['s'] != self.sort or len(payload['p']) != len(self.ordering):
+                raise ValueError
+            position = [
+                self._to_python(model, field.lstrip('-'), value)
+                for field, value in zip(self.ordering, payload['p'])
+            ]
+            return bool(payload['r']), position
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('Invalid cursor')
+    
+    def _after(self, ordering, position):
+        """Build the row-value comparison as an OR of prefix-equal terms.
+        
+        Mixed directions rule out a real row comparison, and PostgreSQL
+        can't turn the OR into an index range on its own, so the leading
+        column also gets a plain inclusive bound.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        leading = ordering[0]
+        bound = 'lte' if leading.startswith('-') else 'gte'
+        return Q(**{f'{leading.lstrip("-")}__{bound}': position[0]}) & condition
+    
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+    
+    @staticmethod
+    def _value(obj, path):
+        for attr in path.split('__'):
+            obj = getattr(obj, attr)
+        return obj
+    
+    @staticmethod
+    def _to_python(model, path, value):
+        """Convert a decoded value back through its model field; annotations pass through"""
+        parts = path.split('__')
+        try:
+            for part in parts[:-1]:
+                model = model._meta.get_field(part).related_model
+            field = model._meta.get_field(parts[-1])
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+
+class CourseCursorPagination(KeysetPagination):
+    """Catalog pagination supporting the sorts offered by the template CourseListView"""
+    default_sort = '-created_at'
+    orderings = {
+        '-created_at': ['-created_at', 'id'],
+        'price_low': ['price', 'id'],
+        'price_high': ['-price', 'id'],
+        'rating': ['-stats__rating_average', 'id'],
+    }
+
+
+class CourseSearchPagination(CourseCursorPagination):
+    """Search results are ranked by relevance unless another sort is requested"""
+    default_sort = 'relevance'
+    orderings = {
+        'relevance': ['-rank', 'id'],
+        **CourseCursorPagination.orderings,
+    }
@@ -0,0 +1,146 @@
+import html
+import re
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db.models import F, FloatField, Func, TextField, Value
+from django.db.models.functions import Cast, Concat
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+SEARCH_CONFIG = 'simple'
+
+# Private-use characters ts_headline wraps matches in; render_snippet turns
+# them into <mark> tags once the rest of the text has been escaped
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_STOP = '\ue001'
+
+# Arabic code points mapped onto their Persian forms, then characters that
+# are dropped entirely (ZWNJ, tatweel, harakat). The same table drives the
+# SQL translate() used for indexing and the Python normalization of queries.
+NORMALIZE_FROM = (
+    '\u064a\u0649\u0643\u06c0\u0629\u0623\u0625\u0624\u0626'  # ي ى ك ۀ ة أ إ ؤ ئ
+    '\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669'  # Arabic-Indic digits
+    '\u06f0\u06f1\u06f2\u06f3\u06f4\u06f5\u06f6\u06f7\u06f8\u06f9'  # Persian digits
+)
+NORMALIZE_TO = (
+    '\u06cc\u06cc\u06a9\u0647\u0647\u0627\u0627\u0648\u06cc'  # ی ی ک ه ه ا ا و ی
+    '0123456789'
+    '0123456789'
+)
+# ZWNJ, RLM, tatweel and the harakat
+NORMALIZE_DROP = '\u200c\u200f\u0640\u064b\u064c\u064d\u064e\u064f\u0650\u0651\u0652'
+
+_TRANSLATION = str.maketrans(NORMALIZE_FROM, NORMALIZE_TO, NORMALIZE_DROP)
+_TOKEN = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    """Fold Arabic letter variants to Persian and drop ZWNJ and diacritics"""
+    return (text or '').translate(_TRANSLATION).lower()
+
+
+class Normalize(Func):
+    """SQL counterpart of normalize_text built on translate()"""
+    function = 'translate'
+    output_field = TextField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(
+            expression,
+            Value(NORMALIZE_FROM + NORMALIZE_DROP),
+            Value(NORMALIZE_TO),
+            **extra
+        )
+
+
+class StripTags(Func):
+    """Remove markup and entities from CKEditor HTML"""
+    function = 'regexp_replace'
+    output_field = TextField()
+    template = "%(function)s(%(function)s(%(expressions)s, '<[^>]*>', ' ', 'g'), '&[#a-zA-Z0-9]+;', ' ', 'g')"
+
+
+class RemoveTags(Func):
+    """Remove markup from CKEditor HTML but keep entities, which render_snippet decodes"""
+    function = 'regexp_replace'
+    output_field = TextField()
+    template = "%(function)s(%(expressions)s, '<[^>]*>', ' ', 'g')"
+
+
+def _document(field):
+    return Normalize(StripTags(F(field)))
+
+
+def _headline_document(field):
+    # Highlight markers already in the text would otherwise come out as <mark> tags
+    return Func(
+        Normalize(RemoveTags(F(field))), Value(HIGHLIGHT_START + HIGHLIGHT_STOP), Value(''),
+        function='translate', output_field=TextField(),
+    )
+
+
+def search_vector():
+    """Weighted vector over title, short description and stripped description"""
+    return (
+        SearchVector(_document('title'), weight='A', config=SEARCH_CONFIG)
+        + SearchVector(_document('short_description'), weight='B', config=SEARCH_CONFIG)
+        + SearchVector(_document('description'), weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(queryset):
+    """Recompute the stored vectors for every course in ``queryset`` in one UPDATE"""
+    return queryset.update(search_vector=search_vector())
+
+
+def build_query(text):
+    """Turn free text into a prefix-matching tsquery, or None if nothing is searchable"""
+    tokens = _TOKEN.findall(normalize_text(text))
+    if not tokens:
+        return None
+    return SearchQuery(
+        ' & '.join(f'{token}:*' for token in tokens),
+        config=SEARCH_CONFIG,
+        search_type='raw'
+    )
+
+
+def search_courses(queryset, text, snippets=True):
+    """Filter ``queryset`` to courses matching ``text``, annotated with ``rank``.
+
+    With ``snippets`` each row also carries a raw ``snippet``; pass it through
+    render_snippet before showing it. Results are ordered by relevance.
+    """
+    query = build_query(text)
+    if query is None:
+        return queryset.none()
+
+    # ts_rank is float4; as float8 the value a cursor carries back compares equal to the row's own
+    queryset = queryset.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+    )
+    if snippets:
+        queryset = queryset.annotate(
+            snippet=SearchHeadline(
+                Concat(_headline_document('short_description'), Value(' '), _headline_document('description')),
+                query,
+                config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START,
+                stop_sel=HIGHLIGHT_STOP,
+                max_fragments=2,
+                max_words=25,
+                min_words=10,
+            )
+        )
+    return queryset.order_by('-rank', 'id')
+
+
+def render_snippet(snippet):
+    """Safe HTML for a ``snippet`` from search_courses: its text escaped, matches in ``<mark>``"""
+    if not snippet:
+        return ''
+    # Decode entities per segment so an encoded marker can't turn into a tag
+    parts = re.split(f'([{HIGHLIGHT_START}{HIGHLIGHT_STOP}])', snippet)
+    return mark_safe(''.join(
+        '<mark>' if part == HIGHLIGHT_START else '</mark>' if part == HIGHLIGHT_STOP else escape(html.unescape(part))
+        for part in parts
+    ))
@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from django.urls import reverse
 from .models import Course, Category, Section, Video, Review, CoursePackage
+from medical_course.images import variant_srcset
+from .search import render_snippet
+from payments.entitlements import can_access
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -16,15 +20,29 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class VideoSerializer(serializers.ModelSerializer):
     """Video serializer"""
+    video_file = serializers.SerializerMethodField()
+    hls_manifest = serializers.SerializerMethodField()
     duration_formatted = serializers.SerializerMethodField()
     
     class Meta:
         model = Video
         fields = [
-            'id', 'title', 'description', 'video_file', 'duration_seconds',
-            'duration_formatted', 'order', 'is_preview', 'created_at'
+            'id', 'title', 'description', 'video_file', 'hls_manifest', 'hls_status',
+            'duration_seconds', 'duration_formatted', 'order', 'is_preview', 'created_at'
         ]
     
+    def get_video_file(self, obj):
+        """Protected URL; the file itself is never exposed under MEDIA_URL"""
+        if not obj.video_file:
+            return None
+        return reverse('api_video_file', args=[obj.pk])
+    
+    def get_hls_manifest(self, obj):
+        """Adaptive stream URL once packaging finished; players fall back to video_file"""
+        if obj.hls_status != 'ready' or not obj.hls_manifest:
+            return None
+        return reverse('api_video_hls', args=[obj.pk, 'master.m3u8'])
+    
     def get_duration_formatted(self, obj):
         if not obj.duration_seconds:
             return "0:00"
@@ -71,6 +89,7 @@ class CourseListSerializer(serializers.ModelSerializer):
     total_videos = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
     review_count = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
@@ -78,27 +97,39 @@ class CourseListSerializer(serializers.ModelSerializer):
             'id', 'title', 'slug', 'short_description', 'category_name',
             'instructor_name', 'difficulty', 'effective_price', 'is_free',
             'duration_hours', 'total_sections', 'total_videos',
-            'average_rating', 'review_count', 'thumbnail', 'is_featured',
-            'is_published', 'created_at'
+            'average_rating', 'review_count', 'thumbnail', 'thumbnail_srcset',
+            'is_featured', 'is_published', 'created_at'
         ]
     
     def get_effective_price(self, obj):
         return obj.get_effective_price()
     
     def get_total_sections(self, obj):
-        return obj.get_total_sections()
+        return obj.get_stats().section_count
     
     def get_total_videos(self, obj):
-        return obj.get_total_videos()
+        return obj.get_stats().video_count
     
     def get_average_rating(self, obj):
-        reviews = obj.reviews.all()
-        if reviews.exists():
-            return round(sum(r.rating for r in reviews) / reviews.count(), 1)
-        return None
+        return obj.get_stats().average_rating
     
     def get_review_count(self, obj):
-        return obj.reviews.count()
+        return obj.get_stats().review_count
+    
+    def get_thumbnail_srcset(self, obj):
+        return variant_srcset(obj.thumbnail, obj.thumbnail_variants, self.context.get('request'))
+
+
+class CourseSearchResultSerializer(CourseListSerializer):
+    """Course list serializer with search relevance and highlighted snippet"""
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.SerializerMethodField()
+    
+    class Meta(CourseListSerializer.Meta):
+        fields = CourseListSerializer.Meta.fields + ['rank', 'snippet']
+    
+    def get_snippet(self, obj):
+        return render_snippet(obj.snippet)
 
 
 class CourseDetailSerializer(serializers.ModelSerializer):
@@ -129,24 +160,21 @@ class CourseDetailSerializer(serializers.ModelSerializer):
         return obj.get_effective_price()
     
     def get_total_sections(self, obj):
-        return obj.get_total_sections()
+        return obj.get_stats().section_count
     
     def get_total_videos(self, obj):
-        return obj.get_total_videos()
+        return obj.get_stats().video_count
     
     def get_average_rating(self, obj):
-        reviews = obj.reviews.all()
-        if reviews.exists():
-            return round(sum(r.rating for r in reviews) / reviews.count(), 1)
-        return None
+        return obj.get_stats().average_rating
     
     def get_review_count(self, obj):
-        return obj.reviews.count()
+        return obj.get_stats().review_count
     
     def get_is_enrolled(self, obj):
         request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.enrollments.filter(user=request.user).exists()
+        if request:
+            return can_access(request.user, obj)
         return False
 
 
@@ -155,6 +183,7 @@ class CoursePackageSerializer(serializers.ModelSerializer):
     total_courses = serializers.SerializerMethodField()
     total_duration = serializers.SerializerMethodField()
     savings_amount = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
     courses = CourseListSerializer(many=True, read_only=True)
     
     class Meta:
@@ -163,7 +192,7 @@ class CoursePackageSerializer(serializers.ModelSerializer):
             'id', 'title', 'slug', 'description', 'short_description',
             'original_price', 'package_price', 'discount_percentage',
             'total_courses', 'total_duration', 'savings_amount',
-            'is_published', 'is_featured', 'thumbnail', 'courses',
+            'is_published', 'is_featured', 'thumbnail', 'thumbnail_srcset', 'courses',
             'created_at', 'updated_at'
         ]
     
@@ -175,3 +204,6 @@ class CoursePackageSerializer(serializers.ModelSerializer):
     
     def get_savings_amount(self, obj):
         return obj.get_savings_amount()
+    
+    def get_thumbnail_srcset(self, obj):
+        return variant_srcset(obj.thumbnail, obj.thumbnail_variants, self.context.get('request'))
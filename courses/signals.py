@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from medical_course.images import refresh_variants
+from .cache import bump_catalog_version
+from .hls import schedule_processing
+from .models import Course, Section, Video, Review, Category, CoursePackage, CourseStats
+from .search import update_search_vectors
+
+
+@receiver(post_save, sender=Course)
+def create_course_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CourseStats.objects.get_or_create(course=instance)
+
+
+@receiver(post_save, sender=Course)
+def update_course_search_vector(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_vectors(Course.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_save, sender=Section)
+@receiver(pre_save, sender=Review)
+def remember_course(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk:
+        instance._previous_course_id = sender.objects.filter(pk=instance.pk).values_list('course_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Video)
+def remember_video_course(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk:
+        instance._previous_course_id = Video.objects.filter(pk=instance.pk).values_list(
+            'section__course_id', flat=True
+        ).first()
+
+
+def refresh_previous_course(instance, course_id):
+    """Recount the course a section, video or review was just moved away from"""
+    previous = getattr(instance, '_previous_course_id', None)
+    instance._previous_course_id = course_id
+    if previous and previous != course_id:
+        CourseStats.refresh(previous, create=False)
+
+
+@receiver(post_save, sender=Section)
+@receiver(post_save, sender=Review)
+def refresh_stats_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        CourseStats.refresh(instance.course_id)
+        refresh_previous_course(instance, instance.course_id)
+
+
+@receiver(post_delete, sender=Section)
+@receiver(post_delete, sender=Review)
+def refresh_stats_on_delete(sender, instance, **kwargs):
+    CourseStats.refresh(instance.course_id, create=False)
+
+
+@receiver(post_save, sender=Video)
+def refresh_stats_on_video_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        course_id = Section.objects.filter(pk=instance.section_id).values_list('course_id', flat=True).first()
+        if course_id:
+            CourseStats.refresh(course_id)
+        refresh_previous_course(instance, course_id)
+
+
+@receiver(post_delete, sender=Video)
+def refresh_stats_on_video_delete(sender, instance, **kwargs):
+    course_id = Section.objects.filter(pk=instance.section_id).values_list('course_id', flat=True).first()
+    if course_id:
+        CourseStats.refresh(course_id, create=False)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=CoursePackage)
+def refresh_thumbnail_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'thumbnail' not in update_fields):
+        return
+
+    def refresh():
+        if refresh_variants(instance, 'thumbnail', settings.THUMBNAIL_VARIANT_WIDTHS):
+            bump_catalog_version()
+
+    transaction.on_commit(refresh)
+
+
+@receiver(pre_save, sender=Video)
+def reset_hls_on_new_upload(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'video_file' not in update_fields):
+        return
+    if instance.pk:
+        previous = Video.objects.filter(pk=instance.pk).values_list('video_file', flat=True).first()
+        if previous == instance.video_file.name:
+            return
+    # The old manifest stays on the row until the new one replaces it, but is no longer served
+    instance.hls_status = 'pending'
+    instance.hls_error = ''
+    instance._hls_needs_processing = True
+
+
+@receiver(post_save, sender=Video)
+def process_new_upload(sender, instance, raw=False, **kwargs):
+    if not raw and getattr(instance, '_hls_needs_processing', False) and instance.video_file:
+        instance._hls_needs_processing = False
+        if settings.HLS_AUTO_PROCESS:
+            schedule_processing(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=CoursePackage)
+@receiver(post_delete, sender=CoursePackage)
+@receiver(m2m_changed, sender=CoursePackage.courses.through)
+def invalidate_catalog_cache(sender, raw=False, **kwargs):
+    if not raw:
+        bump_catalog_version()
@@ -1,3 +1,38 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from .models import Category, Course
 
-# Create your tests here.
+User = get_user_model()
+
+
+class SearchPaginationTests(TestCase):
+    """Paging through relevance-sorted search results must return every course exactly once"""
+
+    def setUp(self):
+        instructor = User.objects.create_user(username='instructor', password='x', user_type='admin')
+        category = Category.objects.create(name='Cardiology', slug='cardiology')
+        # Same text, so every course gets the same rank
+        self.courses = [
+            Course.objects.create(
+                title=f'Echocardiography {i}', slug=f'echo-{i}', description='echocardiography basics',
+                short_description='echocardiography', category=category, instructor=instructor,
+                price=Decimal('100.00'), duration_hours=1, what_you_learn='x', is_published=True
+            )
+            for i in range(7)
+        ]
+
+    def test_tied_ranks_are_neither_repeated_nor_skipped(self):
+        url = '/api/courses/search/?q=echocardiography&page_size=3'
+        seen = []
+        for _ in range(10):
+            data = self.client.get(url).json()
+            seen += [course['id'] for course in data['courses']]
+            url = data['next']
+            if not url:
+                break
+        self.assertIsNone(url)
+        self.assertEqual(sorted(seen), sorted(course.pk for course in self.courses))
+        self.assertEqual(len({course['rank'] for course in self.client.get(
+            '/api/courses/search/?q=echocardiography&page_size=10'
+        ).json()['courses']}), 1)
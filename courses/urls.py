@@ -24,6 +24,7 @@ urlpatterns = [
     path('ajax/add-to-cart/', views.AddToCartView.as_view(), name='add_to_cart'),
     path('ajax/remove-from-cart/', views.RemoveFromCartView.as_view(), name='remove_from_cart'),
     path('ajax/update-video-progress/', views.UpdateVideoProgressView.as_view(), name='update_video_progress'),
+    path('ajax/update-video-progress/batch/', views.BatchUpdateVideoProgressView.as_view(), name='batch_update_video_progress'),
     
     # Reviews
     path('course/<slug:slug>/review/', views.AddReviewView.as_view(), name='add_review'),
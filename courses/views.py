@@ -1,12 +1,15 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView, CreateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q, Avg, Count
+from django.db.models import Avg, Count
 from django.http import JsonResponse
 from django.contrib import messages
 from django.urls import reverse_lazy
 from .models import Course, Category, Section, Video, Review
+from .search import render_snippet, search_courses
 from payments.models import Cart, CartItem, Enrollment, VideoProgress
+from payments.entitlements import can_access
+from payments.progress import progress_buffer, record_progress
 import json
 
 class HomeView(ListView):
@@ -87,14 +90,7 @@ class CourseDetailView(DetailView):
         course = self.get_object()
         
         # Check if user is enrolled
-        user_enrolled = False
-        if self.request.user.is_authenticated:
-            user_enrolled = Enrollment.objects.filter(
-                user=self.request.user,
-                course=course
-            ).exists()
-        
-        context['user_enrolled'] = user_enrolled
+        context['user_enrolled'] = can_access(self.request.user, course)
         context['reviews'] = course.reviews.all()[:10]
         context['avg_rating'] = course.reviews.aggregate(avg=Avg('rating'))['avg'] or 0
         context['total_reviews'] = course.reviews.count()
@@ -122,15 +118,8 @@ class SectionDetailView(LoginRequiredMixin, DetailView):
         return section
     
     def has_access_to_section(self, section):
-        if self.request.user.is_superuser:
-            return True
-        
-        # Check if user has purchased the full course or this specific section
-        return Enrollment.objects.filter(
-            user=self.request.user
-        ).filter(
-            Q(course=section.course) | Q(section=section)
-        ).exists()
+        # Superuser, or purchased the full course or this specific section
+        return can_access(self.request.user, section)
 
 class VideoPlayerView(LoginRequiredMixin, DetailView):
     model = Video
@@ -150,14 +139,7 @@ class VideoPlayerView(LoginRequiredMixin, DetailView):
         return video
     
     def has_access_to_video(self, video):
-        if self.request.user.is_superuser:
-            return True
-        
-        return Enrollment.objects.filter(
-            user=self.request.user
-        ).filter(
-            Q(course=video.section.course) | Q(section=video.section)
-        ).exists()
+        return can_access(self.request.user, video)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -168,6 +150,9 @@ class VideoPlayerView(LoginRequiredMixin, DetailView):
             user=self.request.user,
             video=video
         )
+        buffered_seconds = progress_buffer.pending(self.request.user.pk, video.pk)
+        if buffered_seconds is not None:
+            progress.watched_seconds = buffered_seconds
         
         context['progress'] = progress
         context['section'] = video.section
@@ -200,17 +185,14 @@ class SearchView(ListView):
     def get_queryset(self):
         query = self.request.GET.get('q', '')
         if query:
-            return Course.objects.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(short_description__icontains=query),
-                is_published=True
-            )
+            return search_courses(Course.objects.filter(is_published=True), query)
         return Course.objects.none()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['query'] = self.request.GET.get('q', '')
+        for course in context['courses']:
+            course.snippet = render_snippet(course.snippet)
         return context
 
 class MyCourseListView(LoginRequiredMixin, ListView):
@@ -269,19 +251,25 @@ class UpdateVideoProgressView(LoginRequiredMixin, View):
         watched_seconds = data.get('watched_seconds', 0)
         
         try:
-            video = get_object_or_404(Video, id=video_id)
-            progress, created = VideoProgress.objects.get_or_create(
-                user=request.user,
-                video=video
-            )
-            
-            progress.watched_seconds = watched_seconds
-            if video.duration_seconds and watched_seconds >= video.duration_seconds * 0.9:
-                progress.is_completed = True
-            progress.save()
-            
+            # Heartbeats are coalesced in memory and written in batches
+            record_progress(request.user, video_id, watched_seconds)
             return JsonResponse({'success': True})
-        except Exception as e:
+        except (TypeError, ValueError) as e:
+            return JsonResponse({'success': False, 'message': str(e)})
+
+class BatchUpdateVideoProgressView(LoginRequiredMixin, View):
+    """Accept progress for several videos in one request"""
+    def post(self, request):
+        data = json.loads(request.body)
+        entries = data.get('progress', [])
+        if not isinstance(entries, list):
+            return JsonResponse({'success': False, 'message': 'progress must be a list'})
+        
+        try:
+            for entry in entries:
+                record_progress(request.user, entry['video_id'], entry.get('watched_seconds', 0))
+            return JsonResponse({'success': True, 'accepted': len(entries)})
+        except (KeyError, TypeError, ValueError) as e:
             return JsonResponse({'success': False, 'message': str(e)})
 
 class AddReviewView(LoginRequiredMixin, CreateView):
@@ -298,7 +286,7 @@ class AddReviewView(LoginRequiredMixin, CreateView):
         course = get_object_or_404(Course, slug=self.kwargs['slug'])
         
         # Check if user has purchased this course
-        if not Enrollment.objects.filter(user=self.request.user, course=course).exists():
+        if not can_access(self.request.user, course):
             messages.error(self.request, 'فقط کاربرانی که این دوره را خریداری کرده‌اند می‌توانند نظر بدهند.')
             return redirect('courses:course_detail', slug=course.slug)
         
@@ -111,7 +111,7 @@ export default function AdminMarketers() {
         setRequests(data);
       } else if (activeTab === 'marketers') {
         const data = await adminApi.getMarketers({ search: searchTerm });
-        setMarketers(data);
+        setMarketers(data.marketers);
       } else if (activeTab === 'codes') {
         const data = await adminApi.getReferralCodes({ 
           is_active: filterActive !== null ? filterActive : undefined 
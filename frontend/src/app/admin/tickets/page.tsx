@@ -3,7 +3,7 @@
 import { useState, useEffect } from 'react';
 import { useAuth } from '@/contexts/AuthContext';
 import { useRole } from '@/lib/auth';
-import { adminApi } from '@/lib/api';
+import { adminApi, fetchPage } from '@/lib/api';
 
 interface Ticket {
   id: number;
@@ -31,6 +31,8 @@ export default function AdminTickets() {
   const { canAccessAdminFeatures } = useRole();
   const [tickets, setTickets] = useState<Ticket[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('');
   const [priorityFilter, setPriorityFilter] = useState('');
@@ -54,7 +56,8 @@ export default function AdminTickets() {
       if (categoryFilter) params.category = categoryFilter;
 
       const data = await adminApi.getTickets(params);
-      setTickets(data);
+      setTickets(data.tickets);
+      setNextPage(data.next || null);
     } catch (error) {
       console.error('Error fetching tickets:', error);
     } finally {
@@ -62,6 +65,20 @@ export default function AdminTickets() {
     }
   };
 
+  const loadMoreTickets = async () => {
+    if (!nextPage) return;
+    try {
+      setLoadingMore(true);
+      const data = await fetchPage(nextPage);
+      setTickets((current) => [...current, ...data.tickets]);
+      setNextPage(data.next || null);
+    } catch (error) {
+      console.error('Error fetching tickets:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleSearch = () => {
     setLoading(true);
     fetchTickets();
@@ -301,6 +318,18 @@ export default function AdminTickets() {
                   ))}
                 </tbody>
               </table>
+              {nextPage && (
+                <div className="text-center my-3">
+                  <button className="btn btn-outline-primary btn-sm" onClick={loadMoreTickets} disabled={loadingMore}>
+                    {loadingMore ? (
+                      <span className="spinner-border spinner-border-sm me-1" role="status"></span>
+                    ) : (
+                      <i className="fas fa-chevron-down me-1"></i>
+                    )}
+                    نمایش تیکت‌های بیشتر
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
@@ -3,7 +3,7 @@
 import { useEffect, useState } from 'react';
 import Link from 'next/link';
 import { useSearchParams } from 'next/navigation';
-import { coursesApi } from '@/lib/api';
+import { coursesApi, fetchPage } from '@/lib/api';
 
 interface Course {
   id: number;
@@ -50,6 +50,8 @@ export default function CoursesPage() {
   const [courses, setCourses] = useState<Course[]>([]);
   const [packages, setPackages] = useState<CoursePackage[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
   const searchParams = useSearchParams();
 
@@ -66,7 +68,8 @@ export default function CoursesPage() {
       const data = query 
         ? await coursesApi.searchCourses(query)
         : await coursesApi.getCourses();
-      setCourses(data.results || data);
+      setCourses(data.results || data.courses || data);
+      setNextPage(data.next || null);
     } catch (error) {
       console.error('Error fetching courses:', error);
     } finally {
@@ -74,6 +77,20 @@ export default function CoursesPage() {
     }
   };
 
+  const loadMoreCourses = async () => {
+    if (!nextPage) return;
+    try {
+      setLoadingMore(true);
+      const data = await fetchPage(nextPage);
+      setCourses((current) => [...current, ...(data.results || data.courses || [])]);
+      setNextPage(data.next || null);
+    } catch (error) {
+      console.error('Error fetching courses:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchPackages = async () => {
     try {
       const data = await coursesApi.getPackages();
@@ -157,7 +174,7 @@ export default function CoursesPage() {
               <div className="alert alert-info">
                 <i className="fas fa-search me-2"></i>
                 نتایج جستجو برای: <strong>"{searchQuery}"</strong>
-                <span className="ms-2">({courses.length} دوره یافت شد)</span>
+                <span className="ms-2">({courses.length}{nextPage ? '+' : ''} دوره یافت شد)</span>
               </div>
             </div>
           </div>
@@ -271,6 +288,18 @@ export default function CoursesPage() {
                 </div>
               </div>
             ))}
+            {nextPage && (
+              <div className="col-12 text-center mt-2">
+                <button className="btn btn-outline-primary" onClick={loadMoreCourses} disabled={loadingMore}>
+                  {loadingMore ? (
+                    <span className="spinner-border spinner-border-sm me-2" role="status"></span>
+                  ) : (
+                    <i className="fas fa-chevron-down me-2"></i>
+                  )}
+                  نمایش دوره‌های بیشتر
+                </button>
+              </div>
+            )}
           </div>
         ) : (
           <div className="text-center py-5" data-aos="fade-up">
@@ -93,7 +93,9 @@ async function apiFetch(input: RequestInfo, init: RequestInit = {}): Promise<Res
   }
   
   try {
-    const response = await fetch(`${API_BASE}${input}`, {
+    // Pagination links (next/previous) come back as absolute URLs
+    const url = typeof input === 'string' && /^https?:\/\//.test(input) ? input : `${API_BASE}${input}`;
+    const response = await fetch(url, {
       ...init,
       headers,
       credentials: 'include', // Include cookies for session auth
@@ -116,6 +118,12 @@ async function apiFetch(input: RequestInfo, init: RequestInit = {}): Promise<Res
   }
 }
 
+// Follow a `next`/`previous` link from a paginated response
+export async function fetchPage(url: string) {
+  const response = await apiFetch(url);
+  return response.json();
+}
+
 // Auth API
 export const authApi = {
   async getProfile() {
@@ -411,9 +419,13 @@ export const adminApi = {
   
   async getMarketers(params?: {
     search?: string;
+    sort?: string;
+    cursor?: string;
   }) {
     const searchParams = new URLSearchParams();
     if (params?.search) searchParams.set('search', params.search);
+    if (params?.sort) searchParams.set('sort', params.sort);
+    if (params?.cursor) searchParams.set('cursor', params.cursor);
     
     const query = searchParams.toString();
     const response = await apiFetch(`/admin/marketers/${query ? `?${query}` : ''}`);
@@ -605,6 +617,13 @@ export const adminApi = {
     });
     return response.json();
   },
+
+  async claimNextTicket() {
+    const response = await apiFetch('/admin/tickets/claim/', {
+      method: 'POST',
+    });
+    return response.json();
+  },
 };
 
 // Tickets API (for users)
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+    verbose_name = 'صف کارها'
+    
+    def ready(self):
+        from . import mail  # noqa: F401
+        # Each app registers its handlers in <app>/jobs.py
+        autodiscover_modules('jobs')
@@ -0,0 +1,69 @@
+import base64
+from email.mime.base import MIMEBase
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from .queue import enqueue, job
+
+
+def serialize_message(message):
+    """JSON-safe copy of an EmailMessage, or None if it has MIME attachments we can't round-trip"""
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, MIMEBase):
+            return None
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append([filename, base64.b64encode(content).decode(), mimetype])
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'content_subtype': message.content_subtype,
+        'attachments': attachments,
+    }
+
+
+def deserialize_message(data):
+    message = EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        cc=data['cc'],
+        bcc=data['bcc'],
+        reply_to=data['reply_to'],
+        headers=data['headers'],
+        alternatives=[tuple(alternative) for alternative in data['alternatives']],
+    )
+    message.content_subtype = data['content_subtype']
+    for filename, content, mimetype in data['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Email backend that queues each message as a job; workers send it with JOBS_EMAIL_BACKEND"""
+
+    def send_messages(self, email_messages):
+        sent = 0
+        for message in email_messages:
+            data = serialize_message(message)
+            if data is None:
+                sent += get_connection(settings.JOBS_EMAIL_BACKEND).send_messages([message])
+                continue
+            enqueue('jobs.send_email', message=data)
+            sent += 1
+        return sent
+
+
+@job('jobs.send_email', atomic=False)
+def send_email(message):
+    get_connection(settings.JOBS_EMAIL_BACKEND, fail_silently=False).send_messages([deserialize_message(message)])
@@ -0,0 +1,48 @@
+import multiprocessing
+import signal
+from django.core.management.base import BaseCommand
+from django.db import connections
+from jobs.worker import Worker
+
+
+def run_worker(batch_size, poll_interval):
+    Worker(batch_size=batch_size, poll_interval=poll_interval).run()
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers against the PostgreSQL job queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes to run')
+        parser.add_argument('--batch-size', type=int, help='Jobs claimed per round trip')
+        parser.add_argument('--poll-interval', type=float, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due, then exit')
+
+    def handle(self, *args, **options):
+        if options['once'] or options['processes'] <= 1:
+            worker = Worker(batch_size=options['batch_size'], poll_interval=options['poll_interval'])
+            self.stdout.write(f'Worker {worker.worker_id} started')
+            processed = worker.run(once=options['once'])
+            self.stdout.write(self.style.SUCCESS(f'Worker {worker.worker_id} stopped after {processed} jobs'))
+            return
+
+        # Forked children must not share the parent's database connections
+        connections.close_all()
+        children = [
+            multiprocessing.Process(target=run_worker, args=(options['batch_size'], options['poll_interval']))
+            for _ in range(options['processes'])
+        ]
+        for child in children:
+            child.start()
+        self.stdout.write(f'Started {len(children)} worker processes')
+
+        def forward(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for child in children:
+            child.join()
+        self.stdout.write(self.style.SUCCESS('All workers stopped'))
@@ -0,0 +1,48 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work, claimed by ``run_workers`` with ``FOR UPDATE SKIP LOCKED``"""
+    STATUS_CHOICES = [
+        ('queued', 'در صف'),
+        ('running', 'در حال اجرا'),
+        ('done', 'انجام شده'),
+        ('failed', 'ناموفق'),
+    ]
+    
+    name = models.CharField(max_length=100, verbose_name="نوع")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', verbose_name="وضعیت")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="زمان اجرا")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="تلاش‌ها")
+    max_attempts = models.PositiveIntegerField(default=5)
+    # At most one queued/running job per key (e.g. one fulfillment per payment)
+    unique_key = models.CharField(max_length=200, blank=True, null=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        verbose_name = "کار پس‌زمینه"
+        verbose_name_plural = "کارهای پس‌زمینه"
+        ordering = ['-created_at']
+        indexes = [
+            # Only the rows a worker can claim
+            models.Index(fields=['run_at'], condition=Q(status='queued'), name='jobs_job_queued_run_at'),
+            models.Index(fields=['locked_until'], condition=Q(status='running'), name='jobs_job_running_lock'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['unique_key'],
+                condition=Q(status__in=['queued', 'running']),
+                name='jobs_job_active_unique_key',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
@@ -0,0 +1,192 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# name -> JobHandler, filled by @job in each app's jobs.py
+registry = {}
+
+
+class ClaimLost(Exception):
+    """The job's lock expired and it was handed to another run"""
+
+
+class JobHandler:
+    def __init__(self, name, func, timeout, atomic, max_attempts):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        self.atomic = atomic
+        self.max_attempts = max_attempts
+
+
+def job(name, timeout=None, atomic=True, max_attempts=None):
+    """Register a function as the handler for jobs called ``name``.
+
+    The payload is passed as keyword arguments. With ``atomic`` the handler
+    and the job's completion commit together; long-running handlers should
+    pass ``atomic=False`` and a ``timeout`` (seconds) that covers a full run.
+    """
+    def register(func):
+        registry[name] = JobHandler(name, func, timeout, atomic, max_attempts)
+        return func
+    return register
+
+
+def enqueue(name, run_at=None, unique_key=None, **payload):
+    """Queue a job; it commits (or rolls back) with the surrounding transaction.
+
+    With ``unique_key`` nothing is queued while another queued or running job
+    has the same key, and None is returned.
+    """
+    handler = registry.get(name)
+    max_attempts = (handler and handler.max_attempts) or settings.JOBS_MAX_ATTEMPTS
+    new_job = Job(
+        name=name,
+        payload=payload,
+        run_at=run_at or timezone.now(),
+        unique_key=unique_key,
+        max_attempts=max_attempts,
+    )
+    if unique_key is None:
+        new_job.save()
+        return new_job
+    try:
+        with transaction.atomic():
+            new_job.save()
+    except IntegrityError:
+        return None
+    return new_job
+
+
+def claim(worker_id, limit):
+    """Lock up to ``limit`` due jobs for this worker without blocking other workers"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', run_at__lte=now)
+            .order_by('run_at', 'id')[:limit]
+        )
+        for claimed in jobs:
+            claimed.status = 'running'
+            claimed.locked_by = worker_id
+            claimed.locked_until = now + timedelta(seconds=lock_timeout(claimed.name))
+            claimed.attempts += 1
+        Job.objects.bulk_update(jobs, ['status', 'locked_by', 'locked_until', 'attempts'])
+    return jobs
+
+
+def lock_timeout(name):
+    handler = registry.get(name)
+    return (handler and handler.timeout) or settings.JOBS_LOCK_TIMEOUT
+
+
+def owned(claimed):
+    """The job's row while this claim of it is still current.
+
+    Every claim bumps ``attempts``, so a claim that expired and was requeued
+    (even to the same worker) no longer matches.
+    """
+    return Job.objects.filter(
+        pk=claimed.pk, status='running', locked_by=claimed.locked_by, attempts=claimed.attempts
+    )
+
+
+def start(claimed):
+    """Renew the lock for a full timeout right before running; False if the claim was lost meanwhile.
+
+    Jobs wait in the worker's batch behind each other, so the lock taken at
+    claim time may have run down (or expired) by the time a job's turn comes.
+    """
+    claimed.locked_until = timezone.now() + timedelta(seconds=lock_timeout(claimed.name))
+    return owned(claimed).update(locked_until=claimed.locked_until) == 1
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter: base, 2x base, 4x base ... capped at JOBS_RETRY_MAX_DELAY"""
+    delay = min(settings.JOBS_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.JOBS_RETRY_MAX_DELAY)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run_job(claimed):
+    """Run one claimed job and record the outcome; returns True on success"""
+    if not start(claimed):
+        logger.warning('Job %s #%s was requeued before its turn came; skipping', claimed.name, claimed.pk)
+        return False
+    handler = registry.get(claimed.name)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job {claimed.name!r}')
+        if handler.atomic:
+            with transaction.atomic():
+                handler.func(**claimed.payload)
+                mark_done(claimed)
+        else:
+            handler.func(**claimed.payload)
+            mark_done(claimed)
+        return True
+    except ClaimLost:
+        logger.error('Job %s #%s outlived its lock and was handed to another run', claimed.name, claimed.pk)
+        return False
+    except Exception:
+        error = traceback.format_exc()
+        if claimed.attempts >= claimed.max_attempts:
+            logger.error('Job %s #%s failed permanently:\n%s', claimed.name, claimed.pk, error)
+            owned(claimed).update(
+                status='failed', last_error=error, locked_until=None, finished_at=timezone.now()
+            )
+        else:
+            delay = retry_delay(claimed.attempts)
+            logger.warning('Job %s #%s failed, retrying in %.0fs:\n%s', claimed.name, claimed.pk, delay, error)
+            owned(claimed).update(
+                status='queued', last_error=error, locked_until=None,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+        return False
+
+
+def mark_done(claimed):
+    """Raises ClaimLost (rolling back an atomic job) if the claim is no longer current"""
+    if not owned(claimed).update(status='done', locked_until=None, finished_at=timezone.now()):
+        raise ClaimLost(claimed.pk)
+
+
+def requeue_expired():
+    """Give jobs of crashed workers (lock expired while running) back to the queue.
+
+    A job that keeps taking its worker down fails once it is out of attempts.
+    """
+    now = timezone.now()
+    expired = Job.objects.filter(status='running', locked_until__lt=now)
+    failed = expired.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', locked_until=None, finished_at=now, last_error='Worker lock expired'
+    )
+    requeued = expired.update(status='queued', locked_until=None, run_at=now)
+    return requeued + failed
+
+
+def purge_finished():
+    """Drop completed jobs older than JOBS_KEEP_FINISHED_DAYS; failed ones stay for inspection"""
+    cutoff = timezone.now() - timedelta(days=settings.JOBS_KEEP_FINISHED_DAYS)
+    return Job.objects.filter(status='done', finished_at__lt=cutoff).delete()[0]
+
+
+def schedule_periodic():
+    """Make sure every JOBS_PERIODIC job has its next run queued"""
+    keys = {f'periodic:{name}': name for name in settings.JOBS_PERIODIC}
+    active = set(Job.objects.filter(unique_key__in=keys, status__in=['queued', 'running']).values_list('unique_key', flat=True))
+    now = timezone.now()
+    for key, name in keys.items():
+        if key in active:
+            continue
+        last = Job.objects.filter(unique_key=key).order_by('-id').values_list('run_at', flat=True).first()
+        run_at = max(now, last + timedelta(seconds=settings.JOBS_PERIODIC[name])) if last else now
+        enqueue(name, run_at=run_at, unique_key=key)
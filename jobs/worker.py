@@ -0,0 +1,54 @@
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+from .queue import claim, purge_finished, requeue_expired, run_job, schedule_periodic
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Claim and run jobs until stopped; SIGTERM/SIGINT finish the current batch first"""
+
+    def __init__(self, batch_size=None, poll_interval=None):
+        self.batch_size = batch_size or settings.JOBS_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.JOBS_POLL_INTERVAL
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stop_event = threading.Event()
+        self.next_housekeeping = 0
+
+    def stop(self, *args):
+        self.stop_event.set()
+
+    def housekeeping(self):
+        if time.monotonic() < self.next_housekeeping:
+            return
+        self.next_housekeeping = time.monotonic() + settings.JOBS_HOUSEKEEPING_INTERVAL
+        requeued = requeue_expired()
+        if requeued:
+            logger.warning('Requeued %d jobs whose worker lock expired', requeued)
+        schedule_periodic()
+        purge_finished()
+
+    def run(self, once=False):
+        """Process jobs; with ``once`` return as soon as nothing is due"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        processed = 0
+        while not self.stop_event.is_set():
+            # Drop connections the database closed while we were idle
+            close_old_connections()
+            self.housekeeping()
+            jobs = claim(self.worker_id, self.batch_size)
+            for claimed in jobs:
+                run_job(claimed)
+                processed += 1
+            if not jobs:
+                if once:
+                    break
+                self.stop_event.wait(self.poll_interval)
+        return processed
@@ -38,6 +38,8 @@ urlpatterns = [
     
     # Tickets
     path('tickets/', admin_api_views.AdminTicketsView.as_view(), name='admin_tickets'),
+    path('tickets/claim/', admin_api_views.AdminTicketClaimView.as_view(), name='admin_ticket_claim'),
     path('tickets/<int:ticket_id>/', admin_api_views.AdminTicketsView.as_view(), name='admin_ticket_detail'),
+    path('tickets/<int:ticket_id>/messages/', admin_api_views.AdminTicketMessagesView.as_view(), name='admin_ticket_messages'),
     path('tickets/<int:ticket_id>/reply/', admin_api_views.AdminTicketReplyView.as_view(), name='admin_ticket_reply'),
 ]
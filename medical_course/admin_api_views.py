@@ -3,18 +3,27 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.db.models import Q, Count, Sum
 from django.utils import timezone
-from datetime import datetime, timedelta
 from .permissions import IsAdminUser
 from accounts.models import User
 from accounts.serializers import UserSerializer
 from payments.models import Purchase, MarketerCommission, MarketerRegistrationRequest, ReferralCode, ReferralCodeSettings
+from payments.ledger import annotate_balances
+from payments.pagination import MarketerCursorPagination
 from payments.serializers import PurchaseSerializer, MarketerCommissionSerializer, MarketerSerializer, ReferralCodeSerializer, ReferralCodeSettingsSerializer
 from courses.models import Course, CoursePackage
 from courses.serializers import CourseListSerializer, CourseDetailSerializer, CoursePackageSerializer
 from tickets.models import SupportTicket, TicketMessage
+from tickets.api_views import thread_response, ticket_with_thread
+from tickets.pagination import TicketCursorPagination
+from tickets.queries import filter_tickets, ticket_list_queryset
+from tickets.sla import claim_next_ticket
 from tickets.serializers import SupportTicketSerializer, SupportTicketListSerializer, TicketMessageSerializer, CreateTicketMessageSerializer
+from analytics.jalali import JALALI_MONTH_NAMES, from_jalali, jalali_months_back, to_jalali
+from analytics.models import DailyMetrics
+from analytics.rollup import compute_days, first_unstored_date
 
 
 class AdminDashboardStatsView(APIView):
@@ -22,109 +31,85 @@ class AdminDashboardStatsView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
     
     def get(self, request):
-        # Calculate date ranges
-        now = timezone.now()
-        this_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
-        
-        # User statistics
-        total_users = User.objects.count()
-        new_users_this_month = User.objects.filter(created_at__gte=this_month_start).count()
-        admin_users = User.objects.filter(user_type='admin').count()
-        marketer_users = User.objects.filter(user_type='staff').count()
-        customer_users = User.objects.filter(user_type='customer').count()
-        
-        # Course statistics
-        total_courses = Course.objects.count()
-        published_courses = Course.objects.filter(is_published=True).count()
-        total_packages = CoursePackage.objects.count()
-        published_packages = CoursePackage.objects.filter(is_published=True).count()
-        
-        # Financial statistics
-        total_revenue = Purchase.objects.filter(payment_status='completed').aggregate(
-            total=Sum('amount')
-        )['total'] or 0
-        
-        this_month_revenue = Purchase.objects.filter(
-            payment_status='completed',
-            created_at__gte=this_month_start
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        pending_commissions = MarketerCommission.objects.filter(status='pending').aggregate(
-            total=Sum('amount')
+        today = timezone.localdate()
+        
+        # Stored rows up to where the scheduled rollup got; the days after it (today included)
+        # are computed live and not written, so a GET never runs the rollup itself
+        live_start = min(first_unstored_date(), today)
+        live = compute_days(live_start, today)
+        today_metrics = live[-1]
+        
+        # Last six Jalali months, newest first
+        months = jalali_months_back(today, 6)
+        history_start = from_jalali(*months[-1], 1)
+        buckets = {month: {'revenue': 0, 'users': 0} for month in months}
+        history = DailyMetrics.objects.filter(date__gte=history_start, date__lt=live_start).values_list(
+            'date', 'revenue', 'new_users'
+        )
+        live_history = [(row.date, row.revenue, row.new_users) for row in live if row.date >= history_start]
+        for day, revenue, new_users in [*history, *live_history]:
+            jy, jm, _ = to_jalali(day)
+            buckets[(jy, jm)]['revenue'] += revenue
+            buckets[(jy, jm)]['users'] += new_users
+        this_month = buckets[months[0]]
+        
+        total_revenue = DailyMetrics.objects.filter(date__lt=live_start).aggregate(
+            total=Sum('revenue')
         )['total'] or 0
+        total_revenue += sum(row.revenue for row in live)
         
-        # Ticket statistics
-        total_tickets = SupportTicket.objects.count()
-        open_tickets = SupportTicket.objects.filter(status='open').count()
-        in_progress_tickets = SupportTicket.objects.filter(status='in_progress').count()
-        closed_tickets = SupportTicket.objects.filter(status='closed').count()
+        # Course statistics
+        courses = Course.objects.aggregate(
+            total=Count('id'),
+            published=Count('id', filter=Q(is_published=True))
+        )
+        packages = CoursePackage.objects.aggregate(
+            total=Count('id'),
+            published=Count('id', filter=Q(is_published=True))
+        )
         
         # Recent activity
         recent_purchases = Purchase.objects.filter(
             payment_status='completed'
-        ).order_by('-created_at')[:5]
-        
-        recent_tickets = SupportTicket.objects.order_by('-created_at')[:5]
-        
-        # Historical data for charts (last 6 months)
-        monthly_data = []
-        for i in range(6):
-            month_start = (this_month_start - timedelta(days=30*i)).replace(day=1)
-            if i == 0:
-                month_end = now
-            else:
-                month_end = (this_month_start - timedelta(days=30*(i-1))).replace(day=1)
-            
-            # Monthly revenue
-            monthly_revenue = Purchase.objects.filter(
-                payment_status='completed',
-                created_at__gte=month_start,
-                created_at__lt=month_end
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            
-            # Monthly user growth
-            monthly_users = User.objects.filter(
-                created_at__gte=month_start,
-                created_at__lt=month_end
-            ).count()
-            
-            # Month name in Persian
-            month_names = ['شهریور', 'مرداد', 'تیر', 'خرداد', 'اردیبهشت', 'فروردین']
-            month_name = month_names[i]
-            
-            monthly_data.append({
-                'month': month_name,
-                'revenue': float(monthly_revenue),
-                'users': monthly_users
-            })
+        ).select_related('course', 'section').order_by('-created_at')[:5]
+        
+        recent_tickets = SupportTicket.objects.select_related('user', 'assigned_to').order_by('-created_at')[:5]
+        
+        monthly_data = [
+            {
+                'month': JALALI_MONTH_NAMES[jm - 1],
+                'revenue': float(buckets[(jy, jm)]['revenue']),
+                'users': buckets[(jy, jm)]['users']
+            }
+            for jy, jm in months
+        ]
         
         return Response({
             'users': {
-                'total': total_users,
-                'new_this_month': new_users_this_month,
+                'total': today_metrics.total_users,
+                'new_this_month': this_month['users'],
                 'by_type': {
-                    'admin': admin_users,
-                    'marketer': marketer_users,
-                    'customer': customer_users
+                    'admin': today_metrics.admin_users,
+                    'marketer': today_metrics.marketer_users,
+                    'customer': today_metrics.customer_users
                 }
             },
             'courses': {
-                'total': total_courses,
-                'published': published_courses,
-                'packages_total': total_packages,
-                'packages_published': published_packages
+                'total': courses['total'],
+                'published': courses['published'],
+                'packages_total': packages['total'],
+                'packages_published': packages['published']
             },
             'financial': {
                 'total_revenue': float(total_revenue),
-                'this_month_revenue': float(this_month_revenue),
-                'pending_commissions': float(pending_commissions)
+                'this_month_revenue': float(this_month['revenue']),
+                'pending_commissions': float(today_metrics.pending_commissions)
             },
             'tickets': {
-                'total': total_tickets,
-                'open': open_tickets,
-                'in_progress': in_progress_tickets,
-                'closed': closed_tickets
+                'total': today_metrics.total_tickets,
+                'open': today_metrics.open_tickets,
+                'in_progress': today_metrics.in_progress_tickets,
+                'closed': today_metrics.closed_tickets
             },
             'recent_activity': {
                 'purchases': PurchaseSerializer(recent_purchases, many=True).data,
@@ -265,7 +250,7 @@ class AdminCoursesView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
     
     def get(self, request):
-        courses = Course.objects.select_related('category', 'instructor').order_by('-created_at')
+        courses = Course.objects.select_related('category', 'instructor', 'stats').order_by('-created_at')
         
         # Filter by published status
         is_published = request.query_params.get('is_published')
@@ -305,7 +290,8 @@ class AdminMarketersView(APIView):
     
     def get(self, request):
         """Get all active marketers with their stats"""
-        marketers = User.objects.filter(user_type='staff').order_by('-created_at')
+        # One query per page: balances come from the ledger row joined in
+        marketers = annotate_balances(User.objects.filter(user_type='staff'))
         
         # Filter by search term
         search = request.query_params.get('search')
@@ -317,8 +303,14 @@ class AdminMarketersView(APIView):
                 Q(last_name__icontains=search)
             )
         
-        serializer = MarketerSerializer(marketers, many=True)
-        return Response(serializer.data)
+        paginator = MarketerCursorPagination()
+        page = paginator.paginate_queryset(marketers, request, view=self)
+        serializer = MarketerSerializer(page, many=True)
+        return Response({
+            'marketers': serializer.data,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link()
+        })
 
 
 class AdminReferralCodesView(APIView):
@@ -423,41 +415,22 @@ class AdminTicketsView(APIView):
     
     def get(self, request, ticket_id=None):
         if ticket_id:
-            # Get specific ticket
-            ticket = get_object_or_404(SupportTicket, id=ticket_id)
-            serializer = SupportTicketSerializer(ticket)
-            return Response(serializer.data)
+            # Get specific ticket with the newest page of its messages
+            ticket = get_object_or_404(SupportTicket.objects.select_related('user', 'assigned_to'), id=ticket_id)
+            thread_url = reverse('admin_api:admin_ticket_messages', args=[ticket.id])
+            return Response(ticket_with_thread(request, ticket, True, thread_url))
         else:
             # List all tickets
-            tickets = SupportTicket.objects.select_related('user', 'assigned_to').prefetch_related('messages')
-            
-            # Filter by status
-            status_filter = request.query_params.get('status')
-            if status_filter:
-                tickets = tickets.filter(status=status_filter)
-            
-            # Filter by priority
-            priority_filter = request.query_params.get('priority')
-            if priority_filter:
-                tickets = tickets.filter(priority=priority_filter)
-            
-            # Filter by category
-            category_filter = request.query_params.get('category')
-            if category_filter:
-                tickets = tickets.filter(category=category_filter)
+            tickets = filter_tickets(ticket_list_queryset(SupportTicket.objects.all()), request.query_params)
             
-            # Search
-            search = request.query_params.get('search')
-            if search:
-                tickets = tickets.filter(
-                    Q(subject__icontains=search) | 
-                    Q(description__icontains=search) |
-                    Q(user__username__icontains=search) |
-                    Q(user__email__icontains=search)
-                )
-            
-            serializer = SupportTicketListSerializer(tickets, many=True)
-            return Response(serializer.data)
+            paginator = TicketCursorPagination()
+            page = paginator.paginate_queryset(tickets, request, view=self)
+            serializer = SupportTicketListSerializer(page, many=True)
+            return Response({
+                'tickets': serializer.data,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link()
+            })
     
     def put(self, request, ticket_id):
         """Update ticket"""
@@ -482,6 +455,26 @@ class AdminTicketsView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class AdminTicketClaimView(APIView):
+    """Assign the most urgent unassigned ticket (by first-response deadline) to the admin"""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    
+    def post(self, request):
+        ticket = claim_next_ticket(request.user)
+        if ticket is None:
+            return Response({'error': 'No unassigned tickets to claim.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(SupportTicketSerializer(ticket).data)
+
+
+class AdminTicketMessagesView(APIView):
+    """Page through a ticket's messages for admin"""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    
+    def get(self, request, ticket_id):
+        ticket = get_object_or_404(SupportTicket, id=ticket_id)
+        return thread_response(request, ticket, include_internal=True)
+
+
 class AdminTicketReplyView(APIView):
     """Reply to ticket for admin"""
     permission_classes = [IsAuthenticated, IsAdminUser]
@@ -4,4 +4,5 @@ from . import health_views
 urlpatterns = [
     path('', health_views.health_check, name='health_check'),
     path('status/', health_views.api_status, name='api_status'),
+    path('metrics/', health_views.metrics, name='metrics'),
 ]
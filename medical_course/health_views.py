@@ -1,7 +1,9 @@
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
+from .metrics import render_metrics
 
 
 @csrf_exempt
@@ -31,3 +33,16 @@ def api_status(request):
             'admin': '/api/admin/',
         }
     })
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """Per-endpoint request histograms for this worker in Prometheus text format"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        if request.META.get('HTTP_AUTHORIZATION') != f'Bearer {token}':
+            return HttpResponse(status=403)
+    elif not settings.DEBUG:
+        # Without a token the endpoint is only open in development
+        return HttpResponse(status=403)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
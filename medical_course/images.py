@@ -0,0 +1,118 @@
+import logging
+import posixpath
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Derivative formats: (key in the variants map, Pillow format, file extension, save options)
+FORMATS = [
+    ('webp', 'WEBP', '.webp', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', '.jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+]
+
+
+def variant_name(name, width, extension):
+    """``course_thumbnails/x.png`` -> ``course_thumbnails/x_w320.webp``, next to the original"""
+    base, _ext = posixpath.splitext(name)
+    return f'{base}_w{width}{extension}'
+
+
+def render_variants(storage, name, widths):
+    """Write fixed-width WebP and JPEG copies of a stored image and return its variants map.
+
+    The map looks like ``{'source': name, 'webp': {'320': name, ...}, 'jpeg': {...}}``.
+    Widths above the original are clamped to the original width.
+    """
+    with storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        largest = max(widths)
+        # Let the JPEG decoder downscale while decoding; a square box keeps
+        # enough pixels whichever way EXIF rotates the image
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = {'source': name}
+    for key, _format, _extension, _options in FORMATS:
+        variants[key] = {}
+
+    current = image
+    for width in sorted({min(width, image.width) for width in widths}, reverse=True):
+        if width != current.width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        for key, image_format, extension, options in FORMATS:
+            output = current
+            if image_format == 'JPEG' and has_alpha:
+                output = Image.new('RGB', current.size, (255, 255, 255))
+                output.paste(current, mask=current.getchannel('A'))
+            buffer = BytesIO()
+            output.save(buffer, image_format, **options)
+            target = variant_name(name, width, extension)
+            if storage.exists(target):
+                storage.delete(target)
+            variants[key][str(width)] = storage.save(target, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def variant_names(variants):
+    return {name for key, *_rest in FORMATS for name in (variants or {}).get(key, {}).values()}
+
+
+def delete_stale_variants(storage, old_variants, new_variants):
+    for name in variant_names(old_variants) - variant_names(new_variants):
+        storage.delete(name)
+
+
+def refresh_variants(instance, field_name, widths, force=False):
+    """Regenerate ``<field_name>_variants`` if the image changed; True when the row was updated.
+
+    The row is written with a queryset update, so no save signals fire.
+    """
+    field_file = getattr(instance, field_name)
+    variants_attr = f'{field_name}_variants'
+    old_variants = getattr(instance, variants_attr) or {}
+    source = field_file.name or ''
+    if not force and old_variants.get('source', '') == source:
+        return False
+
+    new_variants = {}
+    if source:
+        try:
+            new_variants = render_variants(field_file.storage, source, widths)
+        except Exception:
+            # Broken or oversized uploads keep serving the original
+            logger.exception('Could not create image variants for %s', source)
+            new_variants = {'source': source}
+
+    changes = {variants_attr: new_variants}
+    if any(field.name == 'updated_at' for field in instance._meta.concrete_fields):
+        # Keeps ETag/Last-Modified validators in step with the new srcset
+        changes['updated_at'] = instance.updated_at = timezone.now()
+    type(instance)._default_manager.filter(pk=instance.pk).update(**changes)
+    setattr(instance, variants_attr, new_variants)
+    delete_stale_variants(field_file.storage, old_variants, new_variants)
+    return True
+
+
+def variant_srcset(field_file, variants, request=None):
+    """``{'webp': '<url> 320w, ...', 'jpeg': ...}`` for the current image, or None if not generated yet"""
+    if not field_file or not variants or variants.get('source') != field_file.name:
+        return None
+    srcset = {}
+    for key, *_rest in FORMATS:
+        entries = sorted(variants.get(key, {}).items(), key=lambda item: int(item[0]))
+        if not entries:
+            return None
+        urls = []
+        for width, name in entries:
+            url = field_file.storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls.append(f'{url} {width}w')
+        srcset[key] = ', '.join(urls)
+    return srcset
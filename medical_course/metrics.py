@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('medical_course.slow_requests')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram keyed by label values"""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, label_names):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in zip(label_names, labels))
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+
+
+class Counter:
+    """Monotonic Prometheus-style counter keyed by label values"""
+
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in zip(self.label_names, labels))
+                lines.append(f'{self.name}{{{label_text}}} {value}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestMetrics:
+    """Per-endpoint request histograms for this process.
+
+    Each worker process keeps its own numbers; Prometheus should scrape
+    every worker (or sum them) rather than expect a global view.
+    """
+    label_names = ('view', 'method')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram('http_request_duration_seconds', 'Request latency by view', LATENCY_BUCKETS)
+        self.queries = Histogram('http_request_db_queries', 'Database queries per request by view', QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram('http_request_db_seconds', 'Time spent in database queries per request by view', LATENCY_BUCKETS)
+        self.size = Histogram('http_response_size_bytes', 'Response body size by view', SIZE_BUCKETS)
+
+    def record(self, view, method, duration, query_count, db_seconds, size):
+        labels = (view, method)
+        with self._lock:
+            self.latency.observe(labels, duration)
+            self.queries.observe(labels, query_count)
+            self.db_time.observe(labels, db_seconds)
+            if size is not None:
+                self.size.observe(labels, size)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for histogram in (self.latency, self.queries, self.db_time, self.size):
+                lines.extend(histogram.render(self.label_names))
+        return lines
+
+
+request_metrics = RequestMetrics()
+_counters = []
+
+
+def counter(name, documentation, label_names):
+    """Create a Counter that is included in the /metrics output"""
+    metric = Counter(name, documentation, label_names)
+    _counters.append(metric)
+    return metric
+
+
+def render_metrics():
+    lines = request_metrics.render()
+    for metric in _counters:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` hook counting and timing the queries of one request"""
+
+    def __init__(self, keep_sql=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.keep_sql = keep_sql
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if self.keep_sql:
+                self.queries.append((elapsed, sql))
+
+
+class RequestMetricsMiddleware:
+    """Record latency, query count, DB time and response size per resolved URL name.
+
+    With ``SLOW_REQUEST_THRESHOLD_MS`` set, requests slower than that are
+    logged to ``medical_course.slow_requests`` with their slowest queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 0) / 1000
+        self.slow_top_queries = getattr(settings, 'SLOW_REQUEST_TOP_QUERIES', 5)
+
+    def __call__(self, request):
+        recorder = QueryRecorder(keep_sql=bool(self.slow_threshold))
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        size = None if response.streaming else len(response.content)
+        request_metrics.record(view, request.method, duration, recorder.count, recorder.seconds, size)
+
+        if self.slow_threshold and duration >= self.slow_threshold:
+            self.log_slow_request(request, view, duration, recorder)
+        return response
+
+    def log_slow_request(self, request, view, duration, recorder):
+        slowest = sorted(recorder.queries, key=lambda query: query[0], reverse=True)[:self.slow_top_queries]
+        logger.warning(
+            'Slow request %s %s (%s): %.0f ms, %d queries, %.0f ms in DB%s',
+            request.method,
+            request.get_full_path(),
+            view,
+            duration * 1000,
+            recorder.count,
+            recorder.seconds * 1000,
+            ''.join(f'\n  {elapsed * 1000:.1f} ms  {sql}' for elapsed, sql in slowest),
+        )
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',  # Required for django-allauth
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',  # Add CORS support
     'crispy_forms',
@@ -57,9 +58,12 @@ INSTALLED_APPS = [
     'courses',
     'payments',
     'tickets',
+    'analytics',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'medical_course.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware', 
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -108,6 +112,25 @@ DATABASES = {
     }
 }
 
+# Shared by every web worker and the job workers, so invalidating a cached entitlement set,
+# catalog version or referral code in one process reaches all of them. Redis when REDIS_URL
+# is set, otherwise a database table (create it with `manage.py createcachetable`)
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -302,12 +325,22 @@ CKEDITOR_5_CONFIGS = {
 
 # Rest Framework (moved to bottom of file)
 
-# Email settings (for development)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# Email settings
+# Outside DEBUG mail is queued as a background job and only sent while `manage.py run_workers`
+# is running; the workers deliver it with JOBS_EMAIL_BACKEND. In DEBUG it goes straight to the console
+EMAIL_BACKEND = config(
+    'EMAIL_BACKEND',
+    default='django.core.mail.backends.console.EmailBackend' if DEBUG else 'jobs.mail.QueuedEmailBackend'
+)
+JOBS_EMAIL_BACKEND = config('JOBS_EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
 
 # Payment settings
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY', default='')
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
+# Signing secret of the Stripe webhook endpoint (whsec_...); events with a bad signature get a 400
+STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default='')
+# Signed events older than this many seconds are rejected (replay protection)
+STRIPE_WEBHOOK_TOLERANCE = config('STRIPE_WEBHOOK_TOLERANCE', default=300, cast=int)
 
 # CORS settings for React frontend
 CORS_ALLOWED_ORIGINS = [
@@ -344,3 +377,102 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
     ],
 }
+
+# Cursor pagination for the public course catalog API
+CATALOG_PAGE_SIZE = config('CATALOG_PAGE_SIZE', default=24, cast=int)
+CATALOG_MAX_PAGE_SIZE = config('CATALOG_MAX_PAGE_SIZE', default=100, cast=int)
+
+# Seconds a user's owned course/section IDs stay cached (invalidated on enrollment changes)
+ENTITLEMENT_CACHE_TIMEOUT = config('ENTITLEMENT_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Video progress heartbeats are buffered per process and flushed in batches
+PROGRESS_BUFFER_SIZE = config('PROGRESS_BUFFER_SIZE', default=500, cast=int)
+PROGRESS_FLUSH_INTERVAL = config('PROGRESS_FLUSH_INTERVAL', default=10, cast=int)
+
+# Already stored days the rollup_metrics command recomputes to catch late payment and status changes
+METRICS_ROLLUP_LOOKBACK_DAYS = config('METRICS_ROLLUP_LOOKBACK_DAYS', default=1, cast=int)
+
+# Request metrics exposed at /api/health/metrics/ (Bearer token required; without one only served in DEBUG);
+# requests slower than the threshold are logged with their slowest queries (0 disables)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+SLOW_REQUEST_THRESHOLD_MS = config('SLOW_REQUEST_THRESHOLD_MS', default=0, cast=int)
+SLOW_REQUEST_TOP_QUERIES = config('SLOW_REQUEST_TOP_QUERIES', default=5, cast=int)
+
+# Anonymous catalog API responses are cached per URL and invalidated by a catalog version bump
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=600, cast=int)
+
+# Course videos and attachments are served through an access-checked view. Behind nginx the
+# transfer is handed off with X-Accel-Redirect to the internal location below; otherwise Django
+# streams the file itself in chunks of PROTECTED_MEDIA_CHUNK_SIZE bytes
+PROTECTED_MEDIA_X_ACCEL = config('PROTECTED_MEDIA_X_ACCEL', default=False, cast=bool)
+PROTECTED_MEDIA_INTERNAL_URL = config('PROTECTED_MEDIA_INTERNAL_URL', default='/protected-media/')
+PROTECTED_MEDIA_CHUNK_SIZE = config('PROTECTED_MEDIA_CHUNK_SIZE', default=512 * 1024, cast=int)
+PROTECTED_MEDIA_PREFIXES = ['course_videos/', 'course_attachments/']
+
+# Uploaded course videos are packaged into multi-bitrate HLS with a local ffmpeg by the job
+# workers (courses/hls.py); without auto processing, run the process_videos command instead
+HLS_AUTO_PROCESS = config('HLS_AUTO_PROCESS', default=True, cast=bool)
+HLS_SEGMENT_SECONDS = config('HLS_SEGMENT_SECONDS', default=6, cast=int)
+HLS_X264_PRESET = config('HLS_X264_PRESET', default='veryfast')
+HLS_FFMPEG_TIMEOUT = config('HLS_FFMPEG_TIMEOUT', default=4 * 3600, cast=int)
+FFMPEG_BINARY = config('FFMPEG_BINARY', default='ffmpeg')
+FFPROBE_BINARY = config('FFPROBE_BINARY', default='ffprobe')
+
+# Fixed-width WebP/JPEG derivatives written next to uploaded images (medical_course/images.py)
+THUMBNAIL_VARIANT_WIDTHS = [320, 640, 960]
+PROFILE_IMAGE_VARIANT_WIDTHS = [64, 128, 256]
+
+# PostgreSQL job queue (jobs app), processed by `manage.py run_workers`
+JOBS_BATCH_SIZE = config('JOBS_BATCH_SIZE', default=10, cast=int)
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=1.0, cast=float)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=5, cast=int)
+JOBS_RETRY_BASE_DELAY = config('JOBS_RETRY_BASE_DELAY', default=10, cast=int)
+JOBS_RETRY_MAX_DELAY = config('JOBS_RETRY_MAX_DELAY', default=3600, cast=int)
+# A running job whose worker hasn't finished it within this many seconds is requeued
+JOBS_LOCK_TIMEOUT = config('JOBS_LOCK_TIMEOUT', default=600, cast=int)
+JOBS_HOUSEKEEPING_INTERVAL = config('JOBS_HOUSEKEEPING_INTERVAL', default=30, cast=int)
+JOBS_KEEP_FINISHED_DAYS = config('JOBS_KEEP_FINISHED_DAYS', default=7, cast=int)
+# Job name -> seconds between runs
+JOBS_PERIODIC = {
+    'analytics.rollup_metrics': config('METRICS_ROLLUP_INTERVAL', default=3600, cast=int),
+    'tickets.prune_events': config('TICKET_EVENT_PRUNE_INTERVAL', default=3600, cast=int),
+}
+
+# Public referral endpoints resolve codes through the cache (unknown codes are cached for a shorter time);
+# landing-page hits are counted in memory and appended to ReferralHit in batches
+REFERRAL_CACHE_TIMEOUT = config('REFERRAL_CACHE_TIMEOUT', default=3600, cast=int)
+REFERRAL_NEGATIVE_CACHE_TIMEOUT = config('REFERRAL_NEGATIVE_CACHE_TIMEOUT', default=300, cast=int)
+REFERRAL_HIT_BUFFER_SIZE = config('REFERRAL_HIT_BUFFER_SIZE', default=1000, cast=int)
+REFERRAL_HIT_FLUSH_INTERVAL = config('REFERRAL_HIT_FLUSH_INTERVAL', default=10, cast=int)
+
+# Generated referral codes are a keyed permutation of a counter (payments/codes.py); single codes are
+# taken from a pool of pre-generated ones that a job refills once it drops below the low-water mark
+REFERRAL_CODE_KEY = config('REFERRAL_CODE_KEY', default=SECRET_KEY)
+REFERRAL_CODE_POOL_SIZE = config('REFERRAL_CODE_POOL_SIZE', default=500, cast=int)
+REFERRAL_CODE_POOL_LOW_WATER = config('REFERRAL_CODE_POOL_LOW_WATER', default=100, cast=int)
+REFERRAL_BULK_MAX_CODES = config('REFERRAL_BULK_MAX_CODES', default=10000, cast=int)
+
+# Live ticket updates (server-sent events, ASGI only): TicketEvent rows are announced with PostgreSQL
+# NOTIFY and fanned out by one LISTEN thread per process (tickets/events.py). Streams end after
+# TICKET_STREAM_MAX_DURATION seconds and the browser reconnects with Last-Event-ID
+TICKET_EVENT_RETENTION_HOURS = config('TICKET_EVENT_RETENTION_HOURS', default=48, cast=int)
+TICKET_STREAM_HEARTBEAT = config('TICKET_STREAM_HEARTBEAT', default=15, cast=int)
+TICKET_STREAM_MAX_DURATION = config('TICKET_STREAM_MAX_DURATION', default=300, cast=int)
+TICKET_STREAM_RETRY_MS = config('TICKET_STREAM_RETRY_MS', default=3000, cast=int)
+TICKET_STREAM_REPLAY_LIMIT = config('TICKET_STREAM_REPLAY_LIMIT', default=500, cast=int)
+TICKET_STREAM_QUEUE_SIZE = config('TICKET_STREAM_QUEUE_SIZE', default=1000, cast=int)
+TICKET_STREAM_POLL_INTERVAL = config('TICKET_STREAM_POLL_INTERVAL', default=5.0, cast=float)
+TICKET_STREAM_RECONNECT_DELAY = config('TICKET_STREAM_RECONNECT_DELAY', default=2.0, cast=float)
+
+# Support ticket SLA (tickets/sla.py): hours to the first public admin reply and to resolution per
+# priority; categories listed in the factors scale both. Run refresh_ticket_deadlines after changing them
+TICKET_SLA_HOURS = {
+    'urgent': (1, 8),
+    'high': (4, 24),
+    'medium': (8, 72),
+    'low': (24, 120),
+}
+TICKET_SLA_CATEGORY_FACTORS = {
+    'course_access': 0.5,
+    'billing': 0.75,
+}
@@ -17,7 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+import re
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -36,10 +36,15 @@ urlpatterns = [
 
 # Serve media files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    from django.urls import re_path
+    from courses.media import serve_public_media
+    # Protected course media is only reachable through the access-checked API views
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+                serve_public_media, {'document_root': settings.MEDIA_ROOT}),
+    ]
     # Serve static files from STATICFILES_DIRS in development
     from django.contrib.staticfiles.views import serve
-    from django.urls import re_path
     urlpatterns += [
         re_path(r'^static/(?P<path>.*)$', serve),
     ]
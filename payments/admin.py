@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Purchase, Enrollment, VideoProgress, Cart, CartItem, ReferralCode, ReferralUsage, MarketerCommission, MarketerRegistrationRequest
+from django.db.models import Prefetch
+from jobs.queue import enqueue
+from .models import Purchase, Enrollment, VideoProgress, Cart, CartItem, ReferralCode, ReferralUsage, MarketerCommission, MarketerBalance, MarketerRegistrationRequest, StripeEvent
+from .pricing import cart_items_queryset
 
 @admin.register(Purchase)
 class PurchaseAdmin(admin.ModelAdmin):
@@ -48,12 +51,17 @@ class CartAdmin(admin.ModelAdmin):
     ordering = ('-updated_at',)
     inlines = [CartItemInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'referral_code').prefetch_related(
+            Prefetch('items', queryset=cart_items_queryset(CartItem.objects.all()))
+        )
+    
     def get_total_items(self, obj):
-        return obj.get_total_items()
+        return obj.get_pricing().total_items
     get_total_items.short_description = 'تعداد آیتم‌ها'
     
     def get_total_amount(self, obj):
-        return f"{obj.get_total_amount():,} تومان"
+        return f"{obj.get_pricing().total:,} تومان"
     get_total_amount.short_description = 'مجموع قیمت'
 
 @admin.register(CartItem)
@@ -140,6 +148,23 @@ class MarketerCommissionAdmin(admin.ModelAdmin):
             obj.paid_at = timezone.now()
         super().save_model(request, obj, form, change)
 
+@admin.register(MarketerBalance)
+class MarketerBalanceAdmin(admin.ModelAdmin):
+    list_display = ('marketer', 'total_amount', 'pending_amount', 'paid_amount', 'cancelled_amount', 'commission_count', 'referral_codes_count', 'active_codes_count', 'updated_at')
+    search_fields = ('marketer__username', 'marketer__email')
+    ordering = ('-pending_amount',)
+    readonly_fields = ('marketer', 'total_amount', 'pending_amount', 'paid_amount', 'cancelled_amount', 'commission_count', 'referral_codes_count', 'active_codes_count', 'updated_at')
+    actions = ['rebuild']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def rebuild(self, request, queryset):
+        from .ledger import rebuild_balances
+        count = rebuild_balances(list(queryset.values_list('marketer_id', flat=True)))
+        self.message_user(request, f'{count} تراز از روی کمیسیون‌ها بازسازی شد.')
+    rebuild.short_description = 'بازسازی تراز از روی کمیسیون‌ها'
+
 @admin.register(MarketerRegistrationRequest)
 class MarketerRegistrationRequestAdmin(admin.ModelAdmin):
     list_display = ('full_name', 'user', 'email', 'phone_number', 'experience_level', 'status', 'created_at')
@@ -185,3 +210,22 @@ class MarketerRegistrationRequestAdmin(admin.ModelAdmin):
             req.reject(request.user, 'رد شده توسط ادمین')
         self.message_user(request, f'{queryset.count()} درخواست رد شد.')
     reject_requests.short_description = 'رد درخواست‌های انتخاب شده'
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'event_type', 'status', 'received_at', 'processed_at')
+    list_filter = ('status', 'event_type', 'received_at')
+    search_fields = ('event_id',)
+    readonly_fields = ('event_id', 'event_type', 'payload', 'status', 'received_at', 'processed_at')
+    actions = ['queue_processing']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def queue_processing(self, request, queryset):
+        event_ids = list(queryset.filter(status='received').values_list('event_id', flat=True))
+        for event_id in event_ids:
+            enqueue('payments.process_stripe_event', event_id=event_id)
+        self.message_user(request, f'{len(event_ids)} رویداد برای پردازش در صف قرار گرفت.')
+    queue_processing.short_description = 'پردازش دوباره رویدادهای پردازش نشده'
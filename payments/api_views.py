@@ -3,14 +3,20 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from .models import (
     Cart, CartItem, ReferralCode, MarketerRegistrationRequest,
-    MarketerCommission, Purchase, ReferralUsage
+    MarketerCommission, Purchase, ReferralHit
 )
 from courses.models import Course, Section
+from .checkout import CheckoutError, checkout_cart
+from .codes import create_codes
+from .ledger import balance_for
+from .pagination import CommissionCursorPagination
+from .referrals import record_hit, resolve_code
 from .serializers import (
-    CartSerializer, ReferralCodeSerializer, MarketerRequestSerializer,
+    CartSerializer, ReferralCodeSerializer, BulkReferralCodeSerializer, MarketerRequestSerializer,
     MarketerCommissionSerializer, PurchaseSerializer
 )
 
@@ -118,26 +124,25 @@ class ValidateReferralCodeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            referral_code = ReferralCode.objects.get(code=code, is_active=True)
-            
-            if referral_code.is_available():
-                return Response({
-                    'valid': True,
-                    'discount_type': 'percentage',
-                    'value': float(referral_code.discount_percentage),
-                    'reason': 'Valid referral code'
-                })
-            else:
-                return Response({
-                    'valid': False,
-                    'reason': 'Referral code is no longer available'
-                })
-        except ReferralCode.DoesNotExist:
+        referral_code = resolve_code(code)
+        if referral_code is None:
             return Response({
                 'valid': False,
                 'reason': 'Invalid referral code'
             })
+        
+        if referral_code.is_available:
+            return Response({
+                'valid': True,
+                'discount_type': 'percentage',
+                'value': float(referral_code.discount_percentage),
+                'reason': 'Valid referral code'
+            })
+        else:
+            return Response({
+                'valid': False,
+                'reason': 'Referral code is no longer available'
+            })
 
 
 class ApplyReferralCodeView(APIView):
@@ -193,33 +198,33 @@ class TrackReferralView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            referral_code = ReferralCode.objects.get(code=code, is_active=True)
-            
-            if referral_code.is_available():
-                # Set referral cookie (in production, this should be signed)
-                response = Response({
-                    'valid': True,
-                    'message': 'Referral code tracked'
-                })
-                response.set_cookie(
-                    'referral_code', 
-                    code, 
-                    max_age=30*24*60*60,  # 30 days
-                    httponly=False,
-                    samesite='Lax'
-                )
-                return response
-            else:
-                return Response({
-                    'valid': False,
-                    'message': 'Referral code is no longer available'
-                })
-        except ReferralCode.DoesNotExist:
+        referral_code = resolve_code(code)
+        if referral_code is None:
             return Response({
                 'valid': False,
                 'message': 'Invalid referral code'
             })
+        
+        if referral_code.is_available:
+            record_hit(referral_code)
+            # Set referral cookie (in production, this should be signed)
+            response = Response({
+                'valid': True,
+                'message': 'Referral code tracked'
+            })
+            response.set_cookie(
+                'referral_code', 
+                referral_code.code, 
+                max_age=30*24*60*60,  # 30 days
+                httponly=False,
+                samesite='Lax'
+            )
+            return response
+        else:
+            return Response({
+                'valid': False,
+                'message': 'Referral code is no longer available'
+            })
 
 
 class MarketerRequestView(APIView):
@@ -272,7 +277,15 @@ class MarketerCodesView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        codes = ReferralCode.objects.filter(marketer=request.user)
+        codes = ReferralCode.objects.filter(marketer=request.user).select_related('marketer').annotate(
+            click_count=Coalesce(
+                Subquery(
+                    ReferralHit.objects.filter(referral_code=OuterRef('pk'))
+                    .order_by().values('referral_code').annotate(total=Sum('hits')).values('total')
+                ),
+                0
+            )
+        )
         serializer = ReferralCodeSerializer(codes, many=True)
         return Response(serializer.data)
     
@@ -303,6 +316,38 @@ class MarketerCodesView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class MarketerBulkCodesView(APIView):
+    """Create many referral codes for the current marketer in one insert"""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        if not request.user.is_staff_member:
+            return Response(
+                {'error': 'Access denied. Marketer privileges required.'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = BulkReferralCodeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        from .models import ReferralCodeSettings
+        settings = ReferralCodeSettings.get_settings()
+        data = serializer.validated_data
+        codes = create_codes(
+            request.user,
+            data['count'],
+            discount_percentage=data.get('discount_percentage', settings.default_discount_percentage),
+            commission_percentage=data.get('commission_percentage', settings.default_commission_percentage),
+            max_uses=data.get('max_uses'),
+            is_active=data['is_active'],
+        )
+        return Response({
+            'created': len(codes),
+            'codes': [referral_code.code for referral_code in codes]
+        }, status=status.HTTP_201_CREATED)
+
+
 class MarketerCodeDetailView(APIView):
     """Update and delete individual referral codes for marketers"""
     permission_classes = [IsAuthenticated]
@@ -362,21 +407,27 @@ class MarketerCommissionsView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        commissions = MarketerCommission.objects.filter(marketer=request.user)
+        commissions = MarketerCommission.objects.filter(marketer=request.user).select_related(
+            'referral_usage__referral_code', 'referral_usage__customer', 'referral_usage__purchase'
+        )
+        paginator = CommissionCursorPagination()
+        page = paginator.paginate_queryset(commissions, request, view=self)
         
-        # Calculate totals
-        total_commissions = sum(c.amount for c in commissions)
-        pending_commissions = sum(c.amount for c in commissions.filter(status='pending'))
-        paid_commissions = sum(c.amount for c in commissions.filter(status='paid'))
+        # Totals come from the running balance instead of summing every row
+        balance = balance_for(request.user)
         
-        serializer = MarketerCommissionSerializer(commissions, many=True)
+        serializer = MarketerCommissionSerializer(page, many=True)
         return Response({
             'commissions': serializer.data,
             'totals': {
-                'total': float(total_commissions),
-                'pending': float(pending_commissions),
-                'paid': float(paid_commissions)
-            }
+                'total': float(balance.total_amount),
+                'pending': float(balance.pending_amount),
+                'paid': float(balance.paid_amount),
+                'cancelled': float(balance.cancelled_amount),
+                'count': balance.commission_count
+            },
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link()
         })
 
 
@@ -385,78 +436,32 @@ class CheckoutView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        cart = get_object_or_404(Cart, user=request.user)
+        cart = get_object_or_404(Cart.objects.select_related('referral_code'), user=request.user)
         
-        if not cart.items.exists():
+        if not cart.get_pricing().lines:
             return Response(
                 {'error': 'Cart is empty'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         try:
-            with transaction.atomic():
-                purchases = []
-                
-                for item in cart.items.all():
-                    if item.course:
-                        purchase = Purchase.objects.create(
-                            user=request.user,
-                            purchase_type='course',
-                            course=item.course,
-                            amount=item.course.get_effective_price(),
-                            payment_status='completed'  # For now, auto-complete
-                        )
-                    else:
-                        purchase = Purchase.objects.create(
-                            user=request.user,
-                            purchase_type='section',
-                            section=item.section,
-                            amount=item.section.price or 0,
-                            payment_status='completed'  # For now, auto-complete
-                        )
-                    
-                    # Apply referral discount if present
-                    if cart.referral_code:
-                        purchase.apply_referral_discount(cart.referral_code)
-                        purchase.save()
-                        
-                        # Create referral usage and commission
-                        referral_usage = ReferralUsage.objects.create(
-                            referral_code=cart.referral_code,
-                            customer=request.user,
-                            purchase=purchase,
-                            discount_amount=purchase.discount_amount,
-                            commission_amount=purchase.amount * (cart.referral_code.commission_percentage / 100)
-                        )
-                        
-                        # Create marketer commission
-                        MarketerCommission.objects.create(
-                            marketer=cart.referral_code.marketer,
-                            referral_usage=referral_usage,
-                            amount=referral_usage.commission_amount
-                        )
-                        
-                        # Increment referral code usage
-                        cart.referral_code.increment_usage()
-                    
-                    purchases.append(purchase)
-                
-                # Clear cart
-                cart.items.all().delete()
-                cart.referral_code = None
-                cart.save()
-                
-                serializer = PurchaseSerializer(purchases, many=True)
-                return Response({
-                    'message': 'Purchase completed successfully',
-                    'purchases': serializer.data
-                })
-                
+            purchases = checkout_cart(cart)  # For now, auto-complete
+        except CheckoutError as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_409_CONFLICT
+            )
         except Exception as e:
             return Response(
                 {'error': f'Checkout failed: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        
+        serializer = PurchaseSerializer(purchases, many=True)
+        return Response({
+            'message': 'Purchase completed successfully',
+            'purchases': serializer.data
+        })
 
 
 class UserPurchasesView(APIView):
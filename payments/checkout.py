@@ -0,0 +1,167 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from jobs.queue import enqueue
+from .entitlements import invalidate_entitlements
+from .ledger import commissions_created
+from .models import Enrollment, MarketerCommission, Purchase, ReferralCode, ReferralUsage
+from .pricing import CENT, price_cart
+from .referrals import usage_changed
+
+
+class CheckoutError(Exception):
+    """Raised when a cart can't be checked out as priced"""
+
+
+def claim_referral_uses(referral_code, uses):
+    """Atomically add ``uses`` to the code's counter unless that would pass ``max_uses``.
+
+    A single guarded UPDATE, so concurrent checkouts can neither lose
+    increments nor overshoot the limit. Returns False if the code is no
+    longer available.
+    """
+    within_limit = Q(max_uses__isnull=True) | Q(max_uses=0) | Q(max_uses__gte=F('current_uses') + uses)
+    claimed = ReferralCode.objects.filter(
+        within_limit, pk=referral_code.pk, is_active=True
+    ).update(current_uses=F('current_uses') + uses) == 1
+    if claimed:
+        usage_changed(referral_code)
+    return claimed
+
+
+def checkout_cart(cart, payment_status='completed', transaction_id=None):
+    """Turn the cart into purchases in a fixed number of statements.
+
+    Purchases, referral usages, marketer commissions and (for completed
+    payments) enrollments are written with ``bulk_create``; the referral
+    counter is bumped once for the whole cart. The cart is emptied on success.
+    """
+    pricing = price_cart(cart)
+    if not pricing.lines:
+        raise CheckoutError('Cart is empty')
+
+    referral_code = pricing.referral_code
+
+    with transaction.atomic():
+        if referral_code and not claim_referral_uses(referral_code, len(pricing.lines)):
+            raise CheckoutError('Referral code is no longer available')
+
+        purchases = Purchase.objects.bulk_create([
+            Purchase(
+                user_id=cart.user_id,
+                purchase_type='course' if line.item.course else 'section',
+                course=line.item.course,
+                section=line.item.section,
+                amount=line.total,
+                original_amount=line.price,
+                discount_amount=line.discount,
+                referral_code=referral_code,
+                transaction_id=transaction_id,
+                payment_status=payment_status,
+            )
+            for line in pricing.lines
+        ])
+
+        if referral_code:
+            usages = ReferralUsage.objects.bulk_create([
+                ReferralUsage(
+                    referral_code=referral_code,
+                    customer_id=cart.user_id,
+                    purchase=purchase,
+                    discount_amount=purchase.discount_amount,
+                    commission_amount=(purchase.amount * referral_code.commission_percentage / 100).quantize(CENT),
+                )
+                for purchase in purchases
+            ])
+            commissions = MarketerCommission.objects.bulk_create([
+                MarketerCommission(
+                    marketer_id=referral_code.marketer_id,
+                    referral_usage=usage,
+                    amount=usage.commission_amount,
+                )
+                for usage in usages
+            ])
+            commissions_created(commissions)
+
+        if payment_status == 'completed':
+            Enrollment.objects.bulk_create([
+                Enrollment(user_id=cart.user_id, course=purchase.course, section=purchase.section, purchase=purchase)
+                for purchase in purchases
+            ], ignore_conflicts=True)
+            # bulk_create skips post_save, so drop cached entitlements here
+            invalidate_entitlements(cart.user_id)
+
+        cart.items.all().delete()
+        cart.referral_code = None
+        cart.save()
+
+    return purchases
+
+
+def complete_payment(transaction_id):
+    """Fulfil the pending purchases of a paid Stripe payment intent.
+
+    Marks them completed and creates their referral usages, marketer
+    commissions and enrollments. Purchases that are already completed are
+    skipped, so running it twice (success redirect and webhook) is harmless.
+    """
+    with transaction.atomic():
+        purchases = list(
+            Purchase.objects.select_for_update(of=('self',))
+            .select_related('referral_code')
+            .filter(transaction_id=transaction_id)
+            .exclude(payment_status='completed')
+        )
+        if not purchases:
+            return []
+
+        Purchase.objects.filter(pk__in=[purchase.pk for purchase in purchases]).update(
+            payment_status='completed', updated_at=timezone.now()
+        )
+        for purchase in purchases:
+            purchase.payment_status = 'completed'
+
+        referred = [purchase for purchase in purchases if purchase.referral_code_id]
+        if referred:
+            usages = ReferralUsage.objects.bulk_create([
+                ReferralUsage(
+                    referral_code=purchase.referral_code,
+                    customer_id=purchase.user_id,
+                    purchase=purchase,
+                    discount_amount=purchase.discount_amount,
+                    commission_amount=(
+                        purchase.original_amount * purchase.referral_code.commission_percentage / 100
+                    ).quantize(CENT),
+                )
+                for purchase in referred
+            ])
+            commissions = MarketerCommission.objects.bulk_create([
+                MarketerCommission(
+                    marketer_id=usage.referral_code.marketer_id,
+                    referral_usage=usage,
+                    amount=usage.commission_amount,
+                )
+                for usage in usages
+            ])
+            commissions_created(commissions)
+            uses = Counter(purchase.referral_code for purchase in referred)
+            for referral_code, count in uses.items():
+                # Already paid for, so the usage counts even past max_uses
+                ReferralCode.objects.filter(pk=referral_code.pk).update(current_uses=F('current_uses') + count)
+                usage_changed(referral_code)
+
+        Enrollment.objects.bulk_create([
+            Enrollment(user_id=purchase.user_id, course=purchase.course, section=purchase.section, purchase=purchase)
+            for purchase in purchases
+        ], ignore_conflicts=True)
+        for user_id in {purchase.user_id for purchase in purchases}:
+            invalidate_entitlements(user_id)
+
+        # Revenue counts on the purchase's day; days already rolled up are stored again
+        today = timezone.localdate()
+        for day in {timezone.localdate(purchase.created_at) for purchase in purchases}:
+            if day < today:
+                enqueue('analytics.rollup_day', day=day.isoformat())
+
+    return purchases
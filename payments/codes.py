@@ -0,0 +1,118 @@
+import hashlib
+import string
+from django.conf import settings
+from django.db import transaction
+from jobs.queue import enqueue
+from .ledger import refresh_code_counts
+from .models import ReferralCode, ReferralCodeCounter, ReservedReferralCode
+from .referrals import invalidate_referral_codes
+
+ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 8
+# Every 8-character code; counter values map onto this range one-to-one
+CODE_SPACE = len(ALPHABET) ** CODE_LENGTH
+# Feistel network over the smallest even bit width covering CODE_SPACE (36^8 < 2^42)
+HALF_BITS = 21
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+POOL_JOB_KEY = 'referral-code-pool'
+
+
+def _key():
+    return hashlib.blake2b(settings.REFERRAL_CODE_KEY.encode(), digest_size=32).digest()
+
+
+def permute(value, key):
+    """Keyed bijection on [0, CODE_SPACE); values pushed outside the range are walked back into it"""
+    while True:
+        left, right = value >> HALF_BITS, value & HALF_MASK
+        for round_number in range(ROUNDS):
+            digest = hashlib.blake2b(bytes([round_number]) + right.to_bytes(3, 'big'), key=key, digest_size=4).digest()
+            left, right = right, left ^ (int.from_bytes(digest, 'big') & HALF_MASK)
+        value = (left << HALF_BITS) | right
+        if value < CODE_SPACE:
+            return value
+
+
+def encode(value):
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, index = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[index])
+    return ''.join(reversed(chars))
+
+
+def allocate(count):
+    """Reserve ``count`` consecutive counter values"""
+    with transaction.atomic():
+        counter, _ = ReferralCodeCounter.objects.select_for_update().get_or_create(pk=1)
+        start = counter.next_value
+        if start + count > CODE_SPACE:
+            raise ValueError('Referral code space exhausted')
+        counter.next_value = start + count
+        counter.save(update_fields=['next_value'])
+    return range(start, start + count)
+
+
+def generate_codes(count):
+    """``count`` distinct codes that no ReferralCode uses.
+
+    Codes come from a keyed permutation of a shared counter, so they never
+    collide with each other; the single lookup only weeds out hand-picked
+    codes and ones created before the counter existed.
+    """
+    key = _key()
+    codes = []
+    while len(codes) < count:
+        candidates = [encode(permute(value, key)) for value in allocate(count - len(codes))]
+        taken = set(ReferralCode.objects.filter(code__in=candidates).values_list('code', flat=True))
+        codes.extend(code for code in candidates if code not in taken)
+    return codes
+
+
+def create_codes(marketer, count, **fields):
+    """Create ``count`` referral codes for ``marketer`` with one bulk insert"""
+    codes = generate_codes(count)
+    created = ReferralCode.objects.bulk_create(
+        [ReferralCode(marketer=marketer, code=code, **fields) for code in codes],
+        batch_size=1000,
+    )
+    # bulk_create skips post_save; drop cached "unknown code" entries for the new codes
+    invalidate_referral_codes(codes)
+    refresh_code_counts([marketer.id])
+    return created
+
+
+def take_code():
+    """A free code for one new ReferralCode, popped from the reserved pool.
+
+    Falls back to generating one while the pool is empty, and queues a refill
+    once the pool runs low.
+    """
+    with transaction.atomic():
+        reserved = ReservedReferralCode.objects.select_for_update(skip_locked=True).order_by('pk').first()
+        if reserved is not None:
+            code = reserved.code
+            reserved.delete()
+    if reserved is None:
+        code = generate_codes(1)[0]
+    if reserved is None or ReservedReferralCode.objects.count() < settings.REFERRAL_CODE_POOL_LOW_WATER:
+        enqueue('payments.replenish_code_pool', unique_key=POOL_JOB_KEY)
+    return code
+
+
+def release_code(code):
+    """Take a hand-picked code out of the pool so it is never handed out again"""
+    ReservedReferralCode.objects.filter(code=code).delete()
+
+
+def replenish_pool():
+    """Top the reserved pool up to REFERRAL_CODE_POOL_SIZE; returns the number of codes added"""
+    missing = settings.REFERRAL_CODE_POOL_SIZE - ReservedReferralCode.objects.count()
+    if missing <= 0:
+        return 0
+    ReservedReferralCode.objects.bulk_create(
+        [ReservedReferralCode(code=code) for code in generate_codes(missing)],
+        ignore_conflicts=True,
+    )
+    return missing
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import Enrollment
+
+CACHE_KEY = 'entitlements:{user_id}'
+
+
+class Entitlements:
+    """The course and section IDs a user owns"""
+    __slots__ = ('course_ids', 'section_ids')
+    
+    def __init__(self, course_ids=(), section_ids=()):
+        self.course_ids = frozenset(course_ids)
+        self.section_ids = frozenset(section_ids)
+    
+    def owns_course(self, course_id):
+        return course_id in self.course_ids
+    
+    def owns_section(self, section_id, course_id):
+        return section_id in self.section_ids or course_id in self.course_ids
+
+
+def _cache_key(user_id):
+    return CACHE_KEY.format(user_id=user_id)
+
+
+def get_entitlements(user):
+    """Load the user's entitlements once per request and once per cache lifetime"""
+    cached = getattr(user, '_entitlements', None)
+    if cached is not None:
+        return cached
+    
+    key = _cache_key(user.pk)
+    data = cache.get(key)
+    if data is None:
+        course_ids, section_ids = [], []
+        for course_id, section_id in Enrollment.objects.filter(user_id=user.pk).values_list('course_id', 'section_id'):
+            if course_id:
+                course_ids.append(course_id)
+            if section_id:
+                section_ids.append(section_id)
+        data = (sorted(course_ids), sorted(section_ids))
+        cache.set(key, data, getattr(settings, 'ENTITLEMENT_CACHE_TIMEOUT', 3600))
+    
+    entitlements = Entitlements(*data)
+    user._entitlements = entitlements
+    return entitlements
+
+
+def invalidate_entitlements(user_id):
+    """Drop the cached set now and again after commit so readers never keep a stale copy"""
+    key = _cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def can_access(user, obj):
+    """Single access check for a Course, Section or Video"""
+    from courses.models import Course, Section, Video
+    
+    if isinstance(obj, Video) and obj.is_preview:
+        return True
+    if not user or not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    
+    entitlements = get_entitlements(user)
+    if isinstance(obj, Course):
+        return entitlements.owns_course(obj.pk)
+    if isinstance(obj, Section):
+        return entitlements.owns_section(obj.pk, obj.course_id)
+    if isinstance(obj, Video):
+        return entitlements.owns_section(obj.section_id, obj.section.course_id)
+    raise TypeError(f'Cannot check access to {type(obj).__name__}')
@@ -0,0 +1,19 @@
+from jobs.queue import job
+from .checkout import complete_payment
+from .codes import replenish_pool
+from .webhooks import process_event
+
+
+@job('payments.complete_payment')
+def complete_payment_job(transaction_id):
+    complete_payment(transaction_id)
+
+
+@job('payments.process_stripe_event')
+def process_stripe_event_job(event_id):
+    process_event(event_id)
+
+
+@job('payments.replenish_code_pool')
+def replenish_code_pool_job():
+    replenish_pool()
@@ -0,0 +1,233 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import MarketerBalance, MarketerCommission, ReferralCode
+
+# Commission status -> MarketerBalance amount column
+STATUS_FIELDS = {
+    'pending': 'pending_amount',
+    'paid': 'paid_amount',
+    'cancelled': 'cancelled_amount',
+}
+AMOUNT_FIELDS = ['total_amount', *STATUS_FIELDS.values()]
+COUNT_FIELDS = ['commission_count', 'referral_codes_count', 'active_codes_count']
+BALANCE_FIELDS = AMOUNT_FIELDS + COUNT_FIELDS
+
+
+def _add(deltas, marketer_id, status, amount, sign):
+    delta = deltas[marketer_id]
+    delta['total_amount'] += sign * amount
+    delta[STATUS_FIELDS[status]] += sign * amount
+    delta['commission_count'] += sign
+
+
+def apply_deltas(deltas, create=True):
+    """Add ``{marketer_id: {field: delta}}`` to the balance rows.
+
+    With ``create`` all marketers are upserted in one statement; rows are
+    written in marketer order so concurrent checkouts can't deadlock. Without
+    it missing rows are left alone (used on deletes, where the marketer itself
+    may be going away).
+    """
+    deltas = {
+        marketer_id: {field: value for field, value in changes.items() if value}
+        for marketer_id, changes in deltas.items()
+    }
+    deltas = {marketer_id: changes for marketer_id, changes in deltas.items() if changes}
+    if not deltas:
+        return
+    now = timezone.now()
+    if not create:
+        for marketer_id in sorted(deltas):
+            MarketerBalance.objects.filter(pk=marketer_id).update(
+                updated_at=now,
+                **{field: F(field) + value for field, value in deltas[marketer_id].items()},
+            )
+        return
+
+    # INSERT ... ON CONFLICT DO UPDATE SET x = x + EXCLUDED.x; bulk_create can only overwrite
+    table = connection.ops.quote_name(MarketerBalance._meta.db_table)
+    columns = [connection.ops.quote_name(field) for field in BALANCE_FIELDS]
+    rows, params = [], []
+    for marketer_id in sorted(deltas):
+        rows.append('(' + ', '.join(['%s'] * (len(BALANCE_FIELDS) + 2)) + ')')
+        params.extend([marketer_id, *(deltas[marketer_id].get(field, 0) for field in BALANCE_FIELDS), now])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ("marketer_id", {", ".join(columns)}, "updated_at") '
+            f'VALUES {", ".join(rows)} '
+            f'ON CONFLICT ("marketer_id") DO UPDATE SET '
+            + ', '.join(f'{column} = {table}.{column} + EXCLUDED.{column}' for column in columns)
+            + ', "updated_at" = EXCLUDED."updated_at"',
+            params,
+        )
+
+
+def balance_for(marketer):
+    """The marketer's balance row, or an unsaved all-zero one if nothing has been recorded yet"""
+    return getattr(marketer, 'commission_balance', None) or MarketerBalance(marketer=marketer)
+
+
+def annotate_balances(marketers):
+    """Annotate a User queryset with the serializer-facing balance columns in the same query (0 without a row)"""
+    return marketers.annotate(
+        referral_codes_count=Coalesce('commission_balance__referral_codes_count', 0),
+        active_codes_count=Coalesce('commission_balance__active_codes_count', 0),
+        total_commissions=Coalesce('commission_balance__total_amount', Value(Decimal('0'))),
+        pending_commissions=Coalesce('commission_balance__pending_amount', Value(Decimal('0'))),
+    )
+
+
+def commissions_created(commissions):
+    """Call after bulk-creating commissions, inside the same transaction"""
+    deltas = defaultdict(lambda: defaultdict(int))
+    for commission in commissions:
+        _add(deltas, commission.marketer_id, commission.status, commission.amount, 1)
+    apply_deltas(deltas)
+
+
+def commission_saved(previous, commission):
+    """Move a saved commission between columns; ``previous`` is its (marketer_id, status, amount) before the save"""
+    deltas = defaultdict(lambda: defaultdict(int))
+    if previous is not None:
+        if previous[0] != commission.marketer_id:
+            # Moved to another marketer: the old one already has a row
+            removed = defaultdict(lambda: defaultdict(int))
+            _add(removed, *previous, -1)
+            apply_deltas(removed, create=False)
+        else:
+            _add(deltas, *previous, -1)
+    _add(deltas, commission.marketer_id, commission.status, commission.amount, 1)
+    apply_deltas(deltas)
+
+
+def commission_deleted(commission):
+    deltas = defaultdict(lambda: defaultdict(int))
+    _add(deltas, commission.marketer_id, commission.status, commission.amount, -1)
+    apply_deltas(deltas, create=False)
+
+
+def count_codes(marketer_ids=None):
+    """``{marketer_id: (codes, active codes)}`` from the ReferralCode rows"""
+    codes = ReferralCode.objects.all()
+    if marketer_ids is not None:
+        codes = codes.filter(marketer_id__in=marketer_ids)
+    rows = codes.order_by().values('marketer_id').annotate(
+        total=Count('id'), active=Count('id', filter=Q(is_active=True))
+    )
+    return {row['marketer_id']: (row['total'], row['active']) for row in rows}
+
+
+def refresh_code_counts(marketer_ids, create=True):
+    """Recount the referral codes of these marketers"""
+    marketer_ids = sorted(set(marketer_ids))
+    counts = count_codes(marketer_ids)
+    now = timezone.now()
+    if create:
+        MarketerBalance.objects.bulk_create(
+            [
+                MarketerBalance(
+                    marketer_id=marketer_id,
+                    referral_codes_count=counts.get(marketer_id, (0, 0))[0],
+                    active_codes_count=counts.get(marketer_id, (0, 0))[1],
+                    updated_at=now,
+                )
+                for marketer_id in marketer_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['marketer'],
+            update_fields=['referral_codes_count', 'active_codes_count', 'updated_at'],
+        )
+        return
+    for marketer_id in marketer_ids:
+        total, active = counts.get(marketer_id, (0, 0))
+        MarketerBalance.objects.filter(pk=marketer_id).update(
+            referral_codes_count=total, active_codes_count=active, updated_at=now
+        )
+
+
+def compute_balances(marketer_ids=None):
+    """Balances recomputed from the raw commission and code rows, keyed by marketer"""
+    commissions = MarketerCommission.objects.all()
+    if marketer_ids is not None:
+        commissions = commissions.filter(marketer_id__in=marketer_ids)
+    rows = commissions.order_by().values('marketer_id').annotate(
+        total_amount=Sum('amount'),
+        commission_count=Count('id'),
+        **{field: Sum('amount', filter=Q(status=status)) for status, field in STATUS_FIELDS.items()},
+    )
+    balances = defaultdict(lambda: dict.fromkeys(BALANCE_FIELDS, 0))
+    for row in rows:
+        marketer_id = row.pop('marketer_id')
+        balances[marketer_id].update({field: value or 0 for field, value in row.items()})
+    for marketer_id, (total, active) in count_codes(marketer_ids).items():
+        balances[marketer_id].update(referral_codes_count=total, active_codes_count=active)
+    return dict(balances)
+
+
+def stored_balances(marketer_ids=None):
+    balances = MarketerBalance.objects.all()
+    if marketer_ids is not None:
+        balances = balances.filter(marketer_id__in=marketer_ids)
+    return {row.pop('marketer_id'): row for row in balances.values('marketer_id', *BALANCE_FIELDS)}
+
+
+def find_mismatches(marketer_ids=None):
+    """``[(marketer_id, stored, expected)]`` for balances that disagree with the raw rows"""
+    expected = compute_balances(marketer_ids)
+    stored = stored_balances(marketer_ids)
+    zero = dict.fromkeys(BALANCE_FIELDS, 0)
+    mismatches = []
+    for marketer_id in sorted(expected.keys() | stored.keys()):
+        want = expected.get(marketer_id, zero)
+        have = stored.get(marketer_id, zero)
+        if any(want[field] != have[field] for field in BALANCE_FIELDS):
+            mismatches.append((marketer_id, have, want))
+    return mismatches
+
+
+def _ledger_marketers(marketer_ids=None):
+    """Marketers with a balance row, a commission or a referral code"""
+    sources = [MarketerBalance.objects.all(), MarketerCommission.objects.all(), ReferralCode.objects.all()]
+    found = set()
+    for rows in sources:
+        if marketer_ids is not None:
+            rows = rows.filter(marketer_id__in=marketer_ids)
+        found.update(rows.order_by().values_list('marketer_id', flat=True).distinct())
+    return sorted(found)
+
+
+def rebuild_balances(marketer_ids=None):
+    """Overwrite balance rows with values recomputed from the raw rows; returns the number written.
+
+    The rows are created if missing and locked before anything is counted,
+    so a checkout or status change running meanwhile waits and then applies
+    its delta on top of the rebuilt values instead of being overwritten.
+    """
+    with transaction.atomic():
+        marketer_ids = _ledger_marketers(marketer_ids)
+        MarketerBalance.objects.bulk_create(
+            [MarketerBalance(marketer_id=marketer_id) for marketer_id in marketer_ids],
+            ignore_conflicts=True,
+            batch_size=500,
+        )
+        list(MarketerBalance.objects.select_for_update().filter(pk__in=marketer_ids).order_by('pk').values_list('pk'))
+
+        expected = compute_balances(marketer_ids)
+        zero = dict.fromkeys(BALANCE_FIELDS, 0)
+        now = timezone.now()
+        rows = [
+            MarketerBalance(marketer_id=marketer_id, updated_at=now, **expected.get(marketer_id, zero))
+            for marketer_id in marketer_ids
+        ]
+        MarketerBalance.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['marketer'],
+            update_fields=BALANCE_FIELDS + ['updated_at'],
+            batch_size=500,
+        )
+    return len(rows)
@@ -0,0 +1,59 @@
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from accounts.models import User
+from payments.codes import create_codes, replenish_pool
+from payments.models import ReferralCodeSettings
+
+
+class Command(BaseCommand):
+    help = 'Create referral codes in bulk for a marketer, or refill the reserved code pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('marketer', nargs='?', help='Username of the marketer (staff user)')
+        parser.add_argument('count', nargs='?', type=int, help='Number of codes to create')
+        parser.add_argument('--discount', type=Decimal, help='Discount percentage (defaults to the referral settings)')
+        parser.add_argument('--commission', type=Decimal, help='Commission percentage (defaults to the referral settings)')
+        parser.add_argument('--max-uses', type=int, help='Uses allowed per code (unlimited if omitted)')
+        parser.add_argument('--inactive', action='store_true', help='Create the codes deactivated')
+        parser.add_argument('--output', help='Write the new codes to this file, one per line')
+        parser.add_argument('--fill-pool', action='store_true', help='Top up the reserved pool used for single codes')
+
+    def handle(self, *args, **options):
+        if options['fill_pool']:
+            self.stdout.write(f'Reserved pool: {replenish_pool()} codes added')
+            if not options['marketer']:
+                return
+        if not options['marketer'] or not options['count']:
+            raise CommandError('Give a marketer username and a code count (or --fill-pool)')
+        if options['count'] < 1:
+            raise CommandError('count must be positive')
+
+        try:
+            marketer = User.objects.get(username=options['marketer'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["marketer"]!r}')
+        if not marketer.is_staff_member:
+            raise CommandError(f'{marketer.username} is not a marketer')
+
+        defaults = ReferralCodeSettings.get_settings()
+        started = time.perf_counter()
+        with transaction.atomic():
+            codes = create_codes(
+                marketer,
+                options['count'],
+                discount_percentage=options['discount'] or defaults.default_discount_percentage,
+                commission_percentage=options['commission'] or defaults.default_commission_percentage,
+                max_uses=options['max_uses'],
+                is_active=not options['inactive'],
+            )
+        elapsed = time.perf_counter() - started
+
+        lines = '\n'.join(referral_code.code for referral_code in codes)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(lines + '\n')
+        else:
+            self.stdout.write(lines)
+        self.stderr.write(self.style.SUCCESS(f'{len(codes)} codes created for {marketer.username} in {elapsed:.2f}s'))
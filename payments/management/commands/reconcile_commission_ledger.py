@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from payments.ledger import find_mismatches, rebuild_balances
+
+
+class Command(BaseCommand):
+    help = 'Check marketer balances against the raw commission and referral code rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('marketer_ids', nargs='*', type=int, help='Only check these marketers')
+        parser.add_argument('--fix', action='store_true', help='Rewrite mismatched balances from the raw rows')
+
+    def handle(self, *args, **options):
+        marketer_ids = options['marketer_ids'] or None
+        with transaction.atomic():
+            mismatches = find_mismatches(marketer_ids)
+            for marketer_id, stored, expected in mismatches:
+                differences = ', '.join(
+                    f'{field}: {stored[field]} != {expected[field]}'
+                    for field in expected if stored[field] != expected[field]
+                )
+                self.stdout.write(f'marketer {marketer_id}: {differences}')
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS('Ledger matches the commission rows'))
+                return
+            if options['fix']:
+                rebuild_balances([marketer_id for marketer_id, *_rest in mismatches])
+                self.stdout.write(self.style.SUCCESS(f'{len(mismatches)} balances rebuilt'))
+            else:
+                self.stdout.write(self.style.WARNING(f'{len(mismatches)} balances differ; run with --fix to rebuild them'))
@@ -0,0 +1,96 @@
+import hashlib
+import hmac
+import json
+import secrets
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from courses.management.commands.benchmark_api import percentile
+from jobs.worker import Worker
+from payments.models import StripeEvent
+
+
+def load_events(paths):
+    """Events from JSON files (one event or a list each); directories are searched for *.json"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.rglob('*.json')))
+        elif path.exists():
+            files.append(path)
+        else:
+            raise CommandError(f'{path} does not exist')
+    events = []
+    for file in files:
+        data = json.loads(file.read_text())
+        events.extend(data if isinstance(data, list) else [data])
+    return events
+
+
+def sign(payload, secret):
+    """A Stripe-Signature header for ``payload``, as Stripe would send it"""
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f'{timestamp}.{payload}'.encode(), hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={signature}'
+
+
+class Command(BaseCommand):
+    help = 'Replay recorded Stripe event JSON files through the webhook endpoint (no network access needed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Event JSON files or directories')
+        parser.add_argument('--repeat', type=int, default=1, help='Deliver every event this many times')
+        parser.add_argument('--fresh-ids', action='store_true',
+                            help='Give each delivery a new event ID so repeats are processed instead of deduplicated')
+        parser.add_argument('--process', action='store_true', help='Run the queued jobs afterwards and time them')
+
+    def handle(self, *args, **options):
+        events = load_events(options['paths'])
+        if not events:
+            raise CommandError('No events found')
+
+        # Events are signed locally; without a configured secret use a throwaway one
+        secret = settings.STRIPE_WEBHOOK_SECRET or f'whsec_{secrets.token_hex(16)}'
+        with override_settings(STRIPE_WEBHOOK_SECRET=secret, ALLOWED_HOSTS=['*']):
+            self.deliver(events, secret, options)
+
+        if options['process']:
+            started = time.perf_counter()
+            processed = Worker().run(once=True)
+            self.stdout.write(f'Processed {processed} jobs in {time.perf_counter() - started:.2f}s')
+            by_status = Counter(StripeEvent.objects.values_list('status', flat=True))
+            self.stdout.write('Stored events: ' + ', '.join(f'{status} {count}' for status, count in sorted(by_status.items())))
+
+    def deliver(self, events, secret, options):
+        client = Client(HTTP_HOST='localhost')
+        url = reverse('payments:stripe_webhook')
+        timings, statuses = [], Counter()
+        recorded_before = StripeEvent.objects.count()
+
+        for round_number in range(options['repeat']):
+            for event in events:
+                if options['fresh_ids']:
+                    event = {**event, 'id': f"{event['id']}_replay{round_number}_{secrets.token_hex(4)}"}
+                payload = json.dumps(event)
+                started = time.perf_counter()
+                response = client.post(
+                    url, payload, content_type='application/json', HTTP_STRIPE_SIGNATURE=sign(payload, secret)
+                )
+                timings.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] += 1
+
+        recorded = StripeEvent.objects.count() - recorded_before
+        self.stdout.write(
+            f'Delivered {len(timings)} events: '
+            + ', '.join(f'HTTP {code} x{count}' for code, count in sorted(statuses.items()))
+            + f'; {recorded} new, {statuses[200] - recorded} duplicates'
+        )
+        self.stdout.write(
+            f'Acknowledgement p50 {statistics.median(timings):.2f} ms, '
+            f'p95 {percentile(timings, 0.95):.2f} ms, max {max(timings):.2f} ms'
+        )
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_referralcodesettings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=255, unique=True)),
+                ('event_type', models.CharField(max_length=100)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('received', 'دریافت شده'), ('processed', 'پردازش شده'), ('ignored', 'نادیده گرفته شده')], default='received', max_length=20)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'رویداد Stripe',
+                'verbose_name_plural': 'رویدادهای Stripe',
+                'ordering': ['-received_at'],
+            },
+        ),
+    ]
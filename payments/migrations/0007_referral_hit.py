@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_stripe_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferralHit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hits', models.PositiveIntegerField()),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('referral_code', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hits', to='payments.referralcode')),
+            ],
+            options={
+                'verbose_name': 'بازدید کد معرف',
+                'verbose_name_plural': 'بازدیدهای کد معرف',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_referral_hit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferralCodeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'شمارنده کدهای معرف',
+                'verbose_name_plural': 'شمارنده کدهای معرف',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReservedReferralCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'کد معرف رزرو شده',
+                'verbose_name_plural': 'کدهای معرف رزرو شده',
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_balances(apps, schema_editor):
+    MarketerBalance = apps.get_model('payments', 'MarketerBalance')
+    MarketerCommission = apps.get_model('payments', 'MarketerCommission')
+    ReferralCode = apps.get_model('payments', 'ReferralCode')
+    balances = {}
+    commissions = MarketerCommission.objects.order_by().values('marketer_id').annotate(
+        total_amount=models.Sum('amount'),
+        pending_amount=models.Sum('amount', filter=models.Q(status='pending')),
+        paid_amount=models.Sum('amount', filter=models.Q(status='paid')),
+        cancelled_amount=models.Sum('amount', filter=models.Q(status='cancelled')),
+        commission_count=models.Count('id'),
+    )
+    for row in commissions:
+        marketer_id = row.pop('marketer_id')
+        balances[marketer_id] = {field: value or 0 for field, value in row.items()}
+    codes = ReferralCode.objects.order_by().values('marketer_id').annotate(
+        referral_codes_count=models.Count('id'),
+        active_codes_count=models.Count('id', filter=models.Q(is_active=True)),
+    )
+    for row in codes:
+        balances.setdefault(row.pop('marketer_id'), {}).update(row)
+    MarketerBalance.objects.bulk_create(
+        [MarketerBalance(marketer_id=marketer_id, **values) for marketer_id, values in balances.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_image_variants'),
+        ('payments', '0008_referral_code_pool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketerBalance',
+            fields=[
+                ('marketer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='commission_balance', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('pending_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cancelled_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('commission_count', models.PositiveIntegerField(default=0)),
+                ('referral_codes_count', models.PositiveIntegerField(default=0)),
+                ('active_codes_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'تراز بازاریاب',
+                'verbose_name_plural': 'ترازهای بازاریاب',
+            },
+        ),
+        migrations.RunPython(populate_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.23 on 2026-10-17 22:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0009_marketer_balance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='videoprogress',
+            name='last_watched_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,10 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from courses.models import Course, Section
 import uuid
-import string
-import random
 
 User = get_user_model()
 
@@ -103,7 +101,8 @@ class VideoProgress(models.Model):
     video = models.ForeignKey('courses.Video', on_delete=models.CASCADE)
     watched_seconds = models.PositiveIntegerField(default=0)
     is_completed = models.BooleanField(default=False)
-    last_watched_at = models.DateTimeField(auto_now=True)
+    # Set by the caller (the progress buffer keeps each heartbeat's own time), not on every save
+    last_watched_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         verbose_name = "پیشرفت ویدیو"
@@ -132,33 +131,30 @@ class Cart(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Cart"
     
+    def get_pricing(self):
+        """Priced snapshot of the cart, computed once per instance"""
+        from .pricing import price_cart
+        return price_cart(self)
+    
     def get_subtotal(self):
         """Get subtotal before any discounts"""
-        total = 0
-        for item in self.items.all():
-            if item.course:
-                total += item.course.get_effective_price()
-            elif item.section:
-                total += item.section.price or 0
-        return total
+        return self.get_pricing().subtotal
     
     def get_total_amount(self):
         """Get total amount after applying referral discount"""
-        subtotal = self.get_subtotal()
-        if self.referral_code and self.referral_code.is_available():
-            discount_amount = (subtotal * self.referral_code.discount_percentage) / 100
-            return subtotal - discount_amount
-        return subtotal
+        return self.get_pricing().total
     
     def get_discount_amount(self):
         """Get discount amount from referral code"""
-        if self.referral_code and self.referral_code.is_available():
-            subtotal = self.get_subtotal()
-            return (subtotal * self.referral_code.discount_percentage) / 100
-        return 0
+        return self.get_pricing().discount
     
     def get_total_items(self):
-        return self.items.count()
+        return self.get_pricing().total_items
+    
+    def save(self, *args, **kwargs):
+        from .pricing import invalidate_pricing
+        invalidate_pricing(self)
+        super().save(*args, **kwargs)
     
     def apply_referral_code(self, code):
         """Apply a referral code to the cart"""
@@ -223,17 +219,33 @@ class ReferralCode(models.Model):
     def __str__(self):
         return f"{self.code} - {self.marketer.username}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Code as loaded, so a renamed code's cached entry can be dropped too
+        instance._loaded_code = instance.__dict__.get('code')
+        return instance
+    
     def save(self, *args, **kwargs):
         if not self.code:
             self.code = self.generate_unique_code()
+        else:
+            # Codes are looked up upper-cased (payments/referrals.py)
+            self.code = self.code.strip().upper()
+            if 'code' in (kwargs.get('update_fields') or ['code']):
+                from .codes import release_code
+                release_code(self.code)
         super().save(*args, **kwargs)
+        previous_code = getattr(self, '_loaded_code', None)
+        if previous_code and previous_code != self.code:
+            from .referrals import invalidate_referral_code
+            invalidate_referral_code(previous_code)
+        self._loaded_code = self.code
     
     def generate_unique_code(self):
         """Generate a unique referral code"""
-        while True:
-            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            if not ReferralCode.objects.filter(code=code).exists():
-                return code
+        from .codes import take_code
+        return take_code()
     
     def is_available(self):
         """Check if the referral code can still be used"""
@@ -245,8 +257,10 @@ class ReferralCode(models.Model):
     
     def increment_usage(self):
         """Increment the usage count"""
-        self.current_uses += 1
-        self.save(update_fields=['current_uses'])
+        from .referrals import usage_changed
+        ReferralCode.objects.filter(pk=self.pk).update(current_uses=models.F('current_uses') + 1)
+        self.refresh_from_db(fields=['current_uses'])
+        usage_changed(self)
 
 class ReferralUsage(models.Model):
     """Track when referral codes are used"""
@@ -266,6 +280,42 @@ class ReferralUsage(models.Model):
     def __str__(self):
         return f"{self.referral_code.code} used by {self.customer.username}"
 
+class ReferralCodeCounter(models.Model):
+    """Single row holding the next counter value behind generated referral codes (payments/codes.py)"""
+    next_value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "شمارنده کدهای معرف"
+        verbose_name_plural = "شمارنده کدهای معرف"
+    
+    def __str__(self):
+        return str(self.next_value)
+
+class ReservedReferralCode(models.Model):
+    """Pre-generated free code waiting to be handed to a new ReferralCode"""
+    code = models.CharField(max_length=20, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "کد معرف رزرو شده"
+        verbose_name_plural = "کدهای معرف رزرو شده"
+    
+    def __str__(self):
+        return self.code
+
+class ReferralHit(models.Model):
+    """Landing-page hits of a referral code, appended in batches; a code's clicks are the sum of ``hits``"""
+    referral_code = models.ForeignKey(ReferralCode, on_delete=models.CASCADE, related_name='hits')
+    hits = models.PositiveIntegerField()
+    recorded_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = "بازدید کد معرف"
+        verbose_name_plural = "بازدیدهای کد معرف"
+    
+    def __str__(self):
+        return f"{self.referral_code_id}: {self.hits}"
+
 class MarketerCommission(models.Model):
     """Track marketer commissions"""
     marketer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='commissions', limit_choices_to={'user_type': 'staff'})
@@ -286,6 +336,36 @@ class MarketerCommission(models.Model):
     
     def __str__(self):
         return f"{self.marketer.username} - {self.amount} ({self.get_status_display()})"
+    
+    def save(self, *args, **kwargs):
+        from .ledger import commission_saved
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = MarketerCommission.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'marketer_id', 'status', 'amount'
+                ).first()
+            super().save(*args, **kwargs)
+            commission_saved(previous, self)
+
+class MarketerBalance(models.Model):
+    """Running commission totals and code counts per marketer, kept up to date by payments/ledger.py"""
+    marketer = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='commission_balance')
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    pending_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cancelled_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    commission_count = models.PositiveIntegerField(default=0)
+    referral_codes_count = models.PositiveIntegerField(default=0)
+    active_codes_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "تراز بازاریاب"
+        verbose_name_plural = "ترازهای بازاریاب"
+    
+    def __str__(self):
+        return f"{self.marketer.username} - {self.total_amount}"
 
 class MarketerRegistrationRequest(models.Model):
     """Store requests from users to join the marketers club"""
@@ -414,3 +494,27 @@ class ReferralCodeSettings(models.Model):
             }
         )
         return settings
+
+
+class StripeEvent(models.Model):
+    """A Stripe webhook event, stored once per event ID and processed by a background job"""
+    STATUS_CHOICES = [
+        ('received', 'دریافت شده'),
+        ('processed', 'پردازش شده'),
+        ('ignored', 'نادیده گرفته شده'),
+    ]
+    
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='received')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        verbose_name = "رویداد Stripe"
+        verbose_name_plural = "رویدادهای Stripe"
+        ordering = ['-received_at']
+    
+    def __str__(self):
+        return f"{self.event_type} ({self.event_id})"
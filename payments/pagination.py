@@ -0,0 +1,21 @@
+from courses.pagination import KeysetPagination
+
+
+class CommissionCursorPagination(KeysetPagination):
+    """Newest commissions first"""
+    default_sort = '-created_at'
+    orderings = {
+        '-created_at': ['-created_at', '-id'],
+    }
+
+
+class MarketerCursorPagination(KeysetPagination):
+    """Marketers for the admin panel; the commission sorts use ledger.annotate_balances annotations"""
+    default_sort = '-created_at'
+    orderings = {
+        '-created_at': ['-created_at', '-id'],
+        '-total_commissions': ['-total_commissions', '-id'],
+        'total_commissions': ['total_commissions', 'id'],
+        '-pending_commissions': ['-pending_commissions', '-id'],
+        'pending_commissions': ['pending_commissions', 'id'],
+    }
@@ -0,0 +1,105 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class PricedLine:
+    """One cart item with its price and its share of the referral discount"""
+
+    def __init__(self, item, price):
+        self.item = item
+        self.price = price
+        self.discount = Decimal('0.00')
+
+    @property
+    def total(self):
+        return self.price - self.discount
+
+    @property
+    def title(self):
+        if self.item.course:
+            return self.item.course.title
+        elif self.item.section:
+            return self.item.section.title
+        return ""
+
+
+class CartPricing:
+    """Priced snapshot of a cart computed in a single pass"""
+
+    def __init__(self, lines, referral_code=None):
+        self.lines = lines
+        self.subtotal = sum((line.price for line in lines), Decimal('0.00'))
+        self.referral_code = referral_code if referral_code and referral_code.is_available() else None
+        self.discount = Decimal('0.00')
+        if self.referral_code:
+            self.discount = _money(self.subtotal * self.referral_code.discount_percentage / 100)
+        self.total = self.subtotal - self.discount
+        self._allocate_discount()
+        self._by_item = {line.item.pk: line for line in lines}
+
+    @property
+    def total_items(self):
+        return len(self.lines)
+
+    def line_for(self, item):
+        return self._by_item.get(item.pk)
+
+    def _allocate_discount(self):
+        """Split the discount across lines by price, giving the rounding remainder to the last line"""
+        if not self.discount or not self.subtotal:
+            return
+        remaining = self.discount
+        for line in self.lines[:-1]:
+            line.discount = _money(self.discount * line.price / self.subtotal)
+            remaining -= line.discount
+        self.lines[-1].discount = remaining
+
+
+def cart_items_queryset(cart_items):
+    """Cart items with everything pricing and CartSerializer need"""
+    return cart_items.select_related(
+        'course__category', 'course__instructor', 'course__stats', 'section'
+    ).order_by('added_at', 'id')
+
+
+def price_cart(cart):
+    """Return the cart's priced snapshot, computing it at most once per cart instance.
+
+    Items are loaded in one query (or taken from a ``prefetch_related('items')``
+    cache) and stored back as the prefetched ``items`` so serializers reuse them.
+    """
+    pricing = getattr(cart, '_pricing', None)
+    if pricing is not None:
+        return pricing
+
+    prefetched = getattr(cart, '_prefetched_objects_cache', {})
+    if 'items' in prefetched:
+        items = list(prefetched['items'])
+    else:
+        queryset = cart_items_queryset(cart.items.all())
+        items = list(queryset)
+        cart._prefetched_objects_cache = {**prefetched, 'items': queryset}
+
+    lines = []
+    for item in items:
+        if item.course:
+            price = item.course.get_effective_price()
+        elif item.section:
+            price = item.section.price
+        else:
+            price = 0
+        lines.append(PricedLine(item, _money(price)))
+
+    cart._pricing = CartPricing(lines, cart.referral_code)
+    return cart._pricing
+
+
+def invalidate_pricing(cart):
+    """Forget a computed snapshot after the cart or its items change"""
+    cart.__dict__.pop('_pricing', None)
+    getattr(cart, '_prefetched_objects_cache', {}).pop('items', None)
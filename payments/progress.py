@@ -0,0 +1,136 @@
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import OperationalError, close_old_connections
+from django.utils import timezone
+from courses.models import Video
+from .models import VideoProgress
+
+logger = logging.getLogger(__name__)
+
+COMPLETION_RATIO = 0.9
+
+
+class ProgressBuffer:
+    """Coalesce video progress heartbeats in memory and write them in batches.
+
+    Only the latest position per (user, video) is kept. The buffer is
+    flushed with two ``bulk_create(update_conflicts=True)`` upserts once it
+    holds ``max_size`` entries or ``interval`` seconds after the first
+    pending heartbeat, whichever comes first.
+    """
+
+    def __init__(self, max_size=None, interval=None):
+        self.max_size = max_size or getattr(settings, 'PROGRESS_BUFFER_SIZE', 500)
+        self.interval = interval or getattr(settings, 'PROGRESS_FLUSH_INTERVAL', 10)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def record(self, user_id, video_id, watched_seconds):
+        """Accept one heartbeat; returns without touching the database unless the buffer is full"""
+        with self._lock:
+            self._pending[(user_id, int(video_id))] = (max(0, int(watched_seconds)), timezone.now())
+            full = len(self._pending) >= self.max_size
+            if not full:
+                self._start_timer()
+        if full:
+            self.flush()
+
+    def pending(self, user_id, video_id):
+        """Return the buffered position for a (user, video) pair, if any"""
+        entry = self._pending.get((user_id, video_id))
+        return entry[0] if entry else None
+
+    def flush(self):
+        """Write the buffered entries; if the database is unreachable they are kept for the next flush"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not batch:
+            return 0
+        # Never fail the heartbeat request that happened to fill the buffer
+        try:
+            write_progress(batch)
+        except OperationalError:
+            logger.exception('Writing %d video progress entries failed; keeping them for the next flush', len(batch))
+            self._restore(batch)
+            return 0
+        except Exception:
+            # Not worth retrying (e.g. a user deleted meanwhile); retrying would block every later flush
+            logger.exception('Writing %d video progress entries failed; dropping them', len(batch))
+            return 0
+        return len(batch)
+
+    def _restore(self, batch):
+        with self._lock:
+            for key, entry in batch.items():
+                # Heartbeats recorded since the batch was taken are newer
+                self._pending.setdefault(key, entry)
+            self._start_timer()
+
+    def _start_timer(self):
+        # Called with the lock held
+        if self._timer is None:
+            self._timer = threading.Timer(self.interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_from_timer(self):
+        close_old_connections()
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+
+def write_progress(batch):
+    """Upsert ``{(user_id, video_id): (watched_seconds, watched_at)}`` in at most two statements.
+
+    Rows that reach the completion threshold are written with
+    ``is_completed``; the others never touch that column on conflict, so a
+    lower position can't un-complete a video.
+    """
+    durations = dict(
+        Video.objects.filter(id__in={video_id for _, video_id in batch}).values_list('id', 'duration_seconds')
+    )
+    completed, in_progress = [], []
+    for (user_id, video_id), (watched_seconds, watched_at) in batch.items():
+        if video_id not in durations:
+            continue
+        duration = durations[video_id]
+        is_completed = bool(duration) and watched_seconds >= duration * COMPLETION_RATIO
+        row = VideoProgress(
+            user_id=user_id,
+            video_id=video_id,
+            watched_seconds=watched_seconds,
+            is_completed=is_completed,
+            last_watched_at=watched_at,
+        )
+        (completed if is_completed else in_progress).append(row)
+
+    if completed:
+        VideoProgress.objects.bulk_create(
+            completed,
+            update_conflicts=True,
+            unique_fields=['user', 'video'],
+            update_fields=['watched_seconds', 'is_completed', 'last_watched_at'],
+        )
+    if in_progress:
+        VideoProgress.objects.bulk_create(
+            in_progress,
+            update_conflicts=True,
+            unique_fields=['user', 'video'],
+            update_fields=['watched_seconds', 'last_watched_at'],
+        )
+
+
+progress_buffer = ProgressBuffer()
+atexit.register(progress_buffer.flush)
+
+
+def record_progress(user, video_id, watched_seconds):
+    progress_buffer.record(user.pk, video_id, watched_seconds)
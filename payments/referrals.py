@@ -0,0 +1,148 @@
+import atexit
+import re
+import threading
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .models import ReferralCode, ReferralHit
+
+CACHE_KEY = 'referral:{code}'
+# Cached for codes that don't exist or are inactive
+MISSING = 'missing'
+CODE_RE = re.compile(r'^[A-Z0-9_-]{1,20}$')
+
+
+class ResolvedCode:
+    """What the public referral endpoints need to know about a code"""
+    __slots__ = ('id', 'code', 'discount_percentage', 'is_available')
+
+    def __init__(self, id, code, discount_percentage, is_available):
+        self.id = id
+        self.code = code
+        self.discount_percentage = Decimal(discount_percentage)
+        self.is_available = is_available
+
+
+def normalize_code(code):
+    """Upper-cased code, or None for input that can never be a referral code"""
+    code = (code or '').strip().upper()
+    return code if CODE_RE.match(code) else None
+
+
+def _cache_key(code):
+    return CACHE_KEY.format(code=code)
+
+
+def resolve_code(code):
+    """Look up an active referral code through the cache; None if there is no such active code.
+
+    Unknown codes are cached too (for REFERRAL_NEGATIVE_CACHE_TIMEOUT), so
+    guessing codes on the public endpoints doesn't reach the database. Entries
+    live in the shared cache, so invalidations from checkouts or code changes
+    in any process (web or job worker) apply everywhere.
+    """
+    code = normalize_code(code)
+    if code is None:
+        return None
+
+    key = _cache_key(code)
+    data = cache.get(key)
+    if data is None:
+        row = ReferralCode.objects.filter(code=code, is_active=True).values(
+            'id', 'code', 'discount_percentage', 'max_uses', 'current_uses'
+        ).first()
+        if row is None:
+            cache.set(key, MISSING, settings.REFERRAL_NEGATIVE_CACHE_TIMEOUT)
+            return None
+        is_available = not (row['max_uses'] and row['current_uses'] >= row['max_uses'])
+        data = (row['id'], row['code'], str(row['discount_percentage']), is_available)
+        cache.set(key, data, settings.REFERRAL_CACHE_TIMEOUT)
+    elif data == MISSING:
+        return None
+    return ResolvedCode(*data)
+
+
+def invalidate_referral_code(code):
+    """Drop the cached entry now and again after commit so readers never keep a stale copy"""
+    invalidate_referral_codes([code])
+
+
+def invalidate_referral_codes(codes):
+    keys = [_cache_key(code) for code in map(normalize_code, codes) if code is not None]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def usage_changed(referral_code):
+    """Call after bumping ``current_uses``; only limited codes can cross ``max_uses``"""
+    if referral_code.max_uses:
+        invalidate_referral_code(referral_code.code)
+
+
+class HitBuffer:
+    """Count landing-page hits per code in memory and append them in batches.
+
+    Each flush inserts one ``ReferralHit`` row per code with the number of
+    hits since the last flush, once ``max_size`` hits are pending or
+    ``interval`` seconds after the first one, whichever comes first.
+    """
+
+    def __init__(self, max_size=None, interval=None):
+        self.max_size = max_size or getattr(settings, 'REFERRAL_HIT_BUFFER_SIZE', 1000)
+        self.interval = interval or getattr(settings, 'REFERRAL_HIT_FLUSH_INTERVAL', 10)
+        self._pending = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def record(self, referral_code_id):
+        with self._lock:
+            self._pending[referral_code_id] = self._pending.get(referral_code_id, 0) + 1
+            self._total += 1
+            full = self._total >= self.max_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending, self._total = self._pending, {}, 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if batch:
+            write_hits(batch)
+        return sum(batch.values())
+
+    def _flush_from_timer(self):
+        close_old_connections()
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+
+def write_hits(batch):
+    """Append ``{referral_code_id: hits}`` in one insert, skipping codes deleted meanwhile"""
+    existing = set(ReferralCode.objects.filter(pk__in=batch).values_list('pk', flat=True))
+    now = timezone.now()
+    ReferralHit.objects.bulk_create([
+        ReferralHit(referral_code_id=code_id, hits=hits, recorded_at=now)
+        for code_id, hits in batch.items()
+        if code_id in existing
+    ])
+
+
+hit_buffer = HitBuffer()
+atexit.register(hit_buffer.flush)
+
+
+def record_hit(resolved_code):
+    hit_buffer.record(resolved_code.id)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import (
     Cart, CartItem, ReferralCode, MarketerRegistrationRequest,
@@ -32,12 +33,14 @@ class CartItemSerializer(serializers.ModelSerializer):
         return ""
     
     def get_item_price(self, obj):
-        return obj.get_item_price()
+        pricing = self.context.get('pricing')
+        line = pricing.line_for(obj) if pricing else None
+        return line.price if line else obj.get_item_price()
 
 
 class CartSerializer(serializers.ModelSerializer):
     """Cart serializer"""
-    items = CartItemSerializer(many=True, read_only=True)
+    items = serializers.SerializerMethodField()
     subtotal = serializers.SerializerMethodField()
     discount_amount = serializers.SerializerMethodField()
     referral_discount = serializers.SerializerMethodField()  # Add referral_discount field for frontend compatibility
@@ -54,41 +57,65 @@ class CartSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    def get_items(self, obj):
+        pricing = obj.get_pricing()
+        serializer = CartItemSerializer(
+            [line.item for line in pricing.lines], many=True,
+            context={**self.context, 'pricing': pricing}
+        )
+        return serializer.data
+    
     def get_subtotal(self, obj):
-        return obj.get_subtotal()
+        return obj.get_pricing().subtotal
     
     def get_discount_amount(self, obj):
-        return obj.get_discount_amount()
+        return obj.get_pricing().discount
     
     def get_referral_discount(self, obj):
         """Return referral discount amount for frontend compatibility"""
-        return obj.get_discount_amount()
+        return obj.get_pricing().discount
     
     def get_total_amount(self, obj):
-        return obj.get_total_amount()
+        return obj.get_pricing().total
     
     def get_total(self, obj):
         """Return total amount for frontend compatibility"""
-        return obj.get_total_amount()
+        return obj.get_pricing().total
     
     def get_total_items(self, obj):
-        return obj.get_total_items()
+        return obj.get_pricing().total_items
 
 
 class ReferralCodeSerializer(serializers.ModelSerializer):
     """Referral code serializer"""
     marketer_name = serializers.CharField(source='marketer.get_full_name', read_only=True)
+    # Landing-page hits; annotated by the marketer code list, 0 elsewhere
+    click_count = serializers.IntegerField(read_only=True, default=0)
     
     class Meta:
         model = ReferralCode
         fields = [
             'id', 'code', 'discount_percentage', 'commission_percentage',
-            'is_active', 'max_uses', 'current_uses', 'marketer', 'marketer_name',
+            'is_active', 'max_uses', 'current_uses', 'click_count', 'marketer', 'marketer_name',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'current_uses', 'created_at', 'updated_at']
 
 
+class BulkReferralCodeSerializer(serializers.Serializer):
+    """Input for creating many referral codes in one request"""
+    count = serializers.IntegerField(min_value=1)
+    discount_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    commission_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    max_uses = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    is_active = serializers.BooleanField(default=True)
+    
+    def validate_count(self, value):
+        if value > settings.REFERRAL_BULK_MAX_CODES:
+            raise serializers.ValidationError(f'At most {settings.REFERRAL_BULK_MAX_CODES} codes per request.')
+        return value
+
+
 class MarketerRequestSerializer(serializers.ModelSerializer):
     """Marketer registration request serializer"""
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
@@ -129,12 +156,12 @@ class MarketerCommissionSerializer(serializers.ModelSerializer):
 
 
 class MarketerSerializer(serializers.ModelSerializer):
-    """Marketer serializer for admin panel"""
+    """Marketer serializer for admin panel; expects a queryset passed through ledger.annotate_balances"""
     full_name = serializers.CharField(source='get_full_name', read_only=True)
-    referral_codes_count = serializers.SerializerMethodField()
-    active_codes_count = serializers.SerializerMethodField()
-    total_commissions = serializers.SerializerMethodField()
-    pending_commissions = serializers.SerializerMethodField()
+    referral_codes_count = serializers.IntegerField(read_only=True)
+    active_codes_count = serializers.IntegerField(read_only=True)
+    total_commissions = serializers.DecimalField(max_digits=12, decimal_places=2, coerce_to_string=False, read_only=True)
+    pending_commissions = serializers.DecimalField(max_digits=12, decimal_places=2, coerce_to_string=False, read_only=True)
     join_date = serializers.DateTimeField(source='created_at', read_only=True)
     
     class Meta:
@@ -145,27 +172,6 @@ class MarketerSerializer(serializers.ModelSerializer):
             'pending_commissions', 'join_date', 'is_active'
         ]
         read_only_fields = ['id', 'join_date']
-    
-    def get_referral_codes_count(self, obj):
-        return ReferralCode.objects.filter(marketer=obj).count()
-    
-    def get_active_codes_count(self, obj):
-        return ReferralCode.objects.filter(marketer=obj, is_active=True).count()
-    
-    def get_total_commissions(self, obj):
-        from django.db.models import Sum
-        result = MarketerCommission.objects.filter(marketer=obj).aggregate(
-            total=Sum('amount')
-        )
-        return result['total'] or 0
-    
-    def get_pending_commissions(self, obj):
-        from django.db.models import Sum
-        result = MarketerCommission.objects.filter(
-            marketer=obj, 
-            status='pending'
-        ).aggregate(total=Sum('amount'))
-        return result['total'] or 0
 
 
 class ReferralCodeSettingsSerializer(serializers.ModelSerializer):
@@ -0,0 +1,33 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .entitlements import invalidate_entitlements
+from .ledger import commission_deleted, refresh_code_counts
+from .models import Enrollment, MarketerCommission, ReferralCode
+from .referrals import invalidate_referral_code
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_enrollment_entitlements(sender, instance, **kwargs):
+    invalidate_entitlements(instance.user_id)
+
+
+@receiver(post_save, sender=ReferralCode)
+@receiver(post_delete, sender=ReferralCode)
+def invalidate_cached_referral_code(sender, instance, **kwargs):
+    invalidate_referral_code(instance.code)
+
+
+@receiver(post_save, sender=ReferralCode)
+def count_saved_referral_code(sender, instance, **kwargs):
+    refresh_code_counts([instance.marketer_id])
+
+
+@receiver(post_delete, sender=ReferralCode)
+def count_deleted_referral_code(sender, instance, **kwargs):
+    refresh_code_counts([instance.marketer_id], create=False)
+
+
+@receiver(post_delete, sender=MarketerCommission)
+def remove_deleted_commission(sender, instance, **kwargs):
+    commission_deleted(instance)
@@ -1,3 +1,144 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from courses.models import Category, Course
+from .checkout import CheckoutError, checkout_cart
+from .models import Cart, CartItem, Enrollment, MarketerCommission, Purchase, ReferralCode, ReferralUsage
 
-# Create your tests here.
+User = get_user_model()
+
+
+# Counted statements are the checkout's own, not the shared cache backend's
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ParallelCheckoutTests(TransactionTestCase):
+    """Checkouts racing on one referral code must neither lose increments nor overshoot max_uses"""
+
+    def setUp(self):
+        self.marketer = User.objects.create_user(username='marketer', password='x', user_type='staff')
+        category = Category.objects.create(name='Cardiology', slug='cardiology')
+        self.courses = [
+            Course.objects.create(
+                title=f'Course {i}', slug=f'course-{i}', description='d', short_description='s',
+                category=category, instructor=self.marketer, price=Decimal('100.00'),
+                duration_hours=1, what_you_learn='x', is_published=True
+            )
+            for i in range(2)
+        ]
+
+    def make_carts(self, referral_code, count, items_per_cart):
+        carts = []
+        for i in range(count):
+            user = User.objects.create_user(username=f'buyer{i}', password='x')
+            cart = Cart.objects.create(user=user, referral_code=referral_code)
+            for course in self.courses[:items_per_cart]:
+                CartItem.objects.create(cart=cart, course=course)
+            carts.append(cart.pk)
+        return carts
+
+    def run_in_parallel(self, cart_ids):
+        barrier = threading.Barrier(len(cart_ids))
+        results = []
+
+        def worker(cart_id):
+            try:
+                cart = Cart.objects.select_related('referral_code').get(pk=cart_id)
+                cart.get_pricing()
+                barrier.wait()
+                checkout_cart(cart)
+                results.append('ok')
+            except CheckoutError:
+                results.append('rejected')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(cart_id,)) for cart_id in cart_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_parallel_checkouts_count_every_use(self):
+        code = ReferralCode.objects.create(marketer=self.marketer, code='UNLIMITED', discount_percentage=10)
+        results = self.run_in_parallel(self.make_carts(code, 8, items_per_cart=2))
+
+        code.refresh_from_db()
+        self.assertEqual(results.count('ok'), 8)
+        self.assertEqual(code.current_uses, 16)
+        self.assertEqual(ReferralUsage.objects.filter(referral_code=code).count(), 16)
+        self.assertEqual(MarketerCommission.objects.filter(marketer=self.marketer).count(), 16)
+        self.assertEqual(Enrollment.objects.count(), 16)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_parallel_checkouts_respect_max_uses(self):
+        code = ReferralCode.objects.create(marketer=self.marketer, code='LIMITED', discount_percentage=10, max_uses=5)
+        results = self.run_in_parallel(self.make_carts(code, 8, items_per_cart=1))
+
+        code.refresh_from_db()
+        self.assertEqual(results.count('ok'), 5)
+        self.assertEqual(results.count('rejected'), 3)
+        self.assertEqual(code.current_uses, 5)
+        self.assertEqual(Purchase.objects.count(), 5)
+        self.assertEqual(ReferralUsage.objects.filter(referral_code=code).count(), 5)
+
+    def test_checkout_statement_count_does_not_grow_with_cart_size(self):
+        code = ReferralCode.objects.create(marketer=self.marketer, code='FLAT', discount_percentage=10)
+        [cart_id] = self.make_carts(code, 1, items_per_cart=2)
+        cart = Cart.objects.select_related('referral_code').get(pk=cart_id)
+        cart.get_pricing()
+
+        # BEGIN, counter, purchases, usages, commissions, balance, enrollments, item delete, cart save, COMMIT
+        with self.assertNumQueries(10):
+            purchases = checkout_cart(cart)
+        self.assertEqual([p.amount for p in purchases], [Decimal('90.00'), Decimal('90.00')])
+
+
+class AdminMarketersQueryTests(TestCase):
+    """The admin marketer list must cost the same number of queries however many marketers a page shows"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='x', user_type='admin')
+        self.customer = User.objects.create_user(username='customer', password='x')
+        self.client.force_login(self.admin)
+
+    def add_marketers(self, count):
+        start = User.objects.filter(user_type='staff').count()
+        for i in range(start, start + count):
+            marketer = User.objects.create_user(username=f'marketer{i}', password='x', user_type='staff')
+            code = ReferralCode.objects.create(marketer=marketer, code=f'M{i}')
+            ReferralCode.objects.create(marketer=marketer, code=f'M{i}OFF', is_active=False)
+            purchase = Purchase.objects.create(
+                user=self.customer, purchase_type='course', amount=Decimal('100.00'), referral_code=code
+            )
+            usage = ReferralUsage.objects.create(
+                referral_code=code, customer=self.customer, purchase=purchase,
+                discount_amount=Decimal('0'), commission_amount=Decimal(i + 1)
+            )
+            MarketerCommission.objects.create(marketer=marketer, referral_usage=usage, amount=Decimal(i + 1))
+
+    def fetch(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/admin/marketers/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_query_count_does_not_grow_with_marketers(self):
+        self.add_marketers(2)
+        data, few = self.fetch()
+        self.assertEqual(len(data['marketers']), 2)
+
+        self.add_marketers(8)
+        data, many = self.fetch()
+        self.assertEqual(len(data['marketers']), 10)
+        self.assertEqual(many, few)
+
+    def test_sort_by_pending_commission(self):
+        self.add_marketers(3)
+        User.objects.create_user(username='idle', password='x', user_type='staff')
+        data, _ = self.fetch(sort='-pending_commissions')
+        self.assertEqual([m['pending_commissions'] for m in data['marketers']], [3.0, 2.0, 1.0, 0.0])
+        self.assertEqual(data['marketers'][0]['referral_codes_count'], 2)
+        self.assertEqual(data['marketers'][0]['active_codes_count'], 1)
@@ -6,8 +6,10 @@ from django.contrib import messages
 from django.urls import reverse_lazy
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from .models import Cart, CartItem, Purchase, Enrollment, ReferralCode, ReferralUsage, MarketerCommission, MarketerRegistrationRequest
+from .models import Cart, CartItem, Purchase, ReferralCode, MarketerCommission, MarketerRegistrationRequest
 from .forms import JoinMarketersForm
+from jobs.queue import enqueue
+from .webhooks import InvalidEvent, parse_event, record_event
 import stripe
 import json
 from django.conf import settings
@@ -19,7 +21,8 @@ class CartView(LoginRequiredMixin, DetailView):
     context_object_name = 'cart'
     
     def get_object(self):
-        cart, created = Cart.objects.get_or_create(user=self.request.user)
+        cart, created = Cart.objects.select_related('referral_code').get_or_create(user=self.request.user)
+        cart.get_pricing()
         return cart
 
 class ClearCartView(LoginRequiredMixin, View):
@@ -82,8 +85,8 @@ class RemoveReferralCodeView(LoginRequiredMixin, View):
 
 class CheckoutView(LoginRequiredMixin, View):
     def get(self, request):
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        if not cart.items.exists():
+        cart, created = Cart.objects.select_related('referral_code').get_or_create(user=request.user)
+        if not cart.get_pricing().lines:
             messages.error(request, 'سبد خرید شما خالی است.')
             return redirect('payments:cart')
         
@@ -94,15 +97,17 @@ class CheckoutView(LoginRequiredMixin, View):
         return render(request, 'payments/checkout.html', context)
     
     def post(self, request):
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        if not cart.items.exists():
+        cart, created = Cart.objects.select_related('referral_code').get_or_create(user=request.user)
+        if not cart.get_pricing().lines:
             messages.error(request, 'سبد خرید شما خالی است.')
             return redirect('payments:cart')
         
         try:
+            pricing = cart.get_pricing()
+            
             # Create Stripe payment intent
             intent = stripe.PaymentIntent.create(
-                amount=int(cart.get_total_amount() * 100),  # Convert to cents
+                amount=int(pricing.total * 100),  # Convert to cents
                 currency='usd',  # You might want to change this to IRR if supported
                 metadata={
                     'user_id': request.user.id,
@@ -110,46 +115,20 @@ class CheckoutView(LoginRequiredMixin, View):
                 }
             )
             
-            # Calculate total discount amount
-            total_discount = cart.get_discount_amount()
-            subtotal = cart.get_subtotal()
-            
-            # Create purchase records
-            for item in cart.items.all():
-                if item.course:
-                    original_amount = item.course.get_effective_price()
-                    # Calculate proportional discount for this item
-                    item_discount = (original_amount / subtotal) * total_discount if subtotal > 0 else 0
-                    final_amount = original_amount - item_discount
-                    
-                    purchase = Purchase.objects.create(
-                        user=request.user,
-                        purchase_type='course',
-                        course=item.course,
-                        amount=final_amount,
-                        original_amount=original_amount,
-                        discount_amount=item_discount,
-                        referral_code=cart.referral_code,
-                        transaction_id=intent.id,
-                        payment_status='pending'
-                    )
-                elif item.section:
-                    original_amount = item.section.price
-                    # Calculate proportional discount for this item
-                    item_discount = (original_amount / subtotal) * total_discount if subtotal > 0 else 0
-                    final_amount = original_amount - item_discount
-                    
-                    purchase = Purchase.objects.create(
-                        user=request.user,
-                        purchase_type='section',
-                        section=item.section,
-                        amount=final_amount,
-                        original_amount=original_amount,
-                        discount_amount=item_discount,
-                        referral_code=cart.referral_code,
-                        transaction_id=intent.id,
-                        payment_status='pending'
-                    )
+            # Create purchase records, each carrying its share of the referral discount
+            for line in pricing.lines:
+                Purchase.objects.create(
+                    user=request.user,
+                    purchase_type='course' if line.item.course else 'section',
+                    course=line.item.course,
+                    section=line.item.section,
+                    amount=line.total,
+                    original_amount=line.price,
+                    discount_amount=line.discount,
+                    referral_code=pricing.referral_code,
+                    transaction_id=intent.id,
+                    payment_status='pending'
+                )
             
             return JsonResponse({
                 'client_secret': intent.client_secret,
@@ -166,52 +145,18 @@ class PaymentSuccessView(LoginRequiredMixin, View):
     def get(self, request):
         payment_intent_id = request.GET.get('payment_intent')
         
-        if payment_intent_id:
-            # Update purchase status
-            purchases = Purchase.objects.filter(
-                transaction_id=payment_intent_id,
-                user=request.user
+        if payment_intent_id and Purchase.objects.filter(
+            transaction_id=payment_intent_id,
+            user=request.user
+        ).exists():
+            # Purchases, referral commissions and enrollments are completed by a
+            # background job; the webhook queues the same (idempotent) job
+            enqueue(
+                'payments.complete_payment',
+                unique_key=f'payment:{payment_intent_id}',
+                transaction_id=payment_intent_id
             )
             
-            for purchase in purchases:
-                purchase.payment_status = 'completed'
-                purchase.save()
-                
-                # Handle referral commission if applicable
-                if purchase.referral_code:
-                    # Create referral usage record
-                    referral_usage = ReferralUsage.objects.create(
-                        referral_code=purchase.referral_code,
-                        customer=request.user,
-                        purchase=purchase,
-                        discount_amount=purchase.discount_amount,
-                        commission_amount=(purchase.original_amount * purchase.referral_code.commission_percentage) / 100
-                    )
-                    
-                    # Create marketer commission record
-                    MarketerCommission.objects.create(
-                        marketer=purchase.referral_code.marketer,
-                        referral_usage=referral_usage,
-                        amount=referral_usage.commission_amount
-                    )
-                    
-                    # Increment referral code usage
-                    purchase.referral_code.increment_usage()
-                
-                # Create enrollment
-                if purchase.course:
-                    Enrollment.objects.get_or_create(
-                        user=request.user,
-                        course=purchase.course,
-                        purchase=purchase
-                    )
-                elif purchase.section:
-                    Enrollment.objects.get_or_create(
-                        user=request.user,
-                        section=purchase.section,
-                        purchase=purchase
-                    )
-            
             # Clear cart and referral code
             cart, created = Cart.objects.get_or_create(user=request.user)
             cart.items.all().delete()
@@ -229,29 +174,15 @@ class PaymentCancelView(LoginRequiredMixin, View):
 
 @method_decorator(csrf_exempt, name='dispatch')
 class StripeWebhookView(View):
+    """Record the event and acknowledge at once; a background job applies it"""
     def post(self, request):
-        payload = request.body
-        sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
-        endpoint_secret = 'your_webhook_endpoint_secret'  # Set this in production
-        
         try:
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, endpoint_secret
-            )
-        except ValueError:
-            return HttpResponse(status=400)
-        except stripe.error.SignatureVerificationError:
+            event = parse_event(request.body, request.META.get('HTTP_STRIPE_SIGNATURE'))
+        except InvalidEvent:
             return HttpResponse(status=400)
         
-        # Handle the event
-        if event['type'] == 'payment_intent.succeeded':
-            payment_intent = event['data']['object']
-            # Update purchase status
-            purchases = Purchase.objects.filter(transaction_id=payment_intent['id'])
-            for purchase in purchases:
-                purchase.payment_status = 'completed'
-                purchase.save()
-        
+        # Retries and duplicate deliveries of an already recorded event are acknowledged too
+        record_event(event)
         return HttpResponse(status=200)
 
 class PurchaseHistoryView(LoginRequiredMixin, ListView):
@@ -326,19 +257,10 @@ class MarketerCommissionsView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self.request.user.is_staff_member:
-            from django.db import models
-            total_commission = MarketerCommission.objects.filter(
-                marketer=self.request.user,
-                status='paid'
-            ).aggregate(total=models.Sum('amount'))['total'] or 0
-            
-            pending_commission = MarketerCommission.objects.filter(
-                marketer=self.request.user,
-                status='pending'
-            ).aggregate(total=models.Sum('amount'))['total'] or 0
-            
-            context['total_commission'] = total_commission
-            context['pending_commission'] = pending_commission
+            from .ledger import balance_for
+            balance = balance_for(self.request.user)
+            context['total_commission'] = balance.paid_amount
+            context['pending_commission'] = balance.pending_amount
         return context
 
 class JoinMarketersView(LoginRequiredMixin, View):
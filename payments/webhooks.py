@@ -0,0 +1,80 @@
+import json
+import logging
+import stripe
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from jobs.queue import enqueue
+from .checkout import complete_payment
+from .models import Purchase, StripeEvent
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidEvent(Exception):
+    """Raised for payloads that aren't a correctly signed Stripe event"""
+
+
+def parse_event(payload, signature):
+    """Verify the Stripe-Signature header and decode the event.
+
+    Only the HMAC is checked here; building ``stripe.Event`` objects is left
+    out of the request path.
+    """
+    if not settings.STRIPE_WEBHOOK_SECRET:
+        raise InvalidEvent('STRIPE_WEBHOOK_SECRET is not configured')
+    try:
+        stripe.WebhookSignature.verify_header(
+            payload.decode('utf-8'), signature or '', settings.STRIPE_WEBHOOK_SECRET,
+            tolerance=settings.STRIPE_WEBHOOK_TOLERANCE,
+        )
+        event = json.loads(payload)
+    except (stripe.error.SignatureVerificationError, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidEvent(str(exc))
+    if not isinstance(event, dict) or not event.get('id') or not event.get('type'):
+        raise InvalidEvent('Not a Stripe event')
+    return event
+
+
+def record_event(event):
+    """Store the event and queue its processing; False if this event ID was already recorded"""
+    try:
+        with transaction.atomic():
+            StripeEvent.objects.create(event_id=event['id'], event_type=event['type'], payload=event)
+            enqueue('payments.process_stripe_event', event_id=event['id'])
+    except IntegrityError:
+        return False
+    return True
+
+
+def payment_intent_succeeded(payment_intent):
+    complete_payment(payment_intent['id'])
+
+
+def payment_intent_failed(payment_intent):
+    Purchase.objects.filter(transaction_id=payment_intent['id'], payment_status='pending').update(
+        payment_status='failed', updated_at=timezone.now()
+    )
+
+
+# Event type -> handler taking the event's data.object
+EVENT_HANDLERS = {
+    'payment_intent.succeeded': payment_intent_succeeded,
+    'payment_intent.payment_failed': payment_intent_failed,
+    'payment_intent.canceled': payment_intent_failed,
+}
+
+
+def process_event(event_id):
+    """Apply a recorded event exactly once; runs inside the job's transaction"""
+    event = StripeEvent.objects.select_for_update().filter(event_id=event_id, status='received').first()
+    if event is None:
+        return
+    handler = EVENT_HANDLERS.get(event.event_type)
+    if handler is None:
+        event.status = 'ignored'
+    else:
+        handler(event.payload['data']['object'])
+        event.status = 'processed'
+    event.processed_at = timezone.now()
+    event.save(update_fields=['status', 'processed_at'])
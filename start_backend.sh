@@ -19,6 +19,8 @@ fi
 echo "Running migrations..."
 python manage.py makemigrations
 python manage.py migrate
+# Shared cache table (used when REDIS_URL is not set)
+python manage.py createcachetable
 
 # Create superuser if it doesn't exist
 echo "Creating superuser (if needed)..."
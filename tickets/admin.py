@@ -4,10 +4,11 @@ from .models import SupportTicket, TicketMessage
 
 @admin.register(SupportTicket)
 class SupportTicketAdmin(admin.ModelAdmin):
-    list_display = ['id', 'subject', 'user', 'status', 'priority', 'category', 'assigned_to', 'created_at']
+    list_display = ['id', 'subject', 'user', 'status', 'priority', 'category', 'assigned_to', 'created_at',
+                    'first_response_due_at', 'resolution_due_at']
     list_filter = ['status', 'priority', 'category', 'created_at']
     search_fields = ['subject', 'description', 'user__username', 'user__email']
-    readonly_fields = ['created_at', 'updated_at', 'closed_at']
+    readonly_fields = ['created_at', 'updated_at', 'closed_at', 'first_response_due_at', 'resolution_due_at', 'first_response_at']
     ordering = ['-created_at']
     
     fieldsets = (
@@ -17,6 +18,9 @@ class SupportTicketAdmin(admin.ModelAdmin):
         ('جزئیات تیکت', {
             'fields': ('status', 'priority', 'category', 'assigned_to')
         }),
+        ('مهلت‌ها (SLA)', {
+            'fields': ('first_response_due_at', 'resolution_due_at', 'first_response_at')
+        }),
         ('تاریخ‌ها', {
             'fields': ('created_at', 'updated_at', 'closed_at'),
             'classes': ('collapse',)
@@ -1,15 +1,23 @@
 from django.urls import path
-from . import api_views
+from . import api_views, stream_views
 
 app_name = 'tickets'
 
 urlpatterns = [
     # Admin endpoints
     path('admin/tickets/', api_views.SupportTicketListView.as_view(), name='admin_ticket_list'),
+    path('admin/tickets/claim/', api_views.TicketClaimView.as_view(), name='admin_ticket_claim'),
     path('admin/tickets/<int:ticket_id>/', api_views.SupportTicketDetailView.as_view(), name='admin_ticket_detail'),
+    path('admin/tickets/<int:ticket_id>/messages/', api_views.SupportTicketMessagesView.as_view(), name='admin_ticket_messages'),
     path('admin/tickets/<int:ticket_id>/reply/', api_views.TicketMessageCreateView.as_view(), name='admin_ticket_reply'),
     
+    # Server-sent event streams (ASGI only)
+    path('admin/events/', stream_views.admin_inbox_events, name='admin_inbox_events'),
+    path('admin/tickets/<int:ticket_id>/events/', stream_views.admin_ticket_events, name='admin_ticket_events'),
+    
     # User endpoints
     path('tickets/', api_views.UserTicketsView.as_view(), name='user_tickets'),
     path('tickets/<int:ticket_id>/', api_views.UserTicketDetailView.as_view(), name='user_ticket_detail'),
+    path('tickets/<int:ticket_id>/messages/', api_views.UserTicketMessagesView.as_view(), name='user_ticket_messages'),
+    path('tickets/<int:ticket_id>/events/', stream_views.user_ticket_events, name='user_ticket_events'),
 ]
@@ -3,14 +3,41 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.urls import reverse
 from .models import SupportTicket, TicketMessage
+from .pagination import TicketCursorPagination, TicketMessageCursorPagination
+from .queries import filter_tickets, thread_queryset, ticket_list_queryset
+from .sla import claim_next_ticket
 from .serializers import (
     SupportTicketSerializer, SupportTicketListSerializer, 
     TicketMessageSerializer, CreateTicketMessageSerializer
 )
 
 
+def ticket_with_thread(request, ticket, include_internal, thread_url):
+    """Ticket detail with the newest page of its messages, oldest first.
+    
+    ``messages_next`` points at the thread endpoint (``thread_url``) for older pages.
+    """
+    paginator = TicketMessageCursorPagination(url=thread_url)
+    page = paginator.paginate_queryset(thread_queryset(ticket, include_internal), request)
+    data = SupportTicketSerializer(ticket).data
+    data['messages'] = TicketMessageSerializer(reversed(page), many=True).data
+    data['messages_next'] = paginator.get_next_link()
+    return data
+
+
+def thread_response(request, ticket, include_internal):
+    """One cursor page of a ticket's messages, newest first unless ?sort=created_at"""
+    paginator = TicketMessageCursorPagination()
+    page = paginator.paginate_queryset(thread_queryset(ticket, include_internal), request)
+    return Response({
+        'messages': TicketMessageSerializer(page, many=True).data,
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link()
+    })
+
+
 class SupportTicketListView(APIView):
     """List support tickets for admin"""
     permission_classes = [IsAuthenticated]
@@ -23,35 +50,16 @@ class SupportTicketListView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        tickets = SupportTicket.objects.select_related('user', 'assigned_to').prefetch_related('messages')
-        
-        # Filter by status
-        status_filter = request.query_params.get('status')
-        if status_filter:
-            tickets = tickets.filter(status=status_filter)
-        
-        # Filter by priority
-        priority_filter = request.query_params.get('priority')
-        if priority_filter:
-            tickets = tickets.filter(priority=priority_filter)
-        
-        # Filter by category
-        category_filter = request.query_params.get('category')
-        if category_filter:
-            tickets = tickets.filter(category=category_filter)
-        
-        # Search
-        search = request.query_params.get('search')
-        if search:
-            tickets = tickets.filter(
-                Q(subject__icontains=search) | 
-                Q(description__icontains=search) |
-                Q(user__username__icontains=search) |
-                Q(user__email__icontains=search)
-            )
+        tickets = filter_tickets(ticket_list_queryset(SupportTicket.objects.all()), request.query_params)
         
-        serializer = SupportTicketListSerializer(tickets, many=True)
-        return Response(serializer.data)
+        paginator = TicketCursorPagination()
+        page = paginator.paginate_queryset(tickets, request, view=self)
+        serializer = SupportTicketListSerializer(page, many=True)
+        return Response({
+            'tickets': serializer.data,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link()
+        })
 
 
 class SupportTicketDetailView(APIView):
@@ -66,9 +74,9 @@ class SupportTicketDetailView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        ticket = get_object_or_404(SupportTicket, id=ticket_id)
-        serializer = SupportTicketSerializer(ticket)
-        return Response(serializer.data)
+        ticket = get_object_or_404(SupportTicket.objects.select_related('user', 'assigned_to'), id=ticket_id)
+        thread_url = reverse('tickets:admin_ticket_messages', args=[ticket.id])
+        return Response(ticket_with_thread(request, ticket, True, thread_url))
     
     def put(self, request, ticket_id):
         # Check if user is admin
@@ -99,6 +107,40 @@ class SupportTicketDetailView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TicketClaimView(APIView):
+    """Assign the most urgent unassigned ticket to the requesting admin"""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        # Check if user is admin
+        if not request.user.is_admin_user:
+            return Response(
+                {'error': 'Access denied. Admin privileges required.'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        ticket = claim_next_ticket(request.user)
+        if ticket is None:
+            return Response({'error': 'No unassigned tickets to claim.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(SupportTicketSerializer(ticket).data)
+
+
+class SupportTicketMessagesView(APIView):
+    """Page through a ticket's messages for admin, internal notes included"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, ticket_id):
+        # Check if user is admin
+        if not request.user.is_admin_user:
+            return Response(
+                {'error': 'Access denied. Admin privileges required.'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        ticket = get_object_or_404(SupportTicket, id=ticket_id)
+        return thread_response(request, ticket, include_internal=True)
+
+
 class TicketMessageCreateView(APIView):
     """Create a message in a ticket"""
     permission_classes = [IsAuthenticated]
@@ -137,9 +179,15 @@ class UserTicketsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        tickets = SupportTicket.objects.filter(user=request.user).order_by('-created_at')
-        serializer = SupportTicketListSerializer(tickets, many=True)
-        return Response(serializer.data)
+        tickets = ticket_list_queryset(SupportTicket.objects.filter(user=request.user))
+        paginator = TicketCursorPagination()
+        page = paginator.paginate_queryset(tickets, request, view=self)
+        serializer = SupportTicketListSerializer(page, many=True)
+        return Response({
+            'tickets': serializer.data,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link()
+        })
     
     def post(self, request):
         """Create a new ticket"""
@@ -159,9 +207,9 @@ class UserTicketDetailView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, ticket_id):
-        ticket = get_object_or_404(SupportTicket, id=ticket_id, user=request.user)
-        serializer = SupportTicketSerializer(ticket)
-        return Response(serializer.data)
+        ticket = get_object_or_404(SupportTicket.objects.select_related('user', 'assigned_to'), id=ticket_id, user=request.user)
+        thread_url = reverse('tickets:user_ticket_messages', args=[ticket.id])
+        return Response(ticket_with_thread(request, ticket, False, thread_url))
     
     def post(self, request, ticket_id):
         """Add message to user's ticket"""
@@ -177,3 +225,12 @@ class UserTicketDetailView(APIView):
             return Response(TicketMessageSerializer(message).data, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class UserTicketMessagesView(APIView):
+    """Page through the messages of the user's own ticket; internal notes are filtered out in the query"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, ticket_id):
+        ticket = get_object_or_404(SupportTicket, id=ticket_id, user=request.user)
+        return thread_response(request, ticket, include_internal=False)
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import TicketEvent
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL NOTIFY channel; the payload is the TicketEvent id
+CHANNEL = 'ticket_events'
+# pg_advisory_xact_lock key serialising publish() (arbitrary, unique to this module)
+PUBLISH_LOCK = 0x7469636b
+EVENT_FIELDS = ('id', 'ticket_id', 'kind', 'is_internal', 'assigned_to_id', 'previous_assigned_to_id', 'data')
+
+
+def publish(ticket, kind, data, is_internal=False, previous_assigned_to_id=None):
+    """Record an event and notify the listeners.
+
+    NOTIFY is transactional: listeners hear about the event when the
+    surrounding transaction commits, and never if it rolls back.
+
+    Sequence values are handed out at insert time, not at commit, so two
+    concurrent transactions could make an event visible after a higher id.
+    The advisory lock, held until the surrounding transaction ends, makes
+    event ids follow commit order; streams and the hub resume with a plain
+    ``id > last_id`` because of it.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [PUBLISH_LOCK])
+        event = TicketEvent.objects.create(
+            ticket=ticket, kind=kind, is_internal=is_internal, assigned_to_id=ticket.assigned_to_id,
+            previous_assigned_to_id=previous_assigned_to_id, data={'ticket_id': ticket.id, **data},
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, str(event.id)])
+    return event
+
+
+def ticket_created(ticket):
+    from .serializers import SupportTicketSerializer
+    publish(ticket, 'created', {'ticket': SupportTicketSerializer(ticket).data})
+
+
+def message_created(message):
+    from .serializers import TicketMessageSerializer
+    publish(message.ticket, 'message', {'message': TicketMessageSerializer(message).data}, message.is_internal)
+
+
+def status_changed(ticket, previous_status):
+    publish(ticket, 'status', {
+        'status': ticket.status,
+        'previous_status': previous_status,
+        'assigned_to': ticket.assigned_to_id,
+        'closed_at': ticket.closed_at.isoformat() if ticket.closed_at else None,
+    })
+
+
+def assignment_changed(ticket, previous_assigned_to_id):
+    """Also reaches the previous assignee's inbox, or every inbox if the ticket was unassigned"""
+    publish(ticket, 'assigned', {
+        'assigned_to': ticket.assigned_to_id,
+        'previous_assigned_to': previous_assigned_to_id,
+        'status': ticket.status,
+    }, is_internal=True, previous_assigned_to_id=previous_assigned_to_id)
+
+
+def prune_events():
+    """Delete events older than TICKET_EVENT_RETENTION_HOURS; returns the number deleted"""
+    cutoff = timezone.now() - timedelta(hours=settings.TICKET_EVENT_RETENTION_HOURS)
+    deleted, _ = TicketEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+class EventFilter:
+    """Which events a stream gets, both as a query (for replay) and as a test (for live events)"""
+
+    def __init__(self, query, accepts):
+        self.query = query
+        self.accepts = accepts
+
+
+def ticket_filter(ticket_id, include_internal):
+    query = Q(ticket_id=ticket_id)
+    if not include_internal:
+        query &= Q(is_internal=False)
+    return EventFilter(
+        query, lambda event: event['ticket_id'] == ticket_id and (include_internal or not event['is_internal'])
+    )
+
+
+def inbox_filter(admin_id):
+    """Events of the tickets assigned to this admin or to nobody, and of tickets taken away from either"""
+    return EventFilter(
+        Q(assigned_to_id=admin_id) | Q(assigned_to__isnull=True)
+        | Q(kind='assigned', previous_assigned_to_id=admin_id)
+        | Q(kind='assigned', previous_assigned_to__isnull=True),
+        lambda event: event['assigned_to_id'] in (None, admin_id) or (
+            event['kind'] == 'assigned' and event['previous_assigned_to_id'] in (None, admin_id)
+        ),
+    )
+
+
+def format_event(event):
+    data = json.dumps(event['data'], ensure_ascii=False, separators=(',', ':'))
+    return f'id: {event["id"]}\nevent: {event["kind"]}\ndata: {data}\n\n'
+
+
+class Subscription:
+    """Live events for one stream, handed over to its event loop"""
+
+    def __init__(self, event_filter, loop):
+        self.accepts = event_filter.accepts
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=settings.TICKET_STREAM_QUEUE_SIZE)
+        # Done once the hub is LISTENing, so every event committed from then on reaches the queue
+        self.ready = loop.create_future()
+        # Set when the client fell too far behind; the stream ends so it resumes from the table
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def listening(self):
+        if not self.ready.done():
+            self.ready.set_result(None)
+
+
+class EventHub:
+    """In-process fan-out of ticket events to the open streams of this worker.
+
+    One thread per process LISTENs on its own database connection while any
+    stream is subscribed, loads the notified events in one query and hands
+    each to the matching subscriptions' event loops. The thread exits once
+    the last stream has gone. A subscription's ``ready`` future completes
+    once LISTEN is in place; wait for it before reading the table.
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._listening = False
+        # Newest event seen, to catch up on what was missed while reconnecting
+        self._last_id = None
+
+    def subscribe(self, event_filter):
+        subscription = Subscription(event_filter, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if self._listening:
+                subscription.listening()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='ticket-events', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception('Ticket event listener failed; reconnecting')
+                time.sleep(settings.TICKET_STREAM_RECONNECT_DELAY)
+            finally:
+                connection.close()
+            with self._lock:
+                self._listening = False
+                if not self._subscriptions:
+                    self._thread = None
+                    self._last_id = None
+                    return
+
+    def _listen(self):
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        raw = connection.connection
+        if self._last_id is None:
+            self._last_id = TicketEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        else:
+            self._dispatch(TicketEvent.objects.filter(id__gt=self._last_id))
+        with self._lock:
+            self._listening = True
+            waiting = list(self._subscriptions)
+        for subscription in waiting:
+            self._call(subscription, subscription.listening)
+
+        while True:
+            with self._lock:
+                if not self._subscriptions:
+                    return
+            if select.select([raw], [], [], settings.TICKET_STREAM_POLL_INTERVAL)[0]:
+                raw.poll()
+            if raw.notifies:
+                ids = [int(notify.payload) for notify in raw.notifies]
+                raw.notifies.clear()
+                self._dispatch(TicketEvent.objects.filter(id__in=ids))
+
+    def _dispatch(self, events):
+        events = list(events.order_by('id').values(*EVENT_FIELDS))
+        if not events:
+            return
+        self._last_id = max(self._last_id, events[-1]['id'])
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            for event in events:
+                if subscription.accepts(event) and not self._call(subscription, subscription.deliver, event):
+                    break
+
+    def _call(self, subscription, callback, *args):
+        """Run ``callback`` on the subscription's event loop; False (and unsubscribed) if that loop is closed"""
+        try:
+            subscription.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            self.unsubscribe(subscription)
+            return False
+        return True
+
+
+hub = EventHub()
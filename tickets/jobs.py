@@ -0,0 +1,7 @@
+from jobs.queue import job
+from .events import prune_events
+
+
+@job('tickets.prune_events')
+def prune_events_job():
+    prune_events()
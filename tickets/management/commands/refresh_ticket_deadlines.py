@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from tickets.models import ACTIVE_STATUSES, SupportTicket
+from tickets.sla import refresh_deadlines
+
+
+class Command(BaseCommand):
+    help = 'Recompute ticket SLA deadlines from TICKET_SLA_HOURS after the targets change'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Include closed tickets (default: open and in progress only)')
+    
+    def handle(self, *args, **options):
+        tickets = SupportTicket.objects.all()
+        if not options['all']:
+            tickets = tickets.filter(status__in=ACTIVE_STATUSES)
+        self.stdout.write(self.style.SUCCESS(f'Deadlines recomputed for {refresh_deadlines(tickets)} tickets'))
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:27
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+def populate_last_activity(apps, schema_editor):
+    SupportTicket = apps.get_model('tickets', 'SupportTicket')
+    TicketMessage = apps.get_model('tickets', 'TicketMessage')
+    newest = TicketMessage.objects.filter(ticket=models.OuterRef('pk')).order_by().values('ticket').annotate(
+        newest=models.Max('created_at')
+    ).values('newest')
+    SupportTicket.objects.update(last_activity_at=Coalesce(models.Subquery(newest), models.F('created_at')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supportticket',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='آخرین فعالیت'),
+        ),
+        migrations.RunPython(populate_last_activity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['-last_activity_at', '-id'], name='ticket_last_activity_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tickets', '0003_ticket_message_thread_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('created', 'ایجاد تیکت'), ('message', 'پیام جدید'), ('status', 'تغییر وضعیت')], max_length=10, verbose_name='نوع')),
+                ('is_internal', models.BooleanField(default=False, verbose_name='داخلی')),
+                ('data', models.JSONField(verbose_name='داده')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='تاریخ')),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='مسئول تیکت')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='tickets.supportticket')),
+            ],
+            options={
+                'verbose_name': 'رویداد تیکت',
+                'verbose_name_plural': 'رویدادهای تیکت',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['ticket', 'id'], name='ticket_event_ticket_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:38
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_sla(apps, schema_editor):
+    SupportTicket = apps.get_model('tickets', 'SupportTicket')
+    TicketMessage = apps.get_model('tickets', 'TicketMessage')
+
+    def deadline(index):
+        # created_at + the target for the row's priority and category
+        whens = []
+        for priority, hours in settings.TICKET_SLA_HOURS.items():
+            for category, _ in SupportTicket._meta.get_field('category').choices:
+                factor = settings.TICKET_SLA_CATEGORY_FACTORS.get(category, 1)
+                whens.append(models.When(
+                    priority=priority, category=category,
+                    then=models.F('created_at') + models.Value(timedelta(hours=hours[index] * factor)),
+                ))
+        return models.Case(*whens, output_field=models.DateTimeField())
+
+    first_reply = TicketMessage.objects.filter(
+        ticket=models.OuterRef('pk'), is_internal=False, author__user_type='admin'
+    ).order_by().values('ticket').annotate(first=models.Min('created_at')).values('first')
+    SupportTicket.objects.update(
+        first_response_due_at=deadline(0),
+        resolution_due_at=deadline(1),
+        first_response_at=models.Subquery(first_reply),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0004_ticket_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supportticket',
+            name='first_response_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='زمان اولین پاسخ'),
+        ),
+        migrations.AddField(
+            model_name='supportticket',
+            name='first_response_due_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='مهلت اولین پاسخ'),
+        ),
+        migrations.AddField(
+            model_name='supportticket',
+            name='resolution_due_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='مهلت رسیدگی'),
+        ),
+        migrations.RunPython(populate_sla, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-17 21:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Separate from 0005: PostgreSQL won't build an index in the transaction that just backfilled the table"""
+
+    dependencies = [
+        ('tickets', '0005_ticket_sla'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(condition=models.Q(('assigned_to__isnull', True), ('status__in', ['open', 'in_progress'])), fields=['first_response_due_at', 'id'], name='ticket_claim_queue_idx'),
+        ),
+    ]
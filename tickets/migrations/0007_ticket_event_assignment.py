@@ -0,0 +1,26 @@
+# Generated by Django 4.2.23 on 2026-10-17 22:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tickets', '0006_ticket_claim_queue_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketevent',
+            name='previous_assigned_to',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='مسئول قبلی'),
+        ),
+        migrations.AlterField(
+            model_name='ticketevent',
+            name='kind',
+            field=models.CharField(choices=[('created', 'ایجاد تیکت'), ('message', 'پیام جدید'), ('status', 'تغییر وضعیت'), ('assigned', 'تغییر مسئول')], max_length=10, verbose_name='نوع'),
+        ),
+    ]
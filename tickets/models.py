@@ -4,6 +4,11 @@ from django.utils import timezone
 
 User = get_user_model()
 
+# Statuses still waiting on support; the claim queue only holds these
+ACTIVE_STATUSES = ['open', 'in_progress']
+# Fields SupportTicket.save compares with their loaded values
+TRACKED_FIELDS = ('status', 'priority', 'category', 'assigned_to_id')
+
 
 class SupportTicket(models.Model):
     """Support ticket model for customer service"""
@@ -48,15 +53,67 @@ class SupportTicket(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="آخرین به‌روزرسانی")
     closed_at = models.DateTimeField(null=True, blank=True, verbose_name="تاریخ بسته شدن")
+    # Creation time or the newest message's time; kept by TicketMessage.save so lists can sort on an index
+    last_activity_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="آخرین فعالیت")
+    
+    # SLA: deadlines follow priority and category (tickets/sla.py); the first response is the first public admin reply
+    first_response_due_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="مهلت اولین پاسخ")
+    resolution_due_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="مهلت رسیدگی")
+    first_response_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="زمان اولین پاسخ")
     
     class Meta:
         verbose_name = "تیکت پشتیبانی"
         verbose_name_plural = "تیکت‌های پشتیبانی"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-last_activity_at', '-id'], name='ticket_last_activity_idx'),
+            # Only unassigned active tickets, so claiming the next one stays cheap however large the table gets
+            models.Index(
+                fields=['first_response_due_at', 'id'], name='ticket_claim_queue_idx',
+                condition=models.Q(assigned_to__isnull=True, status__in=ACTIVE_STATUSES),
+            ),
+        ]
     
     def __str__(self):
         return f"#{self.id} - {self.subject} ({self.get_status_display()})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Values as loaded, so save() can tell what changed
+        instance._loaded = {name: instance.__dict__.get(name) for name in TRACKED_FIELDS}
+        return instance
+    
+    def save(self, *args, **kwargs):
+        from .events import assignment_changed, status_changed, ticket_created
+        from .sla import deadlines
+        adding = self._state.adding
+        loaded = getattr(self, '_loaded', {})
+        update_fields = kwargs.get('update_fields')
+        sla_fields = {'priority', 'category'}
+        if adding or (
+            (update_fields is None or sla_fields & set(update_fields))
+            and any(getattr(self, name) != loaded.get(name) for name in sla_fields)
+        ):
+            self.first_response_due_at, self.resolution_due_at = deadlines(
+                self.priority, self.category, self.created_at or timezone.now()
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'first_response_due_at', 'resolution_due_at'}
+        super().save(*args, **kwargs)
+        
+        previous_status = loaded.get('status')
+        if adding:
+            ticket_created(self)
+        else:
+            # Before the status event, so inboxes drop a claimed ticket however the claim changed it
+            if 'assigned_to_id' in loaded and loaded['assigned_to_id'] != self.assigned_to_id:
+                assignment_changed(self, loaded['assigned_to_id'])
+            if previous_status is not None and previous_status != self.status:
+                status_changed(self, previous_status)
+        self._loaded = {name: getattr(self, name) for name in TRACKED_FIELDS}
+    
+    
     def close_ticket(self):
         """Close the ticket"""
         self.status = 'closed'
@@ -71,10 +128,19 @@ class SupportTicket(models.Model):
     
     def get_last_activity(self):
         """Get the last activity time"""
-        last_message = self.messages.last()
-        if last_message:
-            return last_message.created_at
-        return self.created_at
+        return self.last_activity_at
+    
+    def is_first_response_overdue(self):
+        """No public admin reply yet past the deadline, or the first one came late"""
+        if self.first_response_due_at is None:
+            return False
+        return (self.first_response_at or timezone.now()) > self.first_response_due_at
+    
+    def is_resolution_overdue(self):
+        """Still open past the resolution deadline, or closed after it"""
+        if self.resolution_due_at is None:
+            return False
+        return (self.closed_at or timezone.now()) > self.resolution_due_at
 
 
 class TicketMessage(models.Model):
@@ -92,10 +158,33 @@ class TicketMessage(models.Model):
         verbose_name = "پیام تیکت"
         verbose_name_plural = "پیام‌های تیکت"
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['ticket', 'created_at', 'id'], name='ticket_message_thread_idx'),
+        ]
     
     def __str__(self):
         return f"پیام از {self.author.username} در تیکت #{self.ticket.id}"
     
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            SupportTicket.objects.filter(pk=self.ticket_id, last_activity_at__lt=self.created_at).update(
+                last_activity_at=self.created_at
+            )
+            first_response = not self.is_internal and self.is_from_admin()
+            if first_response:
+                SupportTicket.objects.filter(pk=self.ticket_id, first_response_at__isnull=True).update(
+                    first_response_at=self.created_at
+                )
+            # Keep a loaded ticket in step so a later ticket.save() doesn't write the old values back
+            if TicketMessage.ticket.is_cached(self):
+                self.ticket.last_activity_at = max(self.ticket.last_activity_at, self.created_at)
+                if first_response and self.ticket.first_response_at is None:
+                    self.ticket.first_response_at = self.created_at
+            from .events import message_created
+            message_created(self)
+    
     def is_from_admin(self):
         """Check if message is from admin"""
         return self.author.user_type == 'admin'
@@ -103,3 +192,37 @@ class TicketMessage(models.Model):
     def is_from_customer(self):
         """Check if message is from customer"""
         return self.author.user_type == 'customer'
+
+
+class TicketEvent(models.Model):
+    """Ticket change pushed to the live streams; kept for a while so reconnecting clients can catch up"""
+    
+    KIND_CHOICES = [
+        ('created', 'ایجاد تیکت'),
+        ('message', 'پیام جدید'),
+        ('status', 'تغییر وضعیت'),
+        ('assigned', 'تغییر مسئول'),
+    ]
+    
+    ticket = models.ForeignKey(SupportTicket, on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="نوع")
+    # Copied from the message/ticket so streams can filter without joins
+    is_internal = models.BooleanField(default=False, verbose_name="داخلی")
+    assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='+', verbose_name="مسئول تیکت")
+    # Only on 'assigned' events: who had the ticket before (None when it was unassigned)
+    previous_assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                             related_name='+', verbose_name="مسئول قبلی")
+    data = models.JSONField(verbose_name="داده")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="تاریخ")
+    
+    class Meta:
+        verbose_name = "رویداد تیکت"
+        verbose_name_plural = "رویدادهای تیکت"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['ticket', 'id'], name='ticket_event_ticket_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} در تیکت #{self.ticket_id}"
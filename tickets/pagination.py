@@ -0,0 +1,18 @@
+from courses.pagination import KeysetPagination
+
+
+class TicketCursorPagination(KeysetPagination):
+    """Ticket lists, most recently active first (served by ticket_last_activity_idx)"""
+    default_sort = '-last_activity'
+    orderings = {
+        '-last_activity': ['-last_activity_at', '-id'],
+    }
+
+
+class TicketMessageCursorPagination(KeysetPagination):
+    """Messages of one ticket, newest first by default (served by ticket_message_thread_idx)"""
+    default_sort = '-created_at'
+    orderings = {
+        '-created_at': ['-created_at', '-id'],
+        'created_at': ['created_at', 'id'],
+    }
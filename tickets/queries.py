@@ -0,0 +1,59 @@
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from .models import TicketMessage
+
+
+def ticket_list_queryset(tickets):
+    """Tickets with what SupportTicketListSerializer needs, without loading any messages.
+
+    ``message_count`` is a correlated subquery rather than a JOIN + GROUP BY,
+    so with an indexed sort and a page LIMIT it only runs for the rows shown.
+    """
+    message_count = TicketMessage.objects.filter(ticket=OuterRef('pk')).order_by().values('ticket').annotate(
+        count=Count('id')
+    ).values('count')
+    return tickets.select_related('user', 'assigned_to').annotate(
+        # No messages means no group, so the subquery yields NULL rather than 0
+        message_count=Coalesce(Subquery(message_count, output_field=IntegerField()), 0)
+    )
+
+
+def filter_tickets(tickets, params):
+    """Apply the status/priority/category/search filters of the admin ticket lists"""
+    status_filter = params.get('status')
+    if status_filter:
+        tickets = tickets.filter(status=status_filter)
+
+    priority_filter = params.get('priority')
+    if priority_filter:
+        tickets = tickets.filter(priority=priority_filter)
+
+    category_filter = params.get('category')
+    if category_filter:
+        tickets = tickets.filter(category=category_filter)
+
+    search = params.get('search')
+    if search:
+        tickets = tickets.filter(
+            Q(subject__icontains=search) | 
+            Q(description__icontains=search) |
+            Q(user__username__icontains=search) |
+            Q(user__email__icontains=search)
+        )
+    return tickets
+
+
+def refresh_last_activity(tickets):
+    """Recompute ``last_activity_at`` for rows written without TicketMessage.save (bulk inserts, backfills)"""
+    newest = TicketMessage.objects.filter(ticket=OuterRef('pk')).order_by().values('ticket').annotate(
+        newest=Max('created_at')
+    ).values('newest')
+    return tickets.update(last_activity_at=Coalesce(Subquery(newest), F('created_at')))
+
+
+def thread_queryset(ticket, include_internal=True):
+    """A ticket's messages with their authors; customers never get internal notes from the database"""
+    messages = TicketMessage.objects.filter(ticket=ticket).select_related('author')
+    if not include_internal:
+        messages = messages.filter(is_internal=False)
+    return messages
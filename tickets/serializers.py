@@ -15,37 +15,44 @@ class TicketMessageSerializer(serializers.ModelSerializer):
 
 
 class SupportTicketSerializer(serializers.ModelSerializer):
+    """Ticket without its messages; detail views add the newest page of the thread"""
     user = UserSerializer(read_only=True)
     assigned_to = UserSerializer(read_only=True)
-    messages = TicketMessageSerializer(many=True, read_only=True)
-    last_activity = serializers.DateTimeField(read_only=True)
+    last_activity = serializers.DateTimeField(source='last_activity_at', read_only=True)
+    is_first_response_overdue = serializers.BooleanField(read_only=True)
+    is_resolution_overdue = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = SupportTicket
         fields = [
             'id', 'user', 'subject', 'description', 'status', 'priority', 
             'category', 'assigned_to', 'created_at', 'updated_at', 'closed_at',
-            'messages', 'last_activity'
+            'last_activity', 'first_response_due_at', 'resolution_due_at', 'first_response_at',
+            'is_first_response_overdue', 'is_resolution_overdue'
+        ]
+        read_only_fields = [
+            'user', 'created_at', 'updated_at', 'closed_at',
+            'first_response_due_at', 'resolution_due_at', 'first_response_at'
         ]
-        read_only_fields = ['user', 'created_at', 'updated_at', 'closed_at']
 
 
 class SupportTicketListSerializer(serializers.ModelSerializer):
-    """Simplified serializer for ticket lists"""
+    """Simplified serializer for ticket lists; expects queries.ticket_list_queryset"""
     user = UserSerializer(read_only=True)
     assigned_to = UserSerializer(read_only=True)
-    last_activity = serializers.DateTimeField(read_only=True)
-    message_count = serializers.SerializerMethodField()
+    last_activity = serializers.DateTimeField(source='last_activity_at', read_only=True)
+    message_count = serializers.IntegerField(read_only=True)
+    is_first_response_overdue = serializers.BooleanField(read_only=True)
+    is_resolution_overdue = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = SupportTicket
         fields = [
             'id', 'user', 'subject', 'status', 'priority', 'category',
-            'assigned_to', 'created_at', 'updated_at', 'last_activity', 'message_count'
+            'assigned_to', 'created_at', 'updated_at', 'last_activity', 'message_count',
+            'first_response_due_at', 'resolution_due_at', 'first_response_at',
+            'is_first_response_overdue', 'is_resolution_overdue'
         ]
-    
-    def get_message_count(self, obj):
-        return obj.messages.count()
 
 
 class CreateTicketMessageSerializer(serializers.ModelSerializer):
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Min, OuterRef, Subquery, Value, When
+from .models import ACTIVE_STATUSES, SupportTicket, TicketMessage
+
+
+def targets(priority, category):
+    """(first response, resolution) time allowed for a ticket; TICKET_SLA_CATEGORY_FACTORS scales both"""
+    first_response_hours, resolution_hours = settings.TICKET_SLA_HOURS[priority]
+    factor = settings.TICKET_SLA_CATEGORY_FACTORS.get(category, 1)
+    return timedelta(hours=first_response_hours * factor), timedelta(hours=resolution_hours * factor)
+
+
+def deadlines(priority, category, start):
+    first_response, resolution = targets(priority, category)
+    return start + first_response, start + resolution
+
+
+def _deadline_expression(index):
+    """``created_at`` + the target for the row's priority and category, as one CASE"""
+    return Case(
+        *(
+            When(priority=priority, category=category,
+                 then=F('created_at') + Value(targets(priority, category)[index]))
+            for priority, _ in SupportTicket.PRIORITY_CHOICES
+            for category, _ in SupportTicket.CATEGORY_CHOICES
+        ),
+        output_field=DateTimeField(),
+    )
+
+
+def refresh_deadlines(tickets):
+    """Recompute deadlines in one UPDATE, for rows written without SupportTicket.save or after changing the targets"""
+    return tickets.update(
+        first_response_due_at=_deadline_expression(0),
+        resolution_due_at=_deadline_expression(1),
+    )
+
+
+def refresh_first_response(tickets):
+    """Recompute ``first_response_at`` from the earliest public admin reply"""
+    first_reply = TicketMessage.objects.filter(
+        ticket=OuterRef('pk'), is_internal=False, author__user_type='admin'
+    ).order_by().values('ticket').annotate(first=Min('created_at')).values('first')
+    return tickets.update(first_response_at=Subquery(first_reply))
+
+
+def claim_queue(tickets):
+    """Unassigned active tickets, earliest first-response deadline first; matches ticket_claim_queue_idx"""
+    return tickets.filter(assigned_to__isnull=True, status__in=ACTIVE_STATUSES).order_by('first_response_due_at', 'id')
+
+
+def claim_next_ticket(admin):
+    """Assign the most urgent unassigned ticket to ``admin``; None when the queue is empty.
+
+    SKIP LOCKED makes concurrent claims take different tickets instead of
+    queueing behind (or both getting) the same row, and the partial index
+    keeps the lookup at the head of the queue however long the backlog is.
+    """
+    with transaction.atomic():
+        ticket = claim_queue(SupportTicket.objects.select_for_update(skip_locked=True)).first()
+        if ticket is None:
+            return None
+        ticket.assigned_to = admin
+        if ticket.status == 'open':
+            ticket.status = 'in_progress'
+        ticket.save(update_fields=['assigned_to', 'status', 'updated_at'])
+    return ticket
@@ -0,0 +1,138 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from .events import EVENT_FIELDS, format_event, hub, inbox_filter, ticket_filter
+from .models import SupportTicket, TicketEvent
+
+
+@sync_to_async
+def get_user(request):
+    """The session user, loaded outside the event loop"""
+    user = request.user
+    return user if user.is_authenticated else None
+
+
+def last_event_id(request):
+    """``Last-Event-ID`` sent by a reconnecting EventSource (or ?last_event_id=), else None"""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def event_stream(event_filter, last_id):
+    """Replay what the client missed after ``last_id``, then push live events.
+
+    The table is only read once the hub is LISTENing, so nothing committed
+    in between is lost. Event ids follow commit order (see publish), so the
+    stream keeps the id it last sent and skips live events at or below it.
+    Django 4.2 doesn't notice a client going away mid-stream, so streams end
+    after TICKET_STREAM_MAX_DURATION and EventSource reconnects with its
+    Last-Event-ID.
+    """
+    subscription = hub.subscribe(event_filter)
+    try:
+        yield f'retry: {settings.TICKET_STREAM_RETRY_MS}\n\n'
+        try:
+            await asyncio.wait_for(subscription.ready, settings.TICKET_STREAM_HEARTBEAT)
+        except asyncio.TimeoutError:
+            # The listener can't reach the database; EventSource retries later
+            return
+        if last_id is None:
+            # Gives EventSource an id to resume from if it reconnects before any event
+            last_id = await TicketEvent.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+            yield f'id: {last_id}\nevent: ready\ndata: {{}}\n\n'
+        else:
+            oldest = await TicketEvent.objects.order_by('id').values_list('id', flat=True).afirst()
+            missed = TicketEvent.objects.filter(event_filter.query, id__gt=last_id).order_by('id').values(*EVENT_FIELDS)
+            missed = [event async for event in missed[:settings.TICKET_STREAM_REPLAY_LIMIT + 1]]
+            if (oldest is not None and last_id < oldest - 1) or len(missed) > settings.TICKET_STREAM_REPLAY_LIMIT:
+                # Too old or too much to replay: the client should reload the ticket (or list) instead
+                last_id = await TicketEvent.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+                yield f'id: {last_id}\nevent: reset\ndata: {{}}\n\n'
+            else:
+                for event in missed:
+                    last_id = event['id']
+                    yield format_event(event)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.TICKET_STREAM_MAX_DURATION
+        while True:
+            timeout = min(settings.TICKET_STREAM_HEARTBEAT, deadline - loop.time())
+            if timeout <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+            if event['id'] > last_id:
+                last_id = event['id']
+                yield format_event(event)
+            if subscription.overflowed and subscription.queue.empty():
+                break
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def stream_response(request, event_filter):
+    response = StreamingHttpResponse(event_stream(event_filter, last_event_id(request)), content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def unavailable(request):
+    """Response for requests a stream can't serve, else None"""
+    # require_GET can't wrap async views before Django 5.0
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    # Under WSGI Django would try to read the whole (endless) stream before sending it
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Live updates are only served by the ASGI application (medical_course.asgi).'},
+            status=501
+        )
+    return None
+
+
+async def admin_ticket_events(request, ticket_id):
+    """Live messages (internal notes included) and status changes of one ticket for admin"""
+    refused = unavailable(request)
+    if refused is not None:
+        return refused
+    user = await get_user(request)
+    if user is None or not user.is_admin_user:
+        return JsonResponse({'error': 'Access denied. Admin privileges required.'}, status=403)
+    if not await SupportTicket.objects.filter(id=ticket_id).aexists():
+        return JsonResponse({'error': 'Ticket not found.'}, status=404)
+    return stream_response(request, ticket_filter(ticket_id, include_internal=True))
+
+
+async def admin_inbox_events(request):
+    """Live events of every ticket assigned to the admin or still unassigned"""
+    refused = unavailable(request)
+    if refused is not None:
+        return refused
+    user = await get_user(request)
+    if user is None or not user.is_admin_user:
+        return JsonResponse({'error': 'Access denied. Admin privileges required.'}, status=403)
+    return stream_response(request, inbox_filter(user.id))
+
+
+async def user_ticket_events(request, ticket_id):
+    """Live replies and status changes of the user's own ticket; internal notes are never sent"""
+    refused = unavailable(request)
+    if refused is not None:
+        return refused
+    user = await get_user(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required.'}, status=403)
+    if not await SupportTicket.objects.filter(id=ticket_id, user=user).aexists():
+        return JsonResponse({'error': 'Ticket not found.'}, status=404)
+    return stream_response(request, ticket_filter(ticket_id, include_internal=False))